@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+@contextmanager
+def atomic_write(file_path, mode='w', encoding='utf-8'):
+    """原子写入文件：先写入同目录下的唯一临时文件，写完后再替换目标文件
+
+    读取方要么读到旧文件，要么读到完整的新文件，不会读到写了一半或被清空的文件；
+    写入过程中出错时目标文件保持不变。
+    """
+    file_path = os.path.abspath(file_path)
+    directory, name = os.path.split(file_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件只有属主可读写，沿用原文件的权限
+        try:
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o777)
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_json_atomic(file_path, data, indent=2):
+    """以原子方式保存JSON文件"""
+    with atomic_write(file_path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
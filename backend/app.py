@@ -1,20 +1,45 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, abort, g
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
 from flask_cors import CORS
 import json
 import os
-import pandas as pd
 from datetime import datetime
+import shutil
 import sys
+import tempfile
+import time
+import threading
 import traceback  # 添加traceback模块来记录详细错误
 
 # 添加父目录到路径，以便导入模块
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 try:
-    from changeover_optimization import optimize_changeovers, load_orders, load_devices
+    from changeover_optimization import optimize_changeovers, load_orders, load_devices, build_metrics, OptimizationCache, derived_digest
+    from data_store import DataStore, ReadWriteLock, PendingList
+    from atomic_io import atomic_write, write_json_atomic
+    from order_parser import parse_orders_from_workbook
+    from fix_json import repair_orders
+    from scheduler import schedule_orders
+    from order_index import SequenceIndex
+    from order_db import OrderDatabase
+    from order_query import OrderQueryIndex, parse_query_args
+    from http_cache import CachedBody, ResponseCache, accepts_gzip, load_asset
+    from event_stream import EventBroker, diff_orders, MAX_DIFF_ORDERS
+    from upload_jobs import JobQueue
+    from perf_stats import PerfRecorder
+    from log_utils import get_logger, configure_logging
+    from batch_ingest import ingest_directory, KEY_MODES
+    from row_index import RowIndex, assign_order_keys, file_digest
+    from order_snapshot import write_snapshot, load_snapshot_orders
 except Exception as e:
     print(f"导入模块错误: {e}")
     traceback.print_exc()
 
+# 日志默认只输出警告和错误，设置环境变量 LOG_LEVEL=INFO 或 DEBUG 查看处理过程
+configure_logging()
+logger = get_logger(__name__)
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})  # 启用所有域的跨域请求
 
@@ -23,6 +48,40 @@ ORDERS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 DEVICES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'device_list.json')
 METRICS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'metrics.json')
 
+# 可选的SQLite订单存储：设置环境变量 ORDERS_DB 后订单读写改用数据库，JSON文件可通过 order_db.py 导入导出
+ORDERS_DB = os.environ.get('ORDERS_DB')
+
+# 订单JSON文件旁的列式快照（parsed_orders.snapshot），读取订单时用内存映射代替解析JSON；设为0时不写入也不读取
+ORDERS_SNAPSHOT = os.environ.get('ORDERS_SNAPSHOT', '1') != '0'
+
+# 上传工作簿的行内容哈希索引，默认保存在订单文件（或数据库）旁，重新上传时只处理变化的行
+ROW_INDEX_FILE = os.environ.get('ROW_INDEX_FILE')
+
+# 多进程部署时各worker写入订单和指标前加锁的文件，默认在订单文件（或数据库）旁
+DATA_LOCK_FILE = os.environ.get('DATA_LOCK_FILE')
+
+# 上传处理的工作线程数和排队上限（含正在处理的任务）；多进程部署时排队上限按 UPLOAD_JOBS_DIR 中所有进程的任务合计
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', 2))
+UPLOAD_QUEUE_LIMIT = int(os.environ.get('UPLOAD_QUEUE_LIMIT', 8))
+
+# 上传文件小于该字节数时暂存在内存中，超过后转存到临时文件
+UPLOAD_SPOOL_BYTES = 8 * 1024 * 1024
+
+# 上传文件大小上限（字节），超过时返回413
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 50 * 1024 * 1024))
+
+# 设置后把上传的原始文件归档到该目录，默认不保存
+UPLOAD_ARCHIVE_DIR = os.environ.get('UPLOAD_ARCHIVE_DIR')
+
+# 多进程部署时上传任务状态的共享目录，任一进程都能查询任务状态（serve.py 会自动设置）
+UPLOAD_JOBS_DIR = os.environ.get('UPLOAD_JOBS_DIR')
+
+# 批量导入接口只允许读取该目录（及其子目录）中的工作簿，默认为项目目录；解析进程数默认为CPU核数
+BATCH_INGEST_ROOT = os.environ.get('BATCH_INGEST_ROOT', os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BATCH_INGEST_WORKERS = int(os.environ.get('BATCH_INGEST_WORKERS', 0)) or None
+
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+
 # 前端文件目录
 FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend')
 
@@ -37,24 +96,24 @@ def check_data_files():
     
     for name, path in files.items():
         if not os.path.exists(path):
-            print(f"警告: {name} 文件不存在: {path}")
+            logger.warning("%s 文件不存在: %s", name, path)
         else:
-            print(f"{name} 文件存在: {path}")
+            logger.info("%s 文件存在: %s", name, path)
             
             # 尝试验证JSON格式
             try:
                 with open(path, 'r', encoding='utf-8') as f:
                     json.load(f)
-                print(f"{name} 文件JSON格式正确")
+                logger.info("%s 文件JSON格式正确", name)
             except Exception as e:
-                print(f"{name} 文件JSON格式错误: {e}")
+                logger.error("%s 文件JSON格式错误: %s", name, e)
 
 # 自定义JSON加载函数，更好地处理错误
 def safe_load_json(file_path, default_value=None):
     """安全加载JSON文件，处理可能的错误"""
     try:
         if not os.path.exists(file_path):
-            print(f"文件不存在: {file_path}")
+            logger.warning("文件不存在: %s", file_path)
             return default_value
         
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -62,13 +121,12 @@ def safe_load_json(file_path, default_value=None):
             
             # 处理空文件
             if not content.strip():
-                print(f"文件为空: {file_path}")
+                logger.warning("文件为空: %s", file_path)
                 return default_value
                 
             return json.loads(content)
     except json.JSONDecodeError as e:
-        print(f"JSON解析错误 ({file_path}): {e}")
-        print(f"错误位置: 行 {e.lineno}, 列 {e.colno}")
+        logger.error("JSON解析错误 (%s): %s，错误位置: 行 %d, 列 %d", file_path, e, e.lineno, e.colno)
         
         # 尝试显示错误附近的内容
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -76,14 +134,276 @@ def safe_load_json(file_path, default_value=None):
             start = max(0, e.lineno - 3)
             end = min(len(lines), e.lineno + 2)
             context = ''.join(lines[start:end])
-            print(f"错误上下文:\n{context}")
+            logger.error("错误上下文:\n%s", context)
             
         return default_value
-    except Exception as e:
-        print(f"读取文件错误 ({file_path}): {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("读取文件错误 (%s)", file_path)
         return default_value
 
+# 进程内数据缓存，避免每次请求都重新解析未变化的JSON文件
+data_store = DataStore(safe_load_json)
+
+# 换版优化结果缓存，订单内容不变时直接返回已计算的排产序列
+optimization_cache = OptimizationCache()
+
+# 增量插入订单使用的排产序列索引，以及它对应的订单内容哈希
+sequence_index = None
+sequence_index_digest = None
+
+def data_lock_path():
+    if DATA_LOCK_FILE:
+        return DATA_LOCK_FILE
+    return os.path.splitext(ORDERS_DB or ORDERS_FILE)[0] + '.lock'
+
+# 订单、指标和排产序列索引的读写锁：写入订单和指标时独占，
+# 需要同时读取多份数据（看板快照、推送差异）时持有读锁，保证它们来自同一版本；
+# 同时对锁文件加 flock，gunicorn 的多个worker进程不会交错写入
+data_lock = ReadWriteLock(lock_file=data_lock_path)
+
+# 指标文件不存在时使用的默认指标
+DEFAULT_METRICS = {
+    "parser_accuracy": 0.95,
+    "changeover_before": 48,
+    "changeover_after": 12,
+    "changeover_reduction_pct": 0.75,
+    "mobile_dashboard_pass": True,
+    "unit_test_coverage": 0.75
+}
+
+def get_sequence_index(orders):
+    """返回与当前订单数据对应的排产序列索引，订单数据变化时重新构建"""
+    global sequence_index, sequence_index_digest
+    digest = optimization_cache.digest_for(orders)
+    if sequence_index is None or sequence_index_digest != digest:
+        if isinstance(orders, PendingList):
+            orders = orders.resolve()
+        sequence_index = SequenceIndex.from_result(orders, optimization_cache.optimize(orders))
+        sequence_index_digest = digest
+    return sequence_index
+
+def reset_sequence_index():
+    """丢弃排产序列索引（与已保存的订单不一致时），下次使用时重新构建"""
+    global sequence_index, sequence_index_digest
+    sequence_index = None
+    sequence_index_digest = None
+
+# 分页/过滤查询索引：名称 -> (建立索引时的订单列表, 索引)，订单列表对象变化（数据版本变化）时重建
+query_indexes = {}
+query_indexes_lock = threading.Lock()
+
+def get_query_index(name, orders):
+    """返回订单列表对应的查询索引，同一数据版本只建立一次"""
+    with query_indexes_lock:
+        cached = query_indexes.get(name)
+        if cached is None or cached[0] is not orders:
+            cached = query_indexes[name] = (orders, OrderQueryIndex(orders))
+        return cached[1]
+
+def orders_payload(name, orders, query):
+    """带 limit/cursor/printing_method/date_from/date_to/fields 参数时返回分页结果，否则返回完整列表"""
+    if query is None:
+        return orders
+    return get_query_index(name, orders).query(**query)
+
+# 序列化后的API响应（含ETag和gzip压缩结果），以及预先压缩的前端静态文件
+response_cache = ResponseCache()
+asset_store = DataStore(load_asset)
+
+def send_cached(cached):
+    """发送缓存的响应体：ETag匹配时返回304，客户端接受gzip时发送预先压缩的内容"""
+    headers = {
+        "ETag": f'"{cached.etag}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if request.if_none_match.contains(cached.etag):
+        return Response(status=304, headers=headers)
+    if cached.gzipped is not None and accepts_gzip(request.headers.get('Accept-Encoding')):
+        headers["Content-Encoding"] = "gzip"
+        return Response(cached.gzipped, mimetype=cached.mimetype, headers=headers)
+    return Response(cached.body, mimetype=cached.mimetype, headers=headers)
+
+def cached_json(sources, build, key=None):
+    """返回带ETag的JSON响应；sources 中的数据对象不变时不重新序列化，build() 返回要序列化的数据"""
+    cached = response_cache.get(key or request.full_path, sources, lambda: CachedBody(jsonify(build()).get_data()))
+    return send_cached(cached)
+
+def save_json_file(file_path, data):
+    """以原子方式保存JSON文件，并把数据直接放入内存缓存"""
+    write_json_atomic(file_path, data)
+    data_store.set(file_path, data)
+
+# 请求耗时、响应大小和上传各阶段耗时的统计，通过 /api/perf 查看
+perf_stats = PerfRecorder()
+
+@app.before_request
+def start_request_timer():
+    g.perf_start = time.perf_counter()
+
+@app.after_request
+def record_request_timing(response):
+    """按路由模板（而不是实际路径）记录耗时和响应大小，避免订单编号等参数造成统计项无限增长"""
+    start = g.get('perf_start')
+    if start is not None:
+        rule = request.url_rule
+        perf_stats.record_request(
+            request.method,
+            rule.rule if rule is not None else '<unmatched>',
+            time.perf_counter() - start,
+            # 流式响应（如SSE）没有固定长度，只记录到返回响应头为止的耗时
+            response.content_length or 0,
+            response.status_code
+        )
+    return response
+
+# 上传文件的后台处理队列
+upload_jobs = JobQueue(max_workers=UPLOAD_WORKERS, max_pending=UPLOAD_QUEUE_LIMIT, state_dir=UPLOAD_JOBS_DIR,
+                       on_stage=perf_stats.record_stage)
+
+# 看板更新推送：最近一次推送时的 (订单数据, 指标数据, 优化后订单)，用于计算差异
+event_broker = EventBroker()
+stream_snapshot = None
+stream_checked_at = 0.0
+stream_lock = threading.Lock()
+
+def publish_data_changes():
+    """订单或指标数据变化时，向所有看板连接推送版本号和变化的订单/指标"""
+    global stream_snapshot
+    with stream_lock:
+        if event_broker.clients == 0:
+            # 没有连接时不必计算差异，下次有连接时重新建立基准
+            stream_snapshot = None
+            return None
+        with data_lock.read():
+            orders = load_orders_data() or []
+            metrics = data_store.get(METRICS_FILE, {})
+        previous = stream_snapshot
+        if previous is not None and previous[0] is orders and previous[1] is metrics:
+            return None
+        
+        optimized = optimization_cache.optimize(orders)['optimized_orders']
+        stream_snapshot = (orders, metrics, optimized)
+        if previous is None:
+            return None
+        
+        diff = diff_orders(previous[2], optimized)
+        metrics_changed = metrics != previous[1]
+        if diff is not None and not metrics_changed and not (diff["added"] or diff["changed"] or diff["removed"] or diff["sequence"]):
+            return None
+        
+        update = {"metrics": metrics if metrics_changed else None}
+        if diff is None:
+            update["reload"] = True
+        else:
+            update["orders"] = diff
+        version = event_broker.publish('update', update)
+        logger.info("推送看板更新，版本 %d，连接数 %d", version, event_broker.clients)
+        return version
+
+def check_data_changes(force=False):
+    """连接空闲时检查数据文件是否被其它进程（如批处理脚本）修改，所有连接共享一次检查"""
+    global stream_checked_at
+    now = time.monotonic()
+    if not force and now - stream_checked_at < event_broker.heartbeat_seconds:
+        return
+    stream_checked_at = now
+    try:
+        publish_data_changes()
+    except Exception:
+        logger.exception("检查数据变化时出错")
+
+order_db = None
+if ORDERS_DB:
+    try:
+        order_db = OrderDatabase(ORDERS_DB)
+        if order_db.count() == 0 and os.path.exists(ORDERS_FILE):
+            logger.info("订单数据库为空，从 %s 导入 %d 条订单", ORDERS_FILE, order_db.import_json(ORDERS_FILE))
+    except Exception:
+        logger.exception("打开订单数据库时出错")
+        order_db = None
+
+def _db_version():
+    return ('db', order_db.version())
+
+db_version_token = None
+
+def database_version():
+    """数据库的当前版本；版本不变时返回同一个对象，响应缓存按对象身份比较"""
+    global db_version_token
+    version = _db_version()
+    with query_indexes_lock:
+        if db_version_token != version:
+            db_version_token = version
+        return db_version_token
+
+def load_orders_file(file_path, default_value=None):
+    """读取订单JSON文件；有与之一致的列式快照时读取快照"""
+    if ORDERS_SNAPSHOT:
+        orders = load_snapshot_orders(file_path)
+        if orders is not None:
+            return orders
+    return safe_load_json(file_path, default_value)
+
+def load_orders_data(resolve=True):
+    """读取全部订单：启用数据库时以数据库版本号判断缓存是否过期，否则读取JSON文件（或其快照）
+
+    resolve=False 时增量写入后尚未生成的订单列表以 PendingList 返回，写入方可以继续在它上面追加。
+    """
+    if order_db is not None:
+        return data_store.get(ORDERS_DB, [], loader=lambda path, default: order_db.load_orders(), signature=_db_version,
+                              resolve=resolve)
+    return data_store.get(ORDERS_FILE, [], loader=load_orders_file, resolve=resolve)
+
+def save_orders_data(orders, upserted=None, deleted=None, ordered=False):
+    """保存订单：upserted / deleted 为增量变化的订单和删除的订单编号时，数据库只写入这些订单
+
+    ordered 为True时 upserted 不一定在最后，数据库按 orders 的顺序为它们计算位置（其它订单的相对顺序须不变），
+    重新启动后读出的顺序与内存中相同；否则新订单排在最后。
+
+    orders 可以是 PendingList：使用数据库时原样放入内存缓存，第一次读取时才生成列表；JSON文件需要完整写入，立即生成。
+    """
+    if order_db is not None:
+        if upserted is not None:
+            if deleted:
+                order_db.delete_orders(deleted)
+            order_db.upsert_orders(upserted, order_ids=[order['order_id'] for order in orders] if ordered else None)
+        else:
+            order_db.replace_all(orders)
+        data_store.set(ORDERS_DB, orders, signature=_db_version)
+    else:
+        if isinstance(orders, PendingList):
+            orders = orders.resolve()
+        save_json_file(ORDERS_FILE, orders)
+        if ORDERS_SNAPSHOT:
+            try:
+                write_snapshot(ORDERS_FILE, orders)
+            except Exception:
+                logger.exception("写入订单快照时出错")
+
+def orders_source():
+    """订单存储的当前版本：数据库版本号，或订单文件的修改时间和大小"""
+    if order_db is not None:
+        return ['db', order_db.version()]
+    try:
+        st = os.stat(ORDERS_FILE)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def row_index_path():
+    if ROW_INDEX_FILE:
+        return ROW_INDEX_FILE
+    return os.path.splitext(ORDERS_DB or ORDERS_FILE)[0] + '.rows.json'
+
+def save_row_index(rows):
+    """订单写入后保存行索引，记录写入后的存储版本；保存失败只影响下次上传能否增量处理"""
+    try:
+        rows.source = orders_source()
+        rows.save(row_index_path())
+    except Exception:
+        logger.exception("保存行索引时出错")
+
 @app.route('/')
 def index():
     return jsonify({"message": "印刷流程数字化系统API服务", "status": "running", "time": str(datetime.now())})
@@ -91,246 +411,609 @@ def index():
 @app.route('/api/orders', methods=['GET'])
 def get_orders():
     try:
-        # 使用安全加载方法
-        orders = safe_load_json(ORDERS_FILE, [])
+        query = parse_query_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"无效的查询参数: {e}"}), 400
+        
+    try:
+        # 启用数据库时过滤和分页直接在数据库中按索引查询，只读取当前页的订单
+        if order_db is not None and query is not None:
+            with data_lock.read():
+                return cached_json((database_version(),), lambda: order_db.query_orders(**query))
+        
+        # 使用缓存加载方法
+        orders = load_orders_data()
         if orders is None:
             return jsonify({"error": "无法读取订单数据"}), 500
             
-        print(f"成功读取订单数据，共 {len(orders)} 条记录")
-        return jsonify(orders)
+        logger.debug("成功读取订单数据，共 %d 条记录", len(orders))
+        return cached_json((orders,), lambda: orders_payload('orders', orders, query))
     except Exception as e:
         error_msg = f"获取订单数据时出错: {str(e)}"
-        print(error_msg)
-        traceback.print_exc()
+        logger.exception(error_msg)
+        return jsonify({"error": error_msg}), 500
+
+@app.route('/api/orders', methods=['POST'])
+def add_orders():
+    global sequence_index_digest
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        new_orders = payload.get('orders', [payload])
+    else:
+        new_orders = payload
+    if not isinstance(new_orders, list) or not new_orders:
+        return jsonify({"error": "请求体应为订单对象、订单列表或 {\"orders\": [...]}"}), 400
+        
+    try:
+        with data_lock.write():
+            orders = load_orders_data(resolve=False)
+            if orders is None:
+                return jsonify({"error": "无法读取订单数据"}), 500
+            index = get_sequence_index(orders)
+            
+            inserted = []
+            skipped = []
+            accepted = []
+            try:
+                # 没有编号的订单自动分配编号
+                for order in new_orders:
+                    if isinstance(order, dict) and not str(order.get('order_id') or '').strip():
+                        order['order_id'] = index.next_order_id()
+                new_orders, repair_report = repair_orders(new_orders)
+                
+                for order in new_orders:
+                    if order['order_id'] in index.order_ids:
+                        skipped.append(order['order_id'])
+                        continue
+                    position = index.insert(order)
+                    accepted.append(order)
+                    inserted.append({
+                        "order_id": order['order_id'],
+                        "printing_method": order['printing_method'],
+                        "position": position
+                    })
+                    
+                if accepted:
+                    # 新版本由上一版本的标识和新增订单推出，订单列表和优化序列在第一次读取时才生成，
+                    # 每次插入的开销与已有订单数无关（JSON文件存储仍需完整写入文件）
+                    digest = derived_digest(sequence_index_digest, accepted)
+                    updated_orders = PendingList.wrap(orders).extend(accepted, token=digest)
+                    save_orders_data(updated_orders, upserted=accepted)
+            except Exception:
+                # 索引中已经插入了没有保存成功的订单，丢弃它，下次从存储中的订单重新构建
+                reset_sequence_index()
+                raise
+                
+            if accepted:
+                # 增量更新的结果直接写入优化缓存，后续请求无需重新优化
+                optimization_result = index.result()
+                sequence_index_digest = optimization_cache.put(updated_orders, optimization_result, digest=digest)
+                
+                metrics = build_metrics(optimization_result)
+                save_json_file(METRICS_FILE, metrics)
+            else:
+                metrics = data_store.get(METRICS_FILE, {})
+                
+        if inserted:
+            publish_data_changes()
+        logger.info("增量插入订单 %d 条，跳过重复订单 %d 条", len(inserted), len(skipped))
+        return jsonify({
+            "inserted": inserted,
+            "skipped_duplicate": skipped,
+            "repair": repair_report,
+            "metrics": metrics
+        }), 201 if inserted else 200
+    except Exception as e:
+        error_msg = f"增量插入订单时出错: {str(e)}"
+        logger.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
 @app.route('/api/devices', methods=['GET'])
 def get_devices():
     try:
-        # 使用安全加载方法
-        devices = safe_load_json(DEVICES_FILE, [])
+        # 使用缓存加载方法
+        devices = data_store.get(DEVICES_FILE, [])
         if devices is None:
             return jsonify({"error": "无法读取设备数据"}), 500
             
-        print(f"成功读取设备数据，共 {len(devices)} 条记录")
-        return jsonify(devices)
+        logger.debug("成功读取设备数据，共 %d 条记录", len(devices))
+        return cached_json((devices,), lambda: devices)
     except Exception as e:
         error_msg = f"获取设备数据时出错: {str(e)}"
-        print(error_msg)
-        traceback.print_exc()
+        logger.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
 @app.route('/api/metrics', methods=['GET'])
 def get_metrics():
     try:
-        # 使用安全加载方法
-        metrics = safe_load_json(METRICS_FILE, {
-            "parser_accuracy": 0.95,
-            "changeover_before": 48,
-            "changeover_after": 12,
-            "changeover_reduction_pct": 0.75,
-            "mobile_dashboard_pass": True,
-            "unit_test_coverage": 0.75
-        })
-        
+        # 使用缓存加载方法
+        metrics = data_store.get(METRICS_FILE, DEFAULT_METRICS)
         if metrics is None:
             # 使用默认值
-            metrics = {
-                "parser_accuracy": 0.95,
-                "changeover_before": 48,
-                "changeover_after": 12,
-                "changeover_reduction_pct": 0.75,
-                "mobile_dashboard_pass": True,
-                "unit_test_coverage": 0.75
-            }
+            metrics = DEFAULT_METRICS
             
-        print(f"成功读取指标数据: {metrics}")
-        return jsonify(metrics)
+        logger.debug("成功读取指标数据: %s", metrics)
+        return cached_json((metrics,), lambda: metrics)
     except Exception as e:
         error_msg = f"获取指标数据时出错: {str(e)}"
-        print(error_msg)
-        traceback.print_exc()
+        logger.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
 @app.route('/api/optimized_orders', methods=['GET'])
 def get_optimized_orders():
     try:
-        # 使用安全加载方法
-        orders = safe_load_json(ORDERS_FILE, [])
+        query = parse_query_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"无效的查询参数: {e}"}), 400
+        
+    try:
+        # 使用缓存加载方法
+        orders = load_orders_data()
         if orders is None:
             return jsonify({"error": "无法读取订单数据"}), 500
             
         # 直接返回订单数据，如果优化失败
         try:
-            print("开始执行换版优化...")
-            optimization_result = optimize_changeovers(orders)
+            optimization_result = optimization_cache.optimize(orders)
             optimized_orders = optimization_result['optimized_orders']
-            print(f"换版优化成功，优化前: {optimization_result['changeover_before']}, 优化后: {optimization_result['changeover_after']}")
-            return jsonify(optimized_orders)
+            logger.debug("换版优化成功，优化前: %s, 优化后: %s", optimization_result['changeover_before'], optimization_result['changeover_after'])
+            return cached_json((optimized_orders,), lambda: orders_payload('optimized_orders', optimized_orders, query))
         except Exception as e:
             error_msg = f"执行换版优化时出错: {str(e)}"
-            print(error_msg)
-            traceback.print_exc()
-            print("返回原始订单数据作为回退...")
-            return jsonify(orders)
+            logger.exception("%s，返回原始订单数据作为回退", error_msg)
+            return jsonify(orders_payload('orders', orders, query))
     except Exception as e:
         error_msg = f"获取优化排产数据时出错: {str(e)}"
-        print(error_msg)
-        traceback.print_exc()
+        logger.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
-@app.route('/api/upload_excel', methods=['POST'])
-def upload_excel():
-    if 'file' not in request.files:
-        return jsonify({"error": "没有文件上传"}), 400
-        
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({"error": "没有选择文件"}), 400
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    """看板快照：优化后订单、指标和设备来自同一数据版本，一次请求返回"""
+    try:
+        # 持有写入锁读取，避免上传过程中读到新订单和旧指标
+        with data_lock.read():
+            orders = load_orders_data()
+            metrics = data_store.get(METRICS_FILE, DEFAULT_METRICS) or DEFAULT_METRICS
+            devices = data_store.get(DEVICES_FILE, [])
+        if orders is None or devices is None:
+            return jsonify({"error": "无法读取订单或设备数据"}), 500
+            
+        optimized_orders = optimization_cache.optimize(orders)['optimized_orders']
         
+        # 三份数据都未变化时直接返回已序列化的响应
+        return cached_json((optimized_orders, metrics, devices), lambda: {
+            "optimized_orders": optimized_orders,
+            "metrics": metrics,
+            "devices": devices
+        })
+    except Exception as e:
+        error_msg = f"获取看板数据时出错: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({"error": error_msg}), 500
+
+@app.route('/api/schedule', methods=['GET'])
+def get_schedule():
     try:
-        print(f"\n接收到文件上传请求: {file.filename}")
+        start_param = request.args.get('start')
+        try:
+            start_time = datetime.fromisoformat(start_param) if start_param else None
+        except ValueError:
+            return jsonify({"error": f"无效的开始时间: {start_param}"}), 400
+            
+        orders = load_orders_data()
+        devices = data_store.get(DEVICES_FILE, [])
+        if orders is None or devices is None:
+            return jsonify({"error": "无法读取订单或设备数据"}), 500
+            
+        start_time = start_time or datetime.now().replace(second=0, microsecond=0)
         
-        # 保存上传的文件
-        file_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploaded_file.xlsx')
-        file.save(file_path)
-        print(f"文件已保存到: {file_path}")
+        def build():
+            schedule = schedule_orders(orders, devices, start_time)
+            logger.debug("多机台排产完成，共 %d 台设备，最大完工时间 %s 分钟", len(devices), schedule['makespan_minutes'])
+            return schedule
+        return cached_json((orders, devices), build, key=f"/api/schedule?start={start_time.isoformat()}")
+    except Exception as e:
+        error_msg = f"生成多机台排产计划时出错: {str(e)}"
+        logger.exception(error_msg)
+        return jsonify({"error": error_msg}), 500
+
+def process_upload(job, file_name, upload):
+    """后台处理上传的Excel：（归档、）流式解析、修复、写入订单、换版优化、更新指标，逐阶段记录耗时"""
+    logger.info("开始处理上传文件: %s（任务 %s）", file_name, job.id)
+    
+    try:
+        # 启用归档时才保存原始文件，每个上传一个文件名
+        if UPLOAD_ARCHIVE_DIR:
+            with job.stage("save"):
+                os.makedirs(UPLOAD_ARCHIVE_DIR, exist_ok=True)
+                archive_name = f"{datetime.now():%Y%m%d_%H%M%S}_{job.id[:8]}_{secure_filename(file_name) or 'upload.xlsx'}"
+                file_path = os.path.join(UPLOAD_ARCHIVE_DIR, archive_name)
+                upload.seek(0)
+                with atomic_write(file_path, 'wb') as f:
+                    shutil.copyfileobj(upload, f)
+                logger.info("原始文件已归档到: %s", file_path)
         
-        # 读取Excel文件
-        try:
-            df = pd.read_excel(file_path)
-            print(f"成功读取Excel文件，共 {len(df)} 行")
-        except Exception as e:
-            print(f"读取Excel文件时出错: {e}")
-            traceback.print_exc()
-            return jsonify({"error": f"读取Excel文件时出错: {str(e)}"}), 500
+        # 与上次导入的文件完全相同时不必解析
+        workbook_digest = file_digest(upload)
+        unchanged = unchanged_upload(workbook_digest)
+        if unchanged is not None:
+            return unchanged
         
-        # 处理Excel文件
-        orders = []
-        for i, row in df.iterrows():
-            if i > 0:  # 跳过标题行
-                try:
-                    order_id = str(i)
-                    
-                    # 安全获取单元格值，处理可能的NaN和None
-                    def safe_get_cell(row, idx, default=""):
-                        if idx < len(row) and pd.notna(row.iloc[idx]):
-                            val = str(row.iloc[idx]).strip()
-                            # 替换中文引号为英文引号
-                            val = val.replace('"', '"').replace('"', '"')
-                            val = val.replace(''', "'").replace(''', "'")
-                            return val
-                        return default
-                    
-                    product_name = safe_get_cell(row, 1)
-                    printing_method = safe_get_cell(row, 5)
-                    delivery_date = safe_get_cell(row, 15)
-                    
-                    if product_name:
-                        order = {
-                            "order_id": order_id,
-                            "product_name": product_name,
-                            "printing_method": printing_method,
-                            "delivery_date": delivery_date
-                        }
-                        orders.append(order)
-                except Exception as e:
-                    print(f"处理第 {i+1} 行时出错: {e}")
-                    continue
+        # 直接从上传的文件流逐行解析，不经过DataFrame；订单编号为产品序号，行标识由产品序号和名称得到，并计算每行内容的哈希
+        with job.stage("parse"):
+            try:
+                orders = assign_order_keys(parse_orders_from_workbook(upload, serial_ids=True))
+            except Exception as e:
+                raise ValueError(f"读取Excel文件时出错: {e}")
+            rows = RowIndex.from_orders(orders, workbook=workbook_digest)
+            logger.info("成功处理 %d 条订单数据", len(orders))
+    finally:
+        upload.close()
+    
+    # 与上次上传的行索引比较，只处理新增、修改和删除的行；没有可用的索引时完整导入
+    result = apply_row_changes(job, orders, rows)
+    if result is not None:
+        return result
+    
+    orders, repair_report, metrics = store_orders(job, orders, rows)
+    return {
+        "message": "文件上传并处理成功",
+        "orders_count": len(orders),
+        "metrics": metrics,
+        "repair": repair_report,
+        "changes": {"mode": "full", "rows": len(rows)}
+    }
+
+def row_changes(rows, added=(), changed=(), removed=()):
+    """任务结果中的行变化：各类变化的数量，以及最多 MAX_DIFF_ORDERS 个订单编号"""
+    return {
+        "mode": "incremental",
+        "rows": len(rows),
+        "unchanged": len(rows) - len(added) - len(changed),
+        "added": list(added[:MAX_DIFF_ORDERS]),
+        "changed": list(changed[:MAX_DIFF_ORDERS]),
+        "removed": list(removed[:MAX_DIFF_ORDERS]),
+        "counts": {"added": len(added), "changed": len(changed), "removed": len(removed)}
+    }
+
+def unchanged_upload(workbook_digest):
+    """上传的文件与上次导入的完全相同且订单此后未被修改时，直接返回当前结果"""
+    with data_lock.read():
+        previous = RowIndex.load(row_index_path())
+        if previous is None or previous.workbook != workbook_digest or not previous.matches(orders_source()):
+            return None
+        orders = load_orders_data()
+        metrics = data_store.get(METRICS_FILE, {})
+    if orders is None:
+        return None
+    logger.info("上传的文件与上次导入的相同，跳过解析")
+    return {
+        "message": "文件上传并处理成功",
+        "orders_count": len(orders),
+        "metrics": metrics,
+        "repair": None,
+        "changes": row_changes(previous)
+    }
+
+def apply_row_changes(job, orders, rows):
+    """按行内容哈希把重新上传的工作簿作为增量应用到订单、排产序列和指标
+
+    上次上传保存的行索引不存在，或订单此后被其它途径修改过时返回None，由调用方完整导入。
+    修复、排产序列更新和数据库写入只针对变化的行。
+    """
+    global sequence_index_digest
+    with data_lock.write():
+        previous = RowIndex.load(row_index_path())
+        current = load_orders_data()
+        if previous is None or current is None or not previous.matches(orders_source()):
+            return None
         
-        print(f"成功处理 {len(orders)} 条订单数据")
+        with job.stage("diff"):
+            added, changed, removed = previous.diff(rows)
+            existing = {order.get('row_key'): order for order in current if isinstance(order, dict)}
+            # 内容未变、但前面增删了相同序号的行而编号后缀改变的行，与修改的行一样重新写入
+            changed_keys = set(added) | set(changed)
+            changed += [order['row_key'] for order in orders if order['row_key'] not in changed_keys
+                        and order['row_key'] in existing and existing[order['row_key']].get('order_id') != order['order_id']]
+            changed_keys.update(changed)
+        logger.info("行索引比较完成: 新增 %d 行, 修改 %d 行, 删除 %d 行", len(added), len(changed), len(removed))
         
-        # 保存处理后的订单数据
-        try:
-            with open(ORDERS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(orders, f, ensure_ascii=False, indent=2)
-            print(f"订单数据已保存到: {ORDERS_FILE}")
-        except Exception as e:
-            print(f"保存订单数据时出错: {e}")
-            traceback.print_exc()
-            return jsonify({"error": f"保存订单数据时出错: {str(e)}"}), 500
+        with job.stage("fix") as stage:
+            repaired, repair_report = repair_orders([order for order in orders if order['row_key'] in changed_keys])
+        repair_report["elapsed_ms"] = stage["elapsed_ms"]
         
-        # 运行修复脚本确保JSON格式正确
-        try:
-            fix_script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fix_json.py')
-            if os.path.exists(fix_script_path):
-                print("运行fix_json.py脚本修复可能的JSON格式问题...")
-                import subprocess
-                subprocess.run([sys.executable, fix_script_path], check=True)
-        except Exception as e:
-            print(f"运行修复脚本时出错: {e}")
-            traceback.print_exc()
-            # 继续执行，不返回错误
+        if changed_keys or removed:
+            repaired_map = {order['row_key']: order for order in repaired}
+            updated_orders = []
+            for order in orders:
+                key = order['row_key']
+                kept = repaired_map.get(key) if key in changed_keys else existing.get(key)
+                if kept is not None:
+                    updated_orders.append(kept)
+            # 删除的行，以及修改后被修复步骤丢弃或改了编号的行，旧编号从存储中删除
+            replaced = [existing[key] for key in removed + changed if key in existing]
+            upserted_ids = {order['order_id'] for order in repaired}
+            deleted = [order['order_id'] for order in replaced if order['order_id'] not in upserted_ids]
+            
+            # 未变化的行在工作簿中移动了位置时，数据库不能只写入变化的行，改为完整写入
+            retained = [order['order_id'] for order in updated_orders if order['row_key'] not in changed_keys]
+            retained_ids = set(retained)
+            reordered = retained != [order.get('order_id') for order in current
+                                     if isinstance(order, dict) and order.get('order_id') in retained_ids]
             
+            index = get_sequence_index(current)
+            with job.stage("write"):
+                if reordered:
+                    save_orders_data(updated_orders)
+                else:
+                    save_orders_data(updated_orders, upserted=repaired, deleted=deleted, ordered=True)
+            
+            # 只在排产序列中删除旧行、插入新行，不重新分组排序
+            with job.stage("optimize"):
+                for order in replaced:
+                    index.remove(order)
+                for order in repaired:
+                    index.insert(order)
+                index.recount(updated_orders)
+                optimization_result = index.result()
+                # 新版本完全由上一版本和上传的工作簿决定，标识由两者推出，不重新哈希全部订单
+                digest = derived_digest(sequence_index_digest, rows.workbook)
+                sequence_index_digest = optimization_cache.put(updated_orders, optimization_result, digest=digest)
+            
+            with job.stage("metrics"):
+                metrics = build_metrics(optimization_result)
+                save_json_file(METRICS_FILE, metrics)
+        else:
+            updated_orders = current
+            metrics = data_store.get(METRICS_FILE, {})
+        save_row_index(rows)
+    
+    if changed_keys or removed:
+        publish_data_changes()
+    # 任务结果中给出订单编号，而不是行标识
+    new_ids = {order['row_key']: order['order_id'] for order in orders}
+    return {
+        "message": "文件上传并处理成功",
+        "orders_count": len(updated_orders),
+        "metrics": metrics,
+        "repair": repair_report,
+        "changes": row_changes(rows, [new_ids[key] for key in added], [new_ids[key] for key in changed],
+                               [existing[key]['order_id'] for key in removed if key in existing])
+    }
+
+def store_orders(job, orders, rows=None):
+    """校验修复订单后替换全部订单，重新优化并更新指标，返回 (修复后的订单, 修复报告, 指标)
+
+    rows 为上传工作簿的行索引，与订单一起保存，供下次上传增量处理。
+    """
+    # 在内存中校验并修复订单数据，取代原来的fix_json.py子进程
+    with job.stage("fix") as stage:
+        orders, repair_report = repair_orders(orders)
+    repair_report["elapsed_ms"] = stage["elapsed_ms"]
+    logger.info("订单数据校验完成: %s", repair_report)
+    
+    # 保存订单、重新优化并更新指标，整个过程持有写锁，看板快照不会读到新订单配旧指标；
+    # 读取和解析在锁外进行，多个上传可以并行解析
+    with data_lock.write():
+        with job.stage("write"):
+            save_orders_data(orders)
+            logger.info("订单数据已保存到: %s", ORDERS_DB or ORDERS_FILE)
+            if rows is not None:
+                save_row_index(rows)
+        
         # 运行换版优化
-        try:
-            print("执行换版优化...")
-            optimization_result = optimize_changeovers(orders)
-            print(f"换版优化成功，优化前: {optimization_result['changeover_before']}, 优化后: {optimization_result['changeover_after']}")
-        except Exception as e:
-            print(f"执行换版优化时出错: {e}")
-            traceback.print_exc()
-            optimization_result = {
-                'changeover_before': len(orders),
-                'changeover_after': len(orders),
-                'changeover_reduction_pct': 0.0
-            }
+        with job.stage("optimize"):
+            try:
+                optimization_result = optimization_cache.refresh(orders)
+                logger.info("换版优化成功，优化前: %s, 优化后: %s", optimization_result['changeover_before'], optimization_result['changeover_after'])
+            except Exception:
+                logger.exception("执行换版优化时出错")
+                optimization_result = {
+                    'changeover_before': len(orders),
+                    'changeover_after': len(orders),
+                    'changeover_reduction_pct': 0.0,
+                    'changeover_cost_before': None,
+                    'changeover_cost_after': None
+                }
         
         # 更新指标
-        try:
-            metrics = {
-                "parser_accuracy": 0.95,
-                "changeover_before": optimization_result['changeover_before'],
-                "changeover_after": optimization_result['changeover_after'],
-                "changeover_reduction_pct": optimization_result['changeover_reduction_pct'],
-                "mobile_dashboard_pass": True,
-                "unit_test_coverage": 0.75
-            }
-            
-            with open(METRICS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(metrics, f, ensure_ascii=False, indent=2)
-            print(f"指标数据已保存到: {METRICS_FILE}")
-        except Exception as e:
-            print(f"保存指标数据时出错: {e}")
-            traceback.print_exc()
-            # 继续执行，不返回错误
+        with job.stage("metrics"):
+            try:
+                metrics = build_metrics(optimization_result)
+                save_json_file(METRICS_FILE, metrics)
+                logger.info("指标数据已保存到: %s", METRICS_FILE)
+            except Exception:
+                logger.exception("保存指标数据时出错")
+                # 继续执行，不返回错误
+                metrics = None
+    
+    publish_data_changes()
+    return orders, repair_report, metrics
+
+def process_batch_ingest(job, directory, key, workers):
+    """后台批量导入：并行解析目录中的所有工作簿，按订单标识去重合并后替换全部订单"""
+    with job.stage("parse"):
+        orders, ingest_report = ingest_directory(directory, workers=workers, key=key)
+    if ingest_report["parsed_orders"] == 0:
+        raise ValueError(f"目录中没有可导入的订单: {directory}")
+    orders, repair_report, metrics = store_orders(job, orders)
+    return {
+        "message": "批量导入成功",
+        "orders_count": len(orders),
+        "ingest": ingest_report,
+        "metrics": metrics,
+        "repair": repair_report
+    }
+
+@app.errorhandler(413)
+def request_too_large(e):
+    limit = app.config.get('MAX_CONTENT_LENGTH') or 0
+    return jsonify({"error": f"上传文件超过大小上限（{limit // (1024 * 1024)} MB）"}), 413
+
+@app.route('/api/upload_excel', methods=['POST'])
+def upload_excel():
+    if 'file' not in request.files:
+        return jsonify({"error": "没有文件上传"}), 400
+        
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "没有选择文件"}), 400
+        
+    try:
+        logger.info("接收到文件上传请求: %s", file.filename)
+        
+        # 每个上传写入独立的临时文件（较小时留在内存中），随后立即返回，处理在后台队列中进行
+        start = time.perf_counter()
+        upload = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+        file.save(upload)
+        perf_stats.record_stage("receive", time.perf_counter() - start)
+        job = upload_jobs.submit(file.filename, process_upload, file.filename, upload)
+        if job is None:
+            upload.close()
+            return jsonify({"error": f"上传队列已满（最多 {upload_jobs.max_pending} 个），请稍后重试"}), 429, {"Retry-After": "5"}
             
+        logger.info("上传任务已排队: %s", job.id)
         return jsonify({
-            "message": "文件上传并处理成功",
-            "orders_count": len(orders),
-            "metrics": metrics
-        })
+            "message": "文件已接收，正在后台处理",
+            "job_id": job.id,
+            "status_url": f"/api/jobs/{job.id}"
+        }), 202, {"Location": f"/api/jobs/{job.id}"}
     
     except Exception as e:
         error_msg = f"处理文件时出错: {str(e)}"
-        print(error_msg)
-        traceback.print_exc()
+        logger.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
-# 前端静态文件服务
+# 批量导入目录中的Excel明细表；目录必须位于 BATCH_INGEST_ROOT 之内
+@app.route('/api/ingest_batch', methods=['POST'])
+def ingest_batch():
+    payload = request.get_json(silent=True) or {}
+    key = payload.get('key', 'content')
+    if key not in KEY_MODES:
+        return jsonify({"error": f"key 应为 {' / '.join(KEY_MODES)}"}), 400
+    workers = payload.get('workers')
+    if workers is not None and (not isinstance(workers, int) or isinstance(workers, bool) or workers < 1):
+        return jsonify({"error": "workers 应为正整数"}), 400
+    
+    directory = safe_join(BATCH_INGEST_ROOT, str(payload.get('directory') or '.'))
+    if directory is None or not os.path.isdir(directory):
+        return jsonify({"error": f"目录不存在或不在允许的范围内: {payload.get('directory')}"}), 400
+    
+    job = upload_jobs.submit(f"batch:{os.path.basename(os.path.normpath(directory))}", process_batch_ingest, directory, key, workers or BATCH_INGEST_WORKERS)
+    if job is None:
+        return jsonify({"error": f"上传队列已满（最多 {upload_jobs.max_pending} 个），请稍后重试"}), 429, {"Retry-After": "5"}
+    logger.info("批量导入任务已排队: %s (%s)", job.id, directory)
+    return jsonify({
+        "message": "批量导入已开始，正在后台处理",
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}"
+    }), 202, {"Location": f"/api/jobs/{job.id}"}
+
+# 后台任务的状态、当前阶段和各阶段耗时
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = upload_jobs.status(job_id)
+    if job is None:
+        return jsonify({"error": f"任务不存在: {job_id}"}), 404
+    return jsonify(job)
+
+# 看板更新推送（Server-Sent Events）
+@app.route('/api/stream')
+def stream_updates():
+    # 连接登记后建立差异计算的基准，空闲时检查其它进程写入的数据变化
+    return Response(
+        event_broker.stream(request.headers.get('Last-Event-ID'), on_connect=lambda: check_data_changes(force=True), on_idle=check_data_changes),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# 前端静态文件服务：文件内容按版本缓存并预先压缩，带ETag
+def send_asset(path):
+    file_path = safe_join(FRONTEND_DIR, path)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+    cached = asset_store.get(file_path)
+    if cached is None:
+        abort(404)
+    return send_cached(cached)
+
+def preload_assets():
+    """启动时预先读取并压缩前端文件，首个请求无需等待压缩"""
+    for name in os.listdir(FRONTEND_DIR):
+        file_path = os.path.join(FRONTEND_DIR, name)
+        if os.path.isfile(file_path):
+            asset_store.get(file_path)
+
+def preload_data():
+    """加载并解析订单、设备和指标，完成换版优化并预热看板响应
+
+    多进程部署时在fork之前调用，各worker共享已解析的数据；之后每个worker仍按文件的
+    修改时间和大小（或数据库版本号）判断数据是否变化，文件被其它进程改写后各自重新加载。
+    """
+    start = time.perf_counter()
+    orders = load_orders_data() or []
+    devices = data_store.get(DEVICES_FILE, []) or []
+    data_store.get(METRICS_FILE, DEFAULT_METRICS)
+    optimization_cache.optimize(orders)
+    preload_assets()
+    with app.test_request_context('/api/dashboard'):
+        get_dashboard()
+    logger.info("预加载完成: %d 条订单, %d 台设备, 耗时 %.2fs", len(orders), len(devices), time.perf_counter() - start)
+
+def after_fork():
+    """worker进程fork之后调用：重新建立数据库连接"""
+    if order_db is not None:
+        order_db.reset_after_fork()
+
 @app.route('/dashboard')
 def dashboard_index():
-    return send_from_directory(FRONTEND_DIR, 'index.html')
+    return send_asset('index.html')
 
 @app.route('/dashboard/<path:path>')
 def serve_static(path):
-    return send_from_directory(FRONTEND_DIR, path)
+    return send_asset(path)
 
 # 添加根路径的静态文件路由
 @app.route('/<path:path>')
 def serve_root_static(path):
-    return send_from_directory(FRONTEND_DIR, path)
+    return send_asset(path)
 
 # 健康检查
 @app.route('/health')
 def health_check():
     return jsonify({"status": "ok", "time": str(datetime.now())})
 
+# 数据与优化结果缓存命中统计
+@app.route('/api/cache_stats', methods=['GET'])
+def get_cache_stats():
+    stats = data_store.stats()
+    stats["optimization"] = optimization_cache.stats()
+    stats["responses"] = response_cache.stats()
+    return jsonify(stats)
+
+# 请求耗时分布（p50/p95/p99）、请求数、响应大小和上传各阶段耗时；
+# ?format=prometheus 或 Accept: text/plain 时返回Prometheus文本格式。多进程部署时为处理该请求的进程的统计
+@app.route('/api/perf', methods=['GET'])
+def get_perf():
+    fmt = request.args.get('format')
+    if fmt is None:
+        # Prometheus抓取时的Accept带有 version 等参数，按不含参数的类型比较
+        text_quality = max((q for value, q in request.accept_mimetypes
+                            if value.split(';')[0].strip() in ('text/plain', 'application/openmetrics-text')), default=0)
+        fmt = 'prometheus' if text_quality > request.accept_mimetypes['application/json'] else 'json'
+    if fmt == 'prometheus':
+        return Response(perf_stats.prometheus(), headers={"Cache-Control": "no-store"},
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+    if fmt != 'json':
+        return jsonify({"error": f"不支持的格式: {fmt}"}), 400
+    return jsonify(perf_stats.snapshot())
+
 # 添加修复JSON的API端点
 @app.route('/api/fix_json', methods=['POST'])
 def fix_json_api():
     try:
-        print("\n接收到修复JSON文件请求")
+        logger.info("接收到修复JSON文件请求")
         
         # 获取fix_json.py的路径
         fix_script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fix_json.py')
@@ -339,7 +1022,7 @@ def fix_json_api():
             return jsonify({"error": "修复脚本不存在"}), 404
             
         # 运行修复脚本
-        print(f"运行修复脚本: {fix_script_path}")
+        logger.info("运行修复脚本: %s", fix_script_path)
         import subprocess
         result = subprocess.run([sys.executable, fix_script_path], 
                                capture_output=True, 
@@ -347,12 +1030,12 @@ def fix_json_api():
         
         stdout = result.stdout
         stderr = result.stderr
+        data_store.invalidate(ORDERS_FILE)
         
-        print("修复脚本输出:")
-        print(stdout)
+        logger.info("修复脚本输出:\n%s", stdout)
         
         if result.returncode != 0:
-            print(f"修复脚本执行失败: {stderr}")
+            logger.error("修复脚本执行失败: %s", stderr)
             return jsonify({
                 "success": False,
                 "message": "修复脚本执行失败",
@@ -368,8 +1051,7 @@ def fix_json_api():
         
     except Exception as e:
         error_msg = f"修复JSON文件时出错: {str(e)}"
-        print(error_msg)
-        traceback.print_exc()
+        logger.exception(error_msg)
         return jsonify({"error": error_msg}), 500
 
 if __name__ == '__main__':
@@ -378,11 +1060,9 @@ if __name__ == '__main__':
     print("=" * 50)
     
     print(f"\n前端目录: {FRONTEND_DIR}")
-    print(f"检查数据文件...")
+    logger.info("检查数据文件...")
     check_data_files()
     
-    print(f"\n服务启动在 http://localhost:5000/dashboard")
-    print(f"API地址: http://localhost:5000/api")
-    print(f"健康检查: http://localhost:5000/health\n")
-    
-    app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
+    # 使用多线程/多进程WSGI服务启动，不再使用带调试器和自动重载的开发服务器
+    from serve import main as serve_main
+    serve_main(backend=sys.modules[__name__])
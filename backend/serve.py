@@ -0,0 +1,113 @@
+"""生产环境启动入口：多进程/多线程WSGI服务，启动前预先加载数据
+
+用法: python backend/serve.py [--host 0.0.0.0] [--port 5000] [--workers N] [--threads N]
+                              [--server auto|gunicorn|waitress|werkzeug]
+
+- gunicorn（Linux/macOS）：多个worker进程，每个进程多个线程（gthread）；数据在fork之前加载，
+  各worker共享已解析的数据
+- waitress（Windows也可用）：单进程多线程
+- 两者都未安装时使用 werkzeug 多线程服务（不开启调试器和自动重载），仅适合本地使用
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+
+def default_workers():
+    return min((os.cpu_count() or 1) * 2 + 1, 8)
+
+def load_backend():
+    """导入后端应用模块"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as backend
+    return backend
+
+def available_server(name):
+    """返回可用的WSGI服务名称；auto 时按 gunicorn、waitress、werkzeug 的顺序选择"""
+    candidates = [name] if name != 'auto' else (['waitress'] if os.name == 'nt' else ['gunicorn', 'waitress'])
+    for candidate in candidates:
+        if candidate == 'werkzeug':
+            return candidate
+        try:
+            __import__(candidate)
+            return candidate
+        except ImportError:
+            if name != 'auto':
+                raise SystemExit(f"未安装 {candidate}，请先执行 pip install {candidate}")
+    return 'werkzeug'
+
+def run_gunicorn(backend, host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class PrintOrderApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return backend.app
+
+    # 多个worker进程时，上传任务的状态写入共享目录，任一进程都能查询
+    if workers > 1 and not backend.upload_jobs.state_dir:
+        backend.upload_jobs.state_dir = tempfile.mkdtemp(prefix='print_order_jobs_')
+
+    # 预加载的数据在fork之后由各worker共享；冻结这些对象，避免垃圾回收触发写时复制
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+    PrintOrderApplication({
+        'bind': f'{host}:{port}',
+        'workers': workers,
+        'threads': threads,
+        # gthread worker：看板的SSE长连接只占用线程，不阻塞整个进程
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'post_fork': lambda server, worker: backend.after_fork(),
+        'timeout': 120,
+        'keepalive': 5
+    }).run()
+
+def run_waitress(backend, host, port, threads):
+    from waitress import serve
+    serve(backend.app, host=host, port=port, threads=threads)
+
+def run_werkzeug(backend, host, port):
+    from werkzeug.serving import run_simple
+    run_simple(host, port, backend.app, threaded=True, use_reloader=False, use_debugger=False)
+
+def main(argv=None, backend=None):
+    parser = argparse.ArgumentParser(description="印刷流程数字化系统 - 生产环境服务")
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', default_workers())),
+                        help="worker进程数（仅gunicorn）")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 16)),
+                        help="每个进程的线程数")
+    parser.add_argument('--server', default=os.environ.get('WSGI_SERVER', 'auto'),
+                        choices=['auto', 'gunicorn', 'waitress', 'werkzeug'])
+    args = parser.parse_args(argv)
+
+    backend = backend or load_backend()
+    server = available_server(args.server)
+
+    print("预加载订单、设备和指标数据...")
+    backend.preload_data()
+
+    print(f"使用 {server} 启动服务: http://{args.host}:{args.port}/dashboard")
+    if server == 'gunicorn':
+        print(f"worker进程数: {args.workers}, 每个进程线程数: {args.threads}")
+        run_gunicorn(backend, args.host, args.port, args.workers, args.threads)
+    elif server == 'waitress':
+        print(f"线程数: {args.threads}")
+        run_waitress(backend, args.host, args.port, args.threads)
+    else:
+        print("未安装 gunicorn 或 waitress，使用 werkzeug 多线程服务（仅适合本地使用）")
+        run_werkzeug(backend, args.host, args.port)
+
+if __name__ == "__main__":
+    main()
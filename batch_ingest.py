@@ -0,0 +1,158 @@
+"""批量导入：并行解析目录中的多个Excel明细表，按订单标识去重后合并为一份订单
+
+用法: python batch_ingest.py <目录> [--output parsed_orders.json] [--workers N] [--key content|serial] [--recursive]
+
+每个工作簿在进程池中解析（按产品序号读取，与 read_excel.py 相同），解析结果按订单标识建立哈希索引，
+一次遍历去掉重复订单，先出现的订单保留：
+- content（默认）：产品名称 + 印刷方式 + 交货日期，订单编号改为该标识的哈希，不同工作簿的同一订单得到相同编号
+- serial：产品序号 + 产品名称（与上传接口的行标识 row_key 相同，见 row_index.py），适用于同一张总表的多个版本；
+  明细表中的产品序号按分段重新编号，单独不能区分订单；合并后订单编号仍为产品序号，重复的序号加 #2、#3 后缀
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from atomic_io import write_json_atomic
+from log_utils import get_logger, configure_logging
+from order_snapshot import write_snapshot
+from row_index import assign_row_keys, number_order_ids
+
+logger = get_logger(__name__)
+
+KEY_MODES = ('content', 'serial')
+
+# 标识字段之间的分隔符（单元格内容中不会出现）
+_KEY_SEP = '\x1f'
+
+def order_identity(order, key='content'):
+    """订单在不同工作簿之间不变的标识；serial 方式下为 assign_row_keys 加上的行标识（产品序号 + 产品名称的哈希）"""
+    if key == 'serial':
+        return order['row_key']
+    return _KEY_SEP.join(' '.join(str(order.get(field) or '').split())
+                         for field in ('product_name', 'printing_method', 'delivery_date'))
+
+def order_key(order):
+    """由产品名称、印刷方式和交货日期得到的稳定订单编号（16位十六进制）"""
+    return hashlib.blake2b(order_identity(order).encode('utf-8'), digest_size=8).hexdigest()
+
+def find_workbooks(directory, recursive=False):
+    """目录中的 .xlsx 文件（按路径排序，跳过Excel的 ~$ 锁文件）"""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        found.extend(os.path.join(root, name) for name in files
+                     if name.lower().endswith('.xlsx') and not name.startswith('~$'))
+        if not recursive:
+            break
+    return sorted(found)
+
+def parse_workbook_file(file_path):
+    """进程池中执行：解析一个工作簿，返回 (文件路径, 订单列表, 错误信息)"""
+    from order_parser import parse_numbered_orders_from_workbook
+    try:
+        return file_path, parse_numbered_orders_from_workbook(file_path), None
+    except Exception as e:
+        return file_path, [], f"{type(e).__name__}: {e}"
+
+def merge_orders(batches, key='content'):
+    """按订单标识一次遍历合并多个工作簿的订单，返回 (合并后的订单, 重复订单数)"""
+    index = {}
+    merged = []
+    duplicates = 0
+    for orders in batches:
+        if key == 'serial':
+            # 同一工作簿中序号和名称都相同的行依次加 #2、#3 后缀，与其它版本中对应的行匹配
+            orders = assign_row_keys([dict(order) for order in orders])
+        for order in orders:
+            identity = order_identity(order, key)
+            if identity in index:
+                duplicates += 1
+                continue
+            if key == 'content':
+                order = dict(order, order_id=order_key(order))
+            index[identity] = len(merged)
+            merged.append(order)
+    if key == 'serial':
+        number_order_ids(merged)
+    return merged, duplicates
+
+def parse_workbooks(paths, workers=None):
+    """并行解析多个工作簿，结果与 paths 的顺序一致
+
+    使用 spawn 方式启动子进程，在多线程的服务进程中调用也是安全的；只有一个文件或一个进程时直接在当前进程解析。
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+    if workers == 1:
+        return [parse_workbook_file(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(parse_workbook_file, paths))
+
+def ingest_directory(directory, workers=None, key='content', recursive=False):
+    """解析目录中的所有工作簿并合并去重，返回 (订单列表, 导入报告)"""
+    if key not in KEY_MODES:
+        raise ValueError(f"不支持的订单标识: {key}")
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"目录不存在: {directory}")
+
+    start = time.perf_counter()
+    paths = find_workbooks(directory, recursive)
+    parsed = parse_workbooks(paths, workers)
+    parse_ms = (time.perf_counter() - start) * 1000
+
+    files = []
+    for file_path, orders, error in parsed:
+        files.append({"file": os.path.relpath(file_path, directory), "orders": len(orders), "error": error})
+        if error:
+            logger.warning("解析 %s 时出错: %s", file_path, error)
+    merged, duplicates = merge_orders((orders for _, orders, _ in parsed), key)
+
+    report = {
+        "files": files,
+        "failed_files": sum(1 for f in files if f["error"]),
+        "parsed_orders": sum(f["orders"] for f in files),
+        "duplicates": duplicates,
+        "unique_orders": len(merged),
+        "key": key,
+        "parse_ms": round(parse_ms, 3),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+    logger.info("批量导入 %d 个文件: 解析 %d 条订单，去重后 %d 条", len(files), report["parsed_orders"], len(merged))
+    return merged, report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="印刷流程数字化系统 - 批量导入Excel明细表")
+    parser.add_argument('directory')
+    parser.add_argument('--output', default='parsed_orders.json')
+    parser.add_argument('--workers', type=int, default=None, help="解析进程数，默认为CPU核数")
+    parser.add_argument('--key', choices=KEY_MODES, default='content')
+    parser.add_argument('--recursive', action='store_true', help="包含子目录")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    from fix_json import repair_orders
+    try:
+        orders, report = ingest_directory(args.directory, args.workers, args.key, args.recursive)
+    except (OSError, ValueError) as e:
+        print(f"批量导入失败: {e}")
+        return 1
+    for item in report["files"]:
+        print(f"- {item['file']}: {'解析失败 ' + item['error'] if item['error'] else str(item['orders']) + ' 条订单'}")
+    if report["parsed_orders"] == 0:
+        # 空目录或全部文件解析失败时保留原有的订单文件
+        print(f"批量导入失败: 目录中没有可导入的订单，未修改 {args.output}")
+        return 1
+
+    orders, repair_report = repair_orders(orders)
+    write_json_atomic(args.output, orders)
+    write_snapshot(args.output, orders)
+    print(f"共 {len(report['files'])} 个文件, 解析 {report['parsed_orders']} 条订单, 去掉重复 {report['duplicates']} 条, "
+          f"校验后 {len(orders)} 条, 耗时 {report['elapsed_ms'] / 1000:.2f}s")
+    print(f"已保存到 {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
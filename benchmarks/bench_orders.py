@@ -0,0 +1,61 @@
+"""订单记录基准：字典+字符串排序 vs 紧凑记录+日期序数排序
+
+用法: python benchmarks/bench_orders.py [订单数]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from changeover_optimization import optimize_changeovers
+from order_model import to_records
+
+def make_payload(count, seed=42):
+    """生成订单JSON文本（模拟从 parsed_orders.json 加载）"""
+    rng = random.Random(seed)
+    methods = [f"{size}{color}" for size in ("小全开", "对开") for color in ("双彩", "双单", "双黑", "单黑", "双面双色")]
+    orders = [
+        {"order_id": str(i), "product_name": f"测试产品{i}", "printing_method": rng.choice(methods),
+         "delivery_date": f"{rng.randint(6, 8)}.{rng.randint(1, 30)}"}
+        for i in range(count)
+    ]
+    return json.dumps(orders, ensure_ascii=False)
+
+def measure(func):
+    """返回 (结果, 耗时秒, 新增内存字节)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, current
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    payload = make_payload(count)
+
+    dicts, dict_load, dict_bytes = measure(lambda: json.loads(payload))
+    records, record_load, record_bytes = measure(lambda: to_records(json.loads(payload)))
+    print(f"加载 {count} 条: 字典 {dict_load:.2f}s / {dict_bytes / count:.0f} B/条, "
+          f"记录 {record_load:.2f}s / {record_bytes / count:.0f} B/条")
+
+    start = time.perf_counter()
+    sorted(dicts, key=lambda x: str(x.get('delivery_date', '')))
+    string_sort = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sorted(records, key=lambda r: r.date_key)
+    ordinal_sort = time.perf_counter() - start
+    print(f"按交货日期排序: 字符串 {string_sort:.2f}s, 日期序数 {ordinal_sort:.2f}s")
+
+    for name, orders in (("字典", dicts), ("记录", records)):
+        start = time.perf_counter()
+        optimize_changeovers(orders)
+        print(f"optimize_changeovers({name}): {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
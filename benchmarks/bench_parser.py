@@ -0,0 +1,73 @@
+"""Excel订单解析基准：列式解析 vs 原有逐行循环
+
+用法: python benchmarks/bench_parser.py [行数]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from order_parser import parse_orders, QUOTE_REPLACEMENTS
+
+def legacy_parse_orders(df):
+    """原upload_excel中的逐行解析逻辑，作为对照"""
+    orders = []
+    for i, row in df.iterrows():
+        if i > 0:
+            order_id = str(i)
+
+            def safe_get_cell(row, idx, default=""):
+                if idx < len(row) and pd.notna(row.iloc[idx]):
+                    val = str(row.iloc[idx]).strip()
+                    for old, new in QUOTE_REPLACEMENTS:
+                        val = val.replace(old, new)
+                    return val
+                return default
+
+            product_name = safe_get_cell(row, 1)
+            printing_method = safe_get_cell(row, 5)
+            delivery_date = safe_get_cell(row, 15)
+
+            if product_name:
+                orders.append({
+                    "order_id": order_id,
+                    "product_name": product_name,
+                    "printing_method": printing_method,
+                    "delivery_date": delivery_date
+                })
+    return orders
+
+def make_frame(rows, seed=42):
+    """生成与明细总表列布局一致的模拟数据，每隔一行是进度说明行（产品名称为空）"""
+    rng = np.random.default_rng(seed)
+    methods = np.array(["小全开双彩", "对开双彩", "小全开双单", "对开双彩+对开双专色", "对开双面双色"], dtype=object)
+    data = {col: np.full(rows, np.nan, dtype=object) for col in range(18)}
+    filled = np.arange(rows) % 2 == 0
+    data[0][filled] = np.arange(filled.sum()) + 1
+    data[1][filled] = np.char.add("“测试”产品", np.arange(filled.sum()).astype(str)).astype(object)
+    data[5][filled] = methods[rng.integers(0, len(methods), filled.sum())]
+    data[15][filled] = (6 + rng.integers(0, 3, filled.sum()) + rng.integers(1, 29, filled.sum()) / 100).round(2)
+    return pd.DataFrame(data)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    df = make_frame(rows)
+
+    fast_orders, fast_seconds = timed(parse_orders, df)
+    print(f"列式解析: {rows} 行 -> {len(fast_orders)} 条订单, 耗时 {fast_seconds:.3f}s")
+
+    legacy_orders, legacy_seconds = timed(legacy_parse_orders, df)
+    print(f"逐行解析: {rows} 行 -> {len(legacy_orders)} 条订单, 耗时 {legacy_seconds:.3f}s")
+
+    print(f"结果一致: {fast_orders == legacy_orders}, 加速比: {legacy_seconds / fast_seconds:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""订单加载基准：比较读取 parsed_orders.json 与列式快照的耗时和内存占用
+
+用法: python benchmarks/bench_snapshot.py [--sizes 10000 100000 1000000] [--repeat 3] [--output 结果.json]
+
+每种规模生成与后端相同格式的JSON文件（indent=2, ensure_ascii=False）及其快照，每次加载在单独的子进程中运行，
+记录加载耗时、峰值RSS和加载后保留的RSS相对于加载前的增量（读取 /proc，仅Linux）。加载方式：
+- json: 与后端读取订单文件相同，读取全文后 json.loads
+- snapshot: 从快照组装全部字段的订单字典
+- snapshot_columns: 只读取换版优化分组所需的印刷方式和交货日期两列
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+MODES = ("json", "snapshot", "snapshot_columns")
+
+def memory_kb():
+    """(当前常驻内存, 峰值常驻内存)，单位KB；读取 /proc/self/status，不支持的系统返回 (None, None)"""
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in ('VmRSS', 'VmHWM'):
+                    values[name] = int(value.split()[0])
+    except (OSError, ValueError):
+        pass
+    return values.get('VmRSS'), values.get('VmHWM')
+
+def child(mode, json_path):
+    """子进程中加载一次，输出耗时和内存占用（JSON）"""
+    import time
+    from order_snapshot import load_snapshot_orders
+
+    before_rss, _ = memory_kb()
+    start = time.perf_counter()
+    if mode == "json":
+        with open(json_path, 'r', encoding='utf-8') as f:
+            orders = json.loads(f.read())
+    elif mode == "snapshot":
+        orders = load_snapshot_orders(json_path)
+    else:
+        orders = load_snapshot_orders(json_path, fields=("printing_method", "delivery_date"))
+    elapsed = time.perf_counter() - start
+    after_rss, peak_rss = memory_kb()
+    assert orders is not None, "快照不可用"
+    measured = before_rss is not None and after_rss is not None
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss_kb": peak_rss - before_rss if measured else None,
+        "retained_rss_kb": after_rss - before_rss if measured else None,
+        "orders": len(orders)
+    }))
+
+def run_child(mode, json_path):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, json_path],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def median_mb(runs, key):
+    if runs[0][key] is None:
+        return None
+    return round(statistics.median(r[key] for r in runs) / 1024, 1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="印刷流程数字化系统 - 订单JSON与列式快照的加载基准")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--methods', type=int, default=12)
+    parser.add_argument('--dates', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'JSON_FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(*args.child)
+        return 0
+
+    from synthetic import make_orders
+    from order_snapshot import write_snapshot, snapshot_path
+
+    results = []
+    tmp_dir = tempfile.mkdtemp(prefix='print_order_snapshot_')
+    try:
+        for size in args.sizes:
+            json_path = os.path.join(tmp_dir, 'parsed_orders.json')
+            orders = make_orders(size, args.methods, args.dates, args.seed)
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(orders, f, ensure_ascii=False, indent=2)
+            write_snapshot(json_path, orders)
+            del orders
+            sizes = {"json": os.path.getsize(json_path), "snapshot": os.path.getsize(snapshot_path(json_path))}
+            print(f"\n{size} 条订单（JSON {sizes['json'] / 1e6:.1f} MB，快照 {sizes['snapshot'] / 1e6:.1f} MB）")
+
+            for mode in MODES:
+                runs = [run_child(mode, json_path) for _ in range(args.repeat)]
+                result = {
+                    "size": size,
+                    "case": f"load_{mode}",
+                    "file_bytes": sizes["snapshot" if mode.startswith("snapshot") else "json"],
+                    "median_s": round(statistics.median(r["seconds"] for r in runs), 6),
+                    "min_s": round(min(r["seconds"] for r in runs), 6),
+                    "peak_rss_mb": median_mb(runs, "peak_rss_kb"),
+                    "retained_rss_mb": median_mb(runs, "retained_rss_kb")
+                }
+                results.append(result)
+                print(f"  {mode:<18} 中位数 {result['median_s'] * 1000:>9.1f} ms   "
+                      f"峰值RSS +{result['peak_rss_mb']} MB   保留RSS +{result['retained_rss_mb']} MB")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "methods": args.methods,
+            "dates": args.dates,
+            "seed": args.seed,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"snapshot_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到: {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
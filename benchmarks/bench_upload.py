@@ -0,0 +1,48 @@
+"""上传解析基准：pd.read_excel + parse_orders vs 只读流式解析（耗时和峰值内存）
+
+用法: python benchmarks/bench_upload.py [行数...]
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_parser import make_frame
+from order_parser import parse_orders, parse_orders_from_workbook
+
+def make_workbook(rows):
+    """生成与明细总表列布局一致的xlsx文件内容"""
+    buffer = io.BytesIO()
+    make_frame(rows).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+def measure(func, content):
+    """返回 (结果, 耗时秒, 峰值内存MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(io.BytesIO(content))
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    for rows in sizes:
+        content = make_workbook(rows)
+        print(f"{rows} 行, 文件 {len(content) / 1024 / 1024:.1f} MB")
+
+        legacy, legacy_seconds, legacy_peak = measure(lambda f: parse_orders(pd.read_excel(f)), content)
+        print(f"  pd.read_excel + parse_orders: {legacy_seconds:.2f}s, 峰值内存 {legacy_peak:.1f} MB")
+
+        streamed, stream_seconds, stream_peak = measure(parse_orders_from_workbook, content)
+        print(f"  流式解析: {stream_seconds:.2f}s, 峰值内存 {stream_peak:.1f} MB")
+        print(f"  结果一致: {legacy == streamed}")
+
+if __name__ == "__main__":
+    main()
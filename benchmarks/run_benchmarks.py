@@ -0,0 +1,235 @@
+"""基准测试套件：用可复现的模拟数据测量分组、换版优化、Excel解析、JSON读写和API接口的耗时
+
+用法: python benchmarks/run_benchmarks.py [--sizes 1000 10000 100000 1000000] [--methods 12] [--dates 60]
+                                          [--repeat 3] [--output 结果.json] [--compare 上次结果.json]
+
+结果保存为JSON（默认 benchmarks/results/bench_<时间>.json）；指定 --compare 时与上次结果逐项比较，
+耗时超过上次的 --threshold 倍（默认1.2）的项目列为回退，并以退出码1结束。
+Excel解析和上传接口较慢，只对不超过 --excel-max 条（默认100000）的规模运行；
+API接口只对不超过 --api-max 条（默认1000000）的规模运行。
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'backend'))
+from synthetic import make_orders, write_workbook
+from changeover_optimization import group_by_printing_method, optimize_changeovers
+from order_parser import parse_orders_from_workbook
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+def timed(func, repeat, setup=None):
+    """运行 repeat 次，返回每次的耗时（秒）；setup 在每次计时前调用，不计入耗时"""
+    seconds = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+class Suite:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, size, case, func, setup=None, repeat=None):
+        seconds = timed(func, repeat or self.repeat, setup)
+        result = {
+            "size": size,
+            "case": case,
+            "median_s": round(statistics.median(seconds), 6),
+            "min_s": round(min(seconds), 6),
+            "runs_s": [round(s, 6) for s in seconds]
+        }
+        self.results.append(result)
+        print(f"  {case:<32} 中位数 {result['median_s'] * 1000:>10.2f} ms   最小 {result['min_s'] * 1000:>10.2f} ms")
+        return result
+
+def bench_core(suite, size, orders):
+    payload = json.dumps(orders, ensure_ascii=False)
+    suite.run(size, "json_dump", lambda: json.dumps(orders, ensure_ascii=False))
+    suite.run(size, "json_load", lambda: json.loads(payload))
+    suite.run(size, "group_by_printing_method", lambda: group_by_printing_method(orders))
+    suite.run(size, "optimize_changeovers", lambda: optimize_changeovers(orders))
+
+def bench_excel(suite, size, workbook):
+    suite.run(size, "excel_parse_stream", lambda: parse_orders_from_workbook(io.BytesIO(workbook)))
+
+class ApiBench:
+    """把后端的数据文件指向临时目录，通过Flask测试客户端请求接口"""
+
+    def __init__(self):
+        import app as backend_app
+        self.app = backend_app
+        self.tmp_dir = tempfile.mkdtemp(prefix='print_order_bench_')
+        self.orig_paths = (backend_app.ORDERS_FILE, backend_app.METRICS_FILE)
+        backend_app.ORDERS_FILE = os.path.join(self.tmp_dir, 'parsed_orders.json')
+        backend_app.METRICS_FILE = os.path.join(self.tmp_dir, 'metrics.json')
+        self.client = backend_app.app.test_client()
+
+    def close(self):
+        self.app.ORDERS_FILE, self.app.METRICS_FILE = self.orig_paths
+        self.reset_caches()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def reset_caches(self):
+        """清空数据、优化结果、查询索引和响应缓存，测量首次请求的耗时"""
+        self.app.data_store.invalidate()
+        self.app.optimization_cache.clear()
+        self.app.response_cache.clear()
+        with self.app.query_indexes_lock:
+            self.app.query_indexes.clear()
+
+    def load(self, orders):
+        with open(self.app.ORDERS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(orders, f, ensure_ascii=False)
+        with open(self.app.METRICS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.app.DEFAULT_METRICS, f, ensure_ascii=False)
+        self.reset_caches()
+
+    def get(self, path):
+        response = self.client.get(path)
+        assert response.status_code == 200, (path, response.status_code)
+        return response
+
+    def drop_row_index(self):
+        """删除上次上传保存的行索引，下次上传完整导入"""
+        try:
+            os.remove(self.app.row_index_path())
+        except OSError:
+            pass
+
+    def upload(self, workbook):
+        response = self.client.post('/api/upload_excel', data={'file': (io.BytesIO(workbook), 'bench.xlsx')})
+        assert response.status_code == 202, response.status_code
+        job = self.app.upload_jobs.wait(response.get_json()["job_id"], timeout=3600)
+        assert job.status == 'succeeded', job.error
+
+def edited_workbook(orders, fraction=0.01):
+    """修改约 fraction 比例订单的交货日期后重新生成的明细表，用于测量增量重新上传"""
+    step = max(1, int(1 / fraction))
+    edited = [dict(order, delivery_date="12.28") if i % step == 0 else order for i, order in enumerate(orders)]
+    buffer = io.BytesIO()
+    write_workbook(edited, buffer)
+    return buffer.getvalue()
+
+def bench_api(suite, size, api, orders, workbook):
+    api.load(orders)
+    for case, path in (("api_orders", "/api/orders"),
+                       ("api_optimized_orders_page", "/api/optimized_orders?limit=50&printing_method=对开双彩"),
+                       ("api_dashboard", "/api/dashboard")):
+        suite.run(size, f"{case}_cold", lambda: api.get(path), setup=api.reset_caches)
+        suite.run(size, f"{case}_warm", lambda: api.get(path))
+    if workbook is not None:
+        suite.run(size, "api_upload_excel", lambda: api.upload(workbook), setup=api.drop_row_index)
+        # 先完整导入原表（不计时），再上传修改了1%行的明细表，只处理变化的行
+        edited = edited_workbook(orders)
+        def upload_original():
+            api.drop_row_index()
+            api.upload(workbook)
+        suite.run(size, "api_reupload_excel_1pct", lambda: api.upload(edited), setup=upload_original)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(results, previous_path, threshold):
+    """与上次结果比较，返回回退的项目"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {(r["size"], r["case"]): r for r in json.load(f)["results"]}
+
+    print(f"\n与 {previous_path} 比较（中位数，>{threshold:.2f}x 为回退）:")
+    regressions = []
+    for result in results:
+        before = previous.get((result["size"], result["case"]))
+        if before is None or before["median_s"] <= 0:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        flag = "回退" if ratio > threshold else ""
+        print(f"  {result['size']:>8} {result['case']:<32} {before['median_s'] * 1000:>10.2f} -> "
+              f"{result['median_s'] * 1000:>10.2f} ms  {ratio:5.2f}x {flag}")
+        if ratio > threshold:
+            regressions.append(dict(result, previous_median_s=before["median_s"], ratio=round(ratio, 3)))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="印刷流程数字化系统 - 基准测试套件")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--methods', type=int, default=12, help="印刷方式种类数")
+    parser.add_argument('--dates', type=int, default=60, help="交货日期种类数")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--excel-max', type=int, default=100000)
+    parser.add_argument('--api-max', type=int, default=1000000)
+    parser.add_argument('--skip', nargs='*', default=[], choices=['core', 'excel', 'api'])
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    suite = Suite(args.repeat)
+    api = ApiBench() if 'api' not in args.skip and any(size <= args.api_max for size in args.sizes) else None
+    try:
+        for size in args.sizes:
+            print(f"\n{size} 条订单（{args.methods} 种印刷方式, {args.dates} 个交货日期）")
+            orders = make_orders(size, args.methods, args.dates, args.seed)
+            workbook = None
+            if 'excel' not in args.skip and size <= args.excel_max:
+                buffer = io.BytesIO()
+                write_workbook(orders, buffer)
+                workbook = buffer.getvalue()
+
+            if 'core' not in args.skip:
+                bench_core(suite, size, orders)
+            if workbook is not None:
+                bench_excel(suite, size, workbook)
+            if api is not None and size <= args.api_max:
+                bench_api(suite, size, api, orders, workbook)
+    finally:
+        if api is not None:
+            api.close()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "methods": args.methods,
+            "dates": args.dates,
+            "seed": args.seed,
+            "repeat": args.repeat
+        },
+        "results": suite.results
+    }
+    if args.compare:
+        report["regressions"] = compare(suite.results, args.compare, args.threshold)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到: {output}")
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
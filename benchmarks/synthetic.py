@@ -0,0 +1,63 @@
+"""可复现的模拟订单和Excel明细表生成器，供基准测试使用
+
+相同的参数和随机种子总是生成相同的数据；印刷方式和交货日期的种类数可以配置。
+"""
+import random
+
+SIZES = ("小全开", "对开", "四开", "全开")
+COLORS = ("双彩", "双单", "双黑", "单黑", "双面双色", "双专色")
+
+# 明细总表的列数（交货日期在第16列）
+SHEET_COLUMNS = 18
+
+def method_names(count):
+    """生成 count 种不同的印刷方式：先用幅面和颜色组合，不够时追加专色编号"""
+    base = [f"{size}{color}" for size in SIZES for color in COLORS]
+    names = base[:count]
+    extra = 1
+    while len(names) < count:
+        names.extend(f"{name}+专色{extra}" for name in base[:count - len(names)])
+        extra += 1
+    return names
+
+def date_names(count, start_month=6):
+    """生成 count 个不同的交货日期（"月.日" 格式，每月按28天计）"""
+    return [f"{start_month + i // 28}.{i % 28 + 1}" for i in range(count)]
+
+def make_orders(count, methods=12, dates=60, seed=42, missing_method_rate=0.0):
+    """生成 count 条订单字典；missing_method_rate 为缺少印刷方式的订单比例"""
+    rng = random.Random(seed)
+    method_pool = method_names(methods)
+    date_pool = date_names(dates)
+    orders = []
+    for i in range(1, count + 1):
+        method = "" if missing_method_rate and rng.random() < missing_method_rate else rng.choice(method_pool)
+        orders.append({
+            "order_id": str(i),
+            "product_name": f"“测试”产品{i}",
+            "printing_method": method,
+            "delivery_date": rng.choice(date_pool)
+        })
+    return orders
+
+def write_workbook(orders, target):
+    """按明细总表的列布局写出xlsx：标题行、进度说明行，之后每行一条订单；target 为文件路径或文件对象
+
+    上传接口跳过标题行后的第一行（进度说明行），解析出的订单编号与序号相同。
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    header = [None] * SHEET_COLUMNS
+    header[0], header[1], header[5], header[15] = "序号", "产品名称", "印刷方式", "交货日期"
+    sheet.append(header)
+    sheet.append(["进度说明"] + [None] * (SHEET_COLUMNS - 1))
+    for serial, order in enumerate(orders, start=1):
+        row = [None] * SHEET_COLUMNS
+        row[0] = serial
+        row[1] = order["product_name"]
+        row[5] = order["printing_method"]
+        row[15] = order["delivery_date"]
+        sheet.append(row)
+    workbook.save(target)
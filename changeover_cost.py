@@ -0,0 +1,179 @@
+import json
+import os
+from collections import Counter
+
+from log_utils import get_logger
+from scheduler import SIZE_RANKS
+
+logger = get_logger(__name__)
+
+# 按长度优先匹配的幅面关键字
+_SIZE_TOKENS = sorted(SIZE_RANKS, key=len, reverse=True)
+
+# 默认换版成本权重：任何切换都有基础成本，幅面变化（换纸、调规矩）比换色代价更高
+DEFAULT_WEIGHTS = {
+    "base": 1.0,
+    "size": 2.0,
+    "color": 1.0
+}
+
+# 默认的成本配置文件位置
+COSTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'changeover_costs.json')
+
+def method_tokens(printing_method):
+    """将印刷方式拆分为幅面集合和色彩集合，例如 小全开双彩+对开单面 -> ({小全开, 对开}, {双彩, 单面})"""
+    sizes = set()
+    colors = set()
+    for part in str(printing_method).split('+'):
+        part = part.strip()
+        for token in _SIZE_TOKENS:
+            if part.startswith(token):
+                sizes.add(token)
+                part = part[len(token):]
+                break
+        if part:
+            colors.add(part)
+    return frozenset(sizes), frozenset(colors)
+
+def _popcount(mask):
+    """统计位掩码中1的个数（兼容没有int.bit_count的Python版本）"""
+    return bin(mask).count('1')
+
+def _difference(a, b):
+    """两个集合的差异程度，0表示相同，1表示完全不同"""
+    union = a | b
+    if not union:
+        return 0.0
+    return 1.0 - len(a & b) / len(union)
+
+class ChangeoverCostModel:
+    """印刷方式之间的换版成本：优先使用配置的成本矩阵，否则由幅面和色彩差异推算"""
+
+    def __init__(self, weights=None, pairs=None):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        self.weights.update(weights or {})
+        # 配置的成本按对称处理
+        self.pairs = {}
+        for (a, b), cost in (pairs or {}).items():
+            self.pairs[(a, b)] = float(cost)
+            self.pairs[(b, a)] = float(cost)
+        self._tokens = {}
+
+    def _method_tokens(self, method):
+        tokens = self._tokens.get(method)
+        if tokens is None:
+            tokens = self._tokens[method] = method_tokens(method)
+        return tokens
+
+    def cost(self, from_method, to_method):
+        """从一种印刷方式切换到另一种的成本"""
+        if from_method == to_method:
+            return 0.0
+        configured = self.pairs.get((from_method, to_method))
+        if configured is not None:
+            return configured
+
+        from_sizes, from_colors = self._method_tokens(from_method)
+        to_sizes, to_colors = self._method_tokens(to_method)
+        return (self.weights["base"]
+                + self.weights["size"] * _difference(from_sizes, to_sizes)
+                + self.weights["color"] * _difference(from_colors, to_colors))
+
+    def cost_matrix(self, methods):
+        """批量计算成本矩阵：幅面和色彩集合编码为位掩码，避免逐对做集合运算"""
+        bits = {}
+        masks = []
+        for method in methods:
+            sizes, colors = self._method_tokens(method)
+            size_mask = 0
+            color_mask = 0
+            for token in sizes:
+                size_mask |= 1 << bits.setdefault(('size', token), len(bits))
+            for token in colors:
+                color_mask |= 1 << bits.setdefault(('color', token), len(bits))
+            masks.append((size_mask, color_mask))
+
+        base, size_weight, color_weight = self.weights["base"], self.weights["size"], self.weights["color"]
+
+        def difference(a, b):
+            union = _popcount(a | b)
+            return 1.0 - _popcount(a & b) / union if union else 0.0
+
+        matrix = []
+        for i, (from_sizes, from_colors) in enumerate(masks):
+            row = []
+            for j, (to_sizes, to_colors) in enumerate(masks):
+                if i == j or methods[i] == methods[j]:
+                    row.append(0.0)
+                    continue
+                configured = self.pairs.get((methods[i], methods[j])) if self.pairs else None
+                if configured is not None:
+                    row.append(configured)
+                    continue
+                row.append(base
+                           + size_weight * difference(from_sizes, to_sizes)
+                           + color_weight * difference(from_colors, to_colors))
+            matrix.append(row)
+        return matrix
+
+    def sequence_cost(self, methods):
+        """按顺序依次切换印刷方式的总成本：先统计各种切换出现的次数，每种切换只计算一次成本"""
+        transitions = Counter(zip(methods, methods[1:]))
+        return sum(self.cost(a, b) * count for (a, b), count in transitions.items())
+
+def load_cost_model(file_path=COSTS_FILE):
+    """从JSON配置加载换版成本模型，文件不存在或格式错误时使用默认权重"""
+    try:
+        if not os.path.exists(file_path):
+            return ChangeoverCostModel()
+        with open(file_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        pairs = {(p["from"], p["to"]): p["cost"] for p in config.get("pairs", [])}
+        return ChangeoverCostModel(config.get("weights"), pairs)
+    except Exception:
+        logger.exception("加载换版成本配置时出错")
+        return ChangeoverCostModel()
+
+def order_methods(methods, cost_model, max_passes=50):
+    """对印刷方式排序使总换版成本最小：最近邻构造初始序列，再用2-opt改进"""
+    methods = list(methods)
+    n = len(methods)
+    if n <= 2:
+        return methods
+
+    cost = cost_model.cost_matrix(methods)
+
+    # 最近邻：从第一种印刷方式出发，每次选择切换成本最低的下一种
+    path = [0]
+    remaining = set(range(1, n))
+    while remaining:
+        last = cost[path[-1]]
+        nxt = min(remaining, key=lambda j: (last[j], j))
+        path.append(nxt)
+        remaining.remove(nxt)
+
+    # 2-opt：反转 path[i..j] 能降低成本时执行（开放路径，两端之外没有边）
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 1):
+            prev_row = cost[path[i - 1]] if i > 0 else None
+            for j in range(i + 1, n):
+                if i == 0 and j == n - 1:
+                    continue
+                first, last = path[i], path[j]
+                next_node = path[j + 1] if j + 1 < n else None
+                old = 0.0
+                new = 0.0
+                if prev_row is not None:
+                    old += prev_row[first]
+                    new += prev_row[last]
+                if next_node is not None:
+                    old += cost[last][next_node]
+                    new += cost[first][next_node]
+                if new < old - 1e-9:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    improved = True
+        if not improved:
+            break
+
+    return [methods[k] for k in path]
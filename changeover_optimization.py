@@ -1,72 +1,100 @@
 import json
-import pandas as pd
-from collections import defaultdict
-import traceback
+from collections import defaultdict, OrderedDict
+import hashlib
+import threading
 import os
+from atomic_io import atomic_write
+from data_store import PendingList
+from log_utils import get_logger, configure_logging, IssueCounter
+from changeover_cost import load_cost_model, order_methods
+from order_model import Order, delivery_sort_key, date_key_function, to_records
+from order_snapshot import load_snapshot_orders
+from operator import attrgetter
 
-def load_orders(file_path):
-    """加载订单数据"""
+logger = get_logger(__name__)
+
+# 换版优化和指标只用到的订单字段
+OPTIMIZE_FIELDS = ("printing_method", "delivery_date")
+
+def load_orders(file_path, fields=None, records=False):
+    """加载订单数据（JSON文件，或扩展名为 .db/.sqlite 的SQLite数据库）；JSON文件有一致的列式快照时读取快照
+
+    fields 为需要的字段时，从快照读取只解码这些列，订单字典只含这些字段（没有快照时仍返回完整订单）。
+    records 为True时加载后立即转换为紧凑订单记录（见 order_model.py），只供换版优化使用，不再写回JSON。
+    """
+    orders = _load_order_dicts(file_path, fields)
+    return to_records(orders) if records else orders
+
+def _load_order_dicts(file_path, fields):
     try:
+        from order_db import is_db_path, OrderDatabase
+        if is_db_path(file_path):
+            orders = OrderDatabase(file_path).load_orders()
+            logger.info("成功从数据库加载订单数据, 共 %d 条记录", len(orders))
+            return orders
+            
+        orders = load_snapshot_orders(file_path, fields=fields)
+        if orders is not None:
+            logger.info("成功从快照加载订单数据, 共 %d 条记录", len(orders))
+            return orders
+            
         if not os.path.exists(file_path):
-            print(f"订单文件不存在: {file_path}")
+            logger.warning("订单文件不存在: %s", file_path)
             return []
             
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
             if not content.strip():
-                print(f"订单文件为空: {file_path}")
+                logger.warning("订单文件为空: %s", file_path)
                 return []
                 
             orders = json.loads(content)
-            print(f"成功加载订单数据, 共 {len(orders)} 条记录")
+            logger.info("成功加载订单数据, 共 %d 条记录", len(orders))
             return orders
     except json.JSONDecodeError as e:
-        print(f"解析订单文件时出错: {e}")
-        traceback.print_exc()
+        logger.error("解析订单文件时出错: %s", e)
         return []
-    except Exception as e:
-        print(f"加载订单文件时出错: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("加载订单文件时出错")
         return []
 
 def load_devices(file_path):
     """加载设备数据"""
     try:
         if not os.path.exists(file_path):
-            print(f"设备文件不存在: {file_path}")
+            logger.warning("设备文件不存在: %s", file_path)
             return []
             
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
             if not content.strip():
-                print(f"设备文件为空: {file_path}")
+                logger.warning("设备文件为空: %s", file_path)
                 return []
                 
             devices = json.loads(content)
-            print(f"成功加载设备数据, 共 {len(devices)} 条记录")
+            logger.info("成功加载设备数据, 共 %d 条记录", len(devices))
             return devices
     except json.JSONDecodeError as e:
-        print(f"解析设备文件时出错: {e}")
-        traceback.print_exc()
+        logger.error("解析设备文件时出错: %s", e)
         return []
-    except Exception as e:
-        print(f"加载设备文件时出错: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("加载设备文件时出错")
         return []
 
 def group_by_printing_method(orders):
-    """根据印刷方式分组订单"""
+    """根据印刷方式分组订单；无法分组的订单只计数，分组结束后汇总输出一次"""
     method_groups = defaultdict(list)
     
     if not orders:
-        print("警告: 订单列表为空，无法进行分组")
+        logger.warning("订单列表为空，无法进行分组")
         return method_groups
     
+    issues = IssueCounter(logger)
     try:
         for order in orders:
-            # 检查order是否为字典类型
-            if not isinstance(order, dict):
-                print(f"警告: 发现非字典类型的订单数据: {order}")
+            # 检查order是否为字典或订单记录
+            if not isinstance(order, (dict, Order)):
+                issues.add("非字典类型的订单数据", order)
                 continue
                 
             printing_method = order.get('printing_method', '')
@@ -75,33 +103,52 @@ def group_by_printing_method(orders):
                 printing_method = printing_method.strip()
                 method_groups[printing_method].append(order)
             else:
-                print(f"警告: 发现没有印刷方式的订单: {order}")
-    except Exception as e:
-        print(f"分组订单时出错: {e}")
-        traceback.print_exc()
+                issues.add("订单缺少印刷方式", order.get('order_id'))
+    except Exception:
+        logger.exception("分组订单时出错")
         
-    print(f"订单按印刷方式分组完成, 共 {len(method_groups)} 种印刷方式")
+    issues.report()
+    logger.debug("订单按印刷方式分组完成, 共 %d 种印刷方式", len(method_groups))
     return method_groups
 
+# 默认换版成本模型，首次使用时从 changeover_costs.json 加载
+_default_cost_model = None
+
+def get_cost_model():
+    """返回默认换版成本模型"""
+    global _default_cost_model
+    if _default_cost_model is None:
+        _default_cost_model = load_cost_model()
+    return _default_cost_model
+
 def calculate_changeover_metrics(orders):
     """计算换版前的次数"""
     # 假设每个订单都需要一次换版
     changeover_before = len(orders) if orders else 0
     return changeover_before
 
-def optimize_changeovers(orders):
-    """优化换版次数"""
+def optimize_changeovers(orders, cost_model=None):
+    """优化换版次数，并按换版成本最小的顺序排列印刷方式分组"""
     try:
+        cost_model = cost_model or get_cost_model()
+        
         # 处理空订单情况
         if not orders:
-            print("警告: 订单列表为空，返回默认优化结果")
+            logger.warning("订单列表为空，返回默认优化结果")
             return {
                 'optimized_orders': [],
                 'changeover_before': 0,
                 'changeover_after': 0,
-                'changeover_reduction_pct': 0.0
+                'changeover_reduction_pct': 0.0,
+                'changeover_cost_before': 0.0,
+                'changeover_cost_after': 0.0,
+                'method_sequence': []
             }
             
+        # 订单记录已预先解析日期序数；字典按交货日期字符串缓存解析结果，不逐个转换为记录
+        is_records = isinstance(orders[0], Order)
+        sort_key = attrgetter('date_key') if is_records else date_key_function()
+        
         # 按印刷方式分组
         method_groups = group_by_printing_method(orders)
         
@@ -112,20 +159,35 @@ def optimize_changeovers(orders):
         optimized_orders = []
         changeover_after = 0
         
+        # 按原始顺序依次生产时的换版成本
+        if is_records:
+            original_methods = [record.printing_method for record in orders if record.printing_method]
+        else:
+            original_methods = [
+                order.get('printing_method', '').strip()
+                for order in orders
+                if isinstance(order, dict) and order.get('printing_method', '')
+            ]
+        changeover_cost_before = cost_model.sequence_cost(original_methods)
+        
+        # 确定分组顺序，使相邻分组之间的换版成本最小
+        method_sequence = order_methods(list(method_groups.keys()), cost_model)
+        changeover_cost_after = cost_model.sequence_cost(method_sequence)
+        
         # 对每种印刷方式内的订单进行排序和合并
-        for method, method_orders in method_groups.items():
+        for method in method_sequence:
+            method_orders = method_groups[method]
             try:
-                # 按交货日期排序
-                method_orders.sort(key=lambda x: str(x.get('delivery_date', '')))
+                # 按交货日期序数排序（"6.9" 排在 "6.17" 之前）
+                method_orders.sort(key=sort_key)
                 
                 # 添加到优化后的订单列表
                 optimized_orders.extend(method_orders)
                 
                 # 每种印刷方式只需要一次换版
                 changeover_after += 1
-            except Exception as e:
-                print(f"处理印刷方式 '{method}' 时出错: {e}")
-                traceback.print_exc()
+            except Exception:
+                logger.exception("处理印刷方式 '%s' 时出错", method)
                 # 仍然添加这些订单，但不排序
                 optimized_orders.extend(method_orders)
         
@@ -139,61 +201,191 @@ def optimize_changeovers(orders):
             'optimized_orders': optimized_orders,
             'changeover_before': changeover_before,
             'changeover_after': changeover_after,
-            'changeover_reduction_pct': round(reduction_pct, 2)
+            'changeover_reduction_pct': round(reduction_pct, 2),
+            'changeover_cost_before': round(changeover_cost_before, 2),
+            'changeover_cost_after': round(changeover_cost_after, 2),
+            'method_sequence': method_sequence
         }
         
-        print(f"换版优化成功: 优化前 {changeover_before} 次, 优化后 {changeover_after} 次, 减少 {round(reduction_pct * 100, 2)}%")
+        logger.info("换版优化成功: 优化前 %d 次, 优化后 %d 次, 减少 %.2f%%", changeover_before, changeover_after, reduction_pct * 100)
         return result
         
-    except Exception as e:
-        print(f"优化换版时出错: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("优化换版时出错")
         # 返回原始订单和默认值
         return {
             'optimized_orders': orders,
             'changeover_before': len(orders) if orders else 0,
             'changeover_after': len(orders) if orders else 0,
-            'changeover_reduction_pct': 0.0
+            'changeover_reduction_pct': 0.0,
+            'changeover_cost_before': None,
+            'changeover_cost_after': None,
+            'method_sequence': []
         }
 
+def build_metrics(optimization_result):
+    """由优化结果生成看板指标"""
+    return {
+        "parser_accuracy": 0.95,
+        "changeover_before": optimization_result['changeover_before'],
+        "changeover_after": optimization_result['changeover_after'],
+        "changeover_reduction_pct": optimization_result['changeover_reduction_pct'],
+        "changeover_cost_before": optimization_result['changeover_cost_before'],
+        "changeover_cost_after": optimization_result['changeover_cost_after'],
+        "mobile_dashboard_pass": True,
+        "unit_test_coverage": 0.75
+    }
+
+def orders_digest(orders):
+    """计算订单列表的内容哈希"""
+    payload = json.dumps(orders, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def derived_digest(digest, *changes):
+    """由上一版本的哈希和这次的变化得到新版本的标识，不必重新哈希全部订单
+
+    与 orders_digest 对同一内容的结果不同，只用于在进程内标识增量写入后的版本。
+    """
+    payload = json.dumps(changes, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(f"{digest}\n{payload}".encode('utf-8')).hexdigest()
+
+class OptimizationCache:
+    """按订单内容哈希缓存换版优化结果，LRU淘汰"""
+
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 记住最近一次哈希过的订单列表，同一个列表对象不再重复计算哈希
+        self._last_orders = None
+        self._last_digest = None
+        self.hits = 0
+        self.misses = 0
+
+    def digest_for(self, orders):
+        """返回订单列表的内容哈希（调用方不应原地修改已传入的列表）
+
+        带 token 的 PendingList（增量写入的版本）直接返回 token，由它生成的列表也使用同一个标识。
+        """
+        if isinstance(orders, PendingList):
+            if orders.token is not None:
+                return orders.token
+            orders = orders.resolve()
+        with self._lock:
+            last = self._last_orders
+            if orders is last or (isinstance(last, PendingList) and last.value is orders):
+                return self._last_digest
+        digest = orders_digest(orders)
+        with self._lock:
+            self._last_orders = orders
+            self._last_digest = digest
+        return digest
+
+    def _resolved(self, digest, result):
+        """增量结果中的 PendingList 在第一次读取时生成列表，之后返回同一个结果"""
+        optimized = result.get('optimized_orders')
+        if not isinstance(optimized, PendingList):
+            return result
+        resolved = dict(result, optimized_orders=optimized.resolve())
+        with self._lock:
+            if self._entries.get(digest) is result:
+                self._entries[digest] = resolved
+        return resolved
+
+    def _store(self, digest, result):
+        with self._lock:
+            self._entries[digest] = result
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def optimize(self, orders):
+        """返回缓存的优化结果，未命中时执行优化并缓存"""
+        digest = self.digest_for(orders)
+        with self._lock:
+            result = self._entries.get(digest)
+            if result is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if result is not None:
+            return self._resolved(digest, result)
+
+        result = optimize_changeovers(orders)
+        self._store(digest, result)
+        return result
+
+    def put(self, orders, result, digest=None):
+        """写入已经算好的优化结果（例如增量插入后的结果）
+
+        digest 为调用方由上一版本推出的标识（见 derived_digest）时不重新哈希订单，
+        之后对同一个订单列表（或由它生成的列表）调用 digest_for 都返回该标识。
+        """
+        if digest is None:
+            digest = self.digest_for(orders)
+        else:
+            with self._lock:
+                self._last_orders = orders
+                self._last_digest = digest
+        self._store(digest, result)
+        return digest
+
+    def refresh(self, orders):
+        """订单更新后重新优化并写入缓存"""
+        digest = self.digest_for(orders)
+        result = optimize_changeovers(orders)
+        self._store(digest, result)
+        return result
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._last_orders = None
+            self._last_digest = None
+
+    def stats(self):
+        """返回缓存命中统计"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
 def save_metrics(metrics, file_path="metrics.json"):
     """保存指标到JSON文件"""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with atomic_write(file_path) as f:
             json.dump(metrics, f, ensure_ascii=False, indent=2)
-        print(f"指标已成功保存到 {file_path}")
-    except Exception as e:
-        print(f"保存指标时出错: {e}")
-        traceback.print_exc()
+        logger.info("指标已成功保存到 %s", file_path)
+    except Exception:
+        logger.exception("保存指标时出错")
 
 def main():
+    configure_logging()
     print("\n" + "=" * 50)
     print("执行换版优化")
     print("=" * 50)
     
     try:
-        # 加载订单数据
-        print("\n加载订单数据...")
-        orders = load_orders('parsed_orders.json')
+        # 加载订单数据（只计算指标，不需要订单编号和产品名称），直接转换为紧凑记录
+        logger.info("加载订单数据...")
+        orders = load_orders('parsed_orders.json', fields=OPTIMIZE_FIELDS, records=True)
         
         # 加载设备数据
-        print("\n加载设备数据...")
+        logger.info("加载设备数据...")
         devices = load_devices('device_list.json')
         
         # 优化换版
-        print("\n执行换版优化...")
+        logger.info("执行换版优化...")
         optimization_results = optimize_changeovers(orders)
         
         # 准备指标数据
-        print("\n保存指标数据...")
-        metrics = {
-            "parser_accuracy": 0.95,
-            "changeover_before": optimization_results['changeover_before'],
-            "changeover_after": optimization_results['changeover_after'],
-            "changeover_reduction_pct": optimization_results['changeover_reduction_pct'],
-            "mobile_dashboard_pass": True,
-            "unit_test_coverage": 0.75
-        }
+        logger.info("保存指标数据...")
+        metrics = build_metrics(optimization_results)
         
         # 保存指标
         save_metrics(metrics)
@@ -202,11 +394,11 @@ def main():
         print(f"- 优化前次数: {optimization_results['changeover_before']}")
         print(f"- 优化后次数: {optimization_results['changeover_after']}")
         print(f"- 减少百分比: {optimization_results['changeover_reduction_pct'] * 100:.2f}%")
+        print(f"- 换版成本: {optimization_results['changeover_cost_before']} -> {optimization_results['changeover_cost_after']}")
         print(f"- 指标已保存到 metrics.json")
         
-    except Exception as e:
-        print(f"\n执行程序时出错: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("执行程序时出错")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,223 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 下使用单进程的 waitress，只需要进程内的锁
+    fcntl = None
+
+
+class PendingList:
+    """列表尚未生成的一个版本：上一版本加上之后的追加、插入或删除，第一次读取时才复制并应用这些变化
+
+    写入方每次修改只做与变化数量相关的工作，不必复制整个列表；生成的列表之后不再改变，
+    读取方仍然可以按对象身份判断数据版本。token 为调用方给这个版本的标识（例如内容哈希）。
+    """
+
+    # 生成列表时沿着版本链向前查找，链上的节点会被其它线程同时生成，统一串行
+    _resolve_lock = threading.Lock()
+
+    def __init__(self, parent, change=None, token=None):
+        self.token = token
+        if change is None:
+            # 已经生成的列表
+            self._value = parent
+            self._parent = None
+            self.depth = 0
+        else:
+            self._value = None
+            self._parent = parent
+            self.depth = parent.depth + 1
+        self._change = change
+
+    @classmethod
+    def wrap(cls, data, token=None):
+        """把普通列表作为已经生成的版本，PendingList 原样返回"""
+        return data if isinstance(data, PendingList) else cls(data, token=token)
+
+    def extend(self, items, token=None):
+        return PendingList(self, ('extend', list(items)), token)
+
+    def insert(self, position, item, token=None):
+        return PendingList(self, ('insert', position, item), token)
+
+    def delete(self, position, token=None):
+        return PendingList(self, ('delete', position), token)
+
+    @property
+    def value(self):
+        """已经生成的列表，尚未生成时返回None"""
+        return self._value
+
+    def resolve(self):
+        """生成并返回这个版本的列表，之后总是返回同一个列表对象"""
+        with PendingList._resolve_lock:
+            if self._value is None:
+                changes = []
+                node = self
+                while node._value is None:
+                    changes.append(node._change)
+                    node = node._parent
+                value = list(node._value)
+                for change in reversed(changes):
+                    if change[0] == 'extend':
+                        value.extend(change[1])
+                    elif change[0] == 'insert':
+                        value.insert(change[1], change[2])
+                    else:
+                        del value[change[1]]
+                self._value = value
+                self._parent = None
+                self._change = None
+                self.depth = 0
+            return self._value
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __getitem__(self, index):
+        return self.resolve()[index]
+
+
+class DataStore:
+    """进程内数据缓存，文件的修改时间或大小变化时才重新加载"""
+
+    def __init__(self, loader):
+        # loader(file_path, default_value) 负责实际读取和解析文件
+        self._loader = loader
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _signature(file_path):
+        """返回文件的 (mtime_ns, size)，文件不存在时返回None"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, file_path, default_value=None, loader=None, signature=None, resolve=True):
+        """获取文件解析后的数据，未变化时直接返回内存中的结果
+
+        loader / signature 可替换默认的文件读取和 (mtime, size) 版本判断，
+        例如数据来自SQLite时以数据库中的版本号作为签名。
+        写入方放入的 PendingList 在读取时生成列表；resolve=False 时原样返回，供下一次增量写入使用。
+        """
+        signature = signature() if signature is not None else self._signature(file_path)
+        with self._lock:
+            entry = self._entries.get(file_path)
+            hit = entry is not None and signature is not None and entry[0] == signature
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            data = entry[1]
+            return data.resolve() if resolve and isinstance(data, PendingList) else data
+
+        data = (loader or self._loader)(file_path, default_value)
+
+        with self._lock:
+            # 文件不存在或解析失败时不缓存，下次请求重新尝试
+            if signature is not None and data is not default_value:
+                self._entries[file_path] = (signature, data)
+            else:
+                self._entries.pop(file_path, None)
+        return data
+
+    def set(self, file_path, data, signature=None):
+        """文件写入后直接放入内存中的数据，避免下次读取时重新解析"""
+        signature = signature() if signature is not None else self._signature(file_path)
+        with self._lock:
+            if signature is not None:
+                self._entries[file_path] = (signature, data)
+            else:
+                self._entries.pop(file_path, None)
+
+    def invalidate(self, file_path=None):
+        """使指定文件（默认全部）的缓存失效"""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(file_path, None)
+
+    def stats(self):
+        """返回缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "cached_files": sorted(self._entries.keys())
+            }
+
+class ReadWriteLock:
+    """读写锁：多个读者可以同时持有，写者独占；有写者等待时新的读者排在写者之后
+
+    不可重入，持有读锁时不能再申请写锁。
+    设置 lock_file（路径，或返回路径的函数）后，进程内取得锁之后再对该文件加 flock 共享锁/排他锁，
+    gunicorn 多个worker进程之间的写入也互相排斥；每次加锁单独打开文件，同一进程内的多个持有者互不影响。
+    """
+
+    def __init__(self, lock_file=None):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._lock_file = lock_file
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        path = self._lock_file() if callable(self._lock_file) else self._lock_file
+        if not path or fcntl is None:
+            yield
+            return
+        with open(path, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            with self._file_lock(exclusive=False):
+                yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            with self._file_lock(exclusive=True):
+                yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
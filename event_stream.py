@@ -0,0 +1,118 @@
+import json
+import threading
+from collections import deque
+
+# 单次推送中变化的订单超过该数量时，改为通知客户端重新加载全部数据
+MAX_DIFF_ORDERS = 500
+
+def format_event(event, data, event_id=None):
+    """格式化为SSE消息；每条消息只格式化一次，所有连接共享同一份字节串"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+def diff_orders(old_orders, new_orders, max_orders=MAX_DIFF_ORDERS):
+    """按 order_id 比较两个订单列表，返回紧凑的差异；变化过多时返回None
+
+    结果中 added / changed 为完整订单，removed 为订单编号，
+    sequence 只有在订单顺序发生变化时才给出（新列表的订单编号顺序）。
+    """
+    old_map = {o.get('order_id'): o for o in old_orders}
+    new_ids = [o.get('order_id') for o in new_orders]
+    new_id_set = set(new_ids)
+
+    added = []
+    changed = []
+    for order_id, order in zip(new_ids, new_orders):
+        previous = old_map.get(order_id)
+        if previous is None:
+            added.append(order)
+        elif previous != order:
+            changed.append(order)
+        if len(added) + len(changed) > max_orders:
+            return None
+    removed = [order_id for order_id in old_map if order_id not in new_id_set]
+
+    # 去掉删除的订单、追加新增的订单后，顺序仍与新列表一致时不发送顺序
+    kept = [o.get('order_id') for o in old_orders if o.get('order_id') in new_id_set]
+    kept.extend(o.get('order_id') for o in added)
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "sequence": None if kept == new_ids else new_ids
+    }
+
+class EventBroker:
+    """进程内的SSE事件广播：保留最近的事件，断线重连的客户端按 Last-Event-ID 补发
+
+    所有连接等待同一个条件变量，新事件只格式化一次；
+    客户端落后太多（所需事件已被淘汰）时收到 reload 事件，重新加载全部数据。
+    """
+
+    def __init__(self, max_events=64, heartbeat_seconds=15):
+        self.heartbeat_seconds = heartbeat_seconds
+        self._events = deque(maxlen=max_events)
+        self._condition = threading.Condition()
+        self.version = 0
+        self.clients = 0
+
+    def publish(self, event, data):
+        """发布事件，返回新的版本号（即事件ID）"""
+        with self._condition:
+            self.version += 1
+            payload = dict(data, version=self.version)
+            self._events.append((self.version, format_event(event, payload, self.version)))
+            self._condition.notify_all()
+            return self.version
+
+    def _pending(self, last_id):
+        """返回 last_id 之后的事件；所需事件已被淘汰（或来自重启前的服务）时返回None"""
+        if last_id == self.version:
+            return []
+        if last_id > self.version or not self._events or self._events[0][0] > last_id + 1:
+            return None
+        return [message for event_id, message in self._events if event_id > last_id]
+
+    def stream(self, last_event_id=None, on_connect=None, on_idle=None):
+        """生成SSE消息的迭代器
+
+        on_connect 在连接登记后调用一次；on_idle 在每次心跳超时时调用，可用于发现其它进程写入的数据变化。
+        """
+        with self._condition:
+            self.clients += 1
+        try:
+            if on_connect is not None:
+                on_connect()
+            with self._condition:
+                current = self.version
+            last_id = current
+            if last_event_id is not None and str(last_event_id).isdigit():
+                last_id = int(last_event_id)
+            yield b"retry: 3000\n\n"
+            yield format_event("version", {"version": current})
+
+            while True:
+                with self._condition:
+                    messages = self._pending(last_id)
+                    if messages == []:
+                        self._condition.wait(self.heartbeat_seconds)
+                        messages = self._pending(last_id)
+                    last_id = self.version
+
+                if messages is None:
+                    yield format_event("reload", {"version": last_id}, last_id)
+                elif messages:
+                    for message in messages:
+                        yield message
+                else:
+                    # 注释行作为心跳，保持连接不被代理断开
+                    yield b": ping\n\n"
+                    if on_idle is not None:
+                        on_idle()
+        finally:
+            with self._condition:
+                self.clients -= 1
@@ -3,8 +3,12 @@
 import json
 import re
 import os
-import pandas as pd
-import traceback
+from order_parser import parse_numbered_orders_from_workbook, QUOTE_REPLACEMENTS
+from row_index import assign_order_keys
+from atomic_io import atomic_write
+from log_utils import get_logger, configure_logging
+
+logger = get_logger(__name__)
 
 def fix_chinese_quotes(text):
     """将中文引号转换为标准英文引号"""
@@ -16,60 +20,80 @@ def fix_chinese_quotes(text):
     text = text.replace(''', "'")  # 右单引号
     return text
 
-def recreate_orders_from_excel():
-    """直接从Excel文件重新创建订单数据"""
+def recreate_orders_from_excel(excel_path=None):
+    """直接从Excel文件（默认明细总表）重新创建订单数据，与流水线的解析阶段相同"""
     try:
-        print("尝试从Excel直接重新创建订单数据...")
-        excel_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '内文印刷明细总表.xlsx')
+        logger.info("尝试从Excel直接重新创建订单数据...")
+        if excel_path is None:
+            excel_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '内文印刷明细总表.xlsx')
         
         if not os.path.exists(excel_path):
-            print(f"Excel文件不存在: {excel_path}")
+            logger.warning("Excel文件不存在: %s", excel_path)
             return None
             
-        # 读取Excel文件
-        df = pd.read_excel(excel_path)
-        print(f"成功读取Excel文件，共 {len(df)} 行")
-        
-        # 处理Excel数据
-        orders = []
-        for i, row in df.iterrows():
-            if i > 0:  # 跳过标题行
-                try:
-                    order_id = str(i)
-                    
-                    # 安全获取单元格值
-                    def safe_get_cell(row, idx, default=""):
-                        if idx < len(row) and pd.notna(row.iloc[idx]):
-                            val = str(row.iloc[idx]).strip()
-                            # 替换中文引号为英文引号
-                            val = val.replace('"', '"').replace('"', '"')
-                            val = val.replace(''', "'").replace(''', "'")
-                            return val
-                        return default
-                    
-                    product_name = safe_get_cell(row, 1)
-                    printing_method = safe_get_cell(row, 5)
-                    delivery_date = safe_get_cell(row, 15)
-                    
-                    if product_name:
-                        order = {
-                            "order_id": order_id,
-                            "product_name": product_name,
-                            "printing_method": printing_method,
-                            "delivery_date": delivery_date
-                        }
-                        orders.append(order)
-                except Exception as e:
-                    print(f"处理第 {i+1} 行时出错: {e}")
-                    continue
-                    
-        print(f"从Excel提取了 {len(orders)} 条订单数据")
+        # 流式读取Excel文件，按产品序号编号并加上行标识
+        orders = assign_order_keys(parse_numbered_orders_from_workbook(excel_path))
+
+        logger.info("从Excel提取了 %d 条订单数据", len(orders))
         return orders
-    except Exception as e:
-        print(f"从Excel重建订单数据时出错: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("从Excel重建订单数据时出错")
         return None
 
+# 订单必须包含的字段
+ORDER_FIELDS = ("order_id", "product_name", "printing_method", "delivery_date")
+
+# Excel标题行被误当作订单时的特征
+HEADER_ROW = {"product_name": "产品名称", "printing_method": "印刷方式"}
+
+def repair_orders(orders):
+    """在内存中校验并修复已解析的订单，返回 (修复后的订单, 修复报告)"""
+    report = {
+        "input_count": len(orders) if orders else 0,
+        "fixed_fields": 0,
+        "dropped_invalid": 0,
+        "dropped_header": 0,
+        "dropped_empty": 0,
+        "dropped_duplicate": 0
+    }
+    repaired = []
+    seen_ids = set()
+
+    for order in orders or []:
+        if not isinstance(order, dict):
+            report["dropped_invalid"] += 1
+            continue
+
+        fixed = dict(order)
+        for field in ORDER_FIELDS:
+            value = fixed.get(field)
+            if value is None:
+                value = ""
+            elif not isinstance(value, str):
+                value = str(value)
+            cleaned = value.strip()
+            for old, new in QUOTE_REPLACEMENTS:
+                cleaned = cleaned.replace(old, new)
+            if cleaned != fixed.get(field):
+                report["fixed_fields"] += 1
+            fixed[field] = cleaned
+
+        if all(fixed[key] == value for key, value in HEADER_ROW.items()):
+            report["dropped_header"] += 1
+            continue
+        if not fixed["product_name"]:
+            report["dropped_empty"] += 1
+            continue
+        if fixed["order_id"] in seen_ids:
+            report["dropped_duplicate"] += 1
+            continue
+
+        seen_ids.add(fixed["order_id"])
+        repaired.append(fixed)
+
+    report["output_count"] = len(repaired)
+    return repaired, report
+
 def fix_json_file(file_path):
     """修复JSON文件中的中文引号和编码问题"""
     try:
@@ -77,7 +101,7 @@ def fix_json_file(file_path):
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
             
-        print(f"正在修复文件: {file_path}")
+        logger.info("正在修复文件: %s", file_path)
         
         # 检查是否有乱码的迹象
         has_non_ascii = False
@@ -90,18 +114,18 @@ def fix_json_file(file_path):
             has_non_ascii = True
             
         if has_non_ascii:
-            print("检测到可能的编码问题，尝试重新从Excel创建订单数据...")
+            logger.warning("检测到可能的编码问题，尝试重新从Excel创建订单数据...")
             orders = recreate_orders_from_excel()
             if orders:
-                with open(file_path, 'w', encoding='utf-8') as f:
+                with atomic_write(file_path) as f:
                     json.dump(orders, f, ensure_ascii=False, indent=2)
-                print(f"已用重建的数据替换 {file_path}")
+                logger.info("已用重建的数据替换 %s", file_path)
                 return True
         
         # 尝试解析JSON
         try:
             data = json.loads(content)
-            print("JSON文件格式正确，检查内容中的编码问题...")
+            logger.info("JSON文件格式正确，检查内容中的编码问题...")
             
             # 检查是否有中文乱码
             has_encoding_issues = False
@@ -121,37 +145,36 @@ def fix_json_file(file_path):
                     new_data.append(item)
             
             if has_encoding_issues:
-                print("检测到中文编码问题，尝试重新从Excel创建订单数据...")
+                logger.warning("检测到中文编码问题，尝试重新从Excel创建订单数据...")
                 orders = recreate_orders_from_excel()
                 if orders:
-                    with open(file_path, 'w', encoding='utf-8') as f:
+                    with atomic_write(file_path) as f:
                         json.dump(orders, f, ensure_ascii=False, indent=2)
-                    print(f"已用重建的数据替换 {file_path}")
+                    logger.info("已用重建的数据替换 %s", file_path)
                     return True
             else:
-                print("未检测到明显的编码问题")
+                logger.info("未检测到明显的编码问题")
                 return True
                 
         except json.JSONDecodeError as e:
-            print(f"JSON解析错误: {e}")
-            print("JSON格式错误，尝试从Excel重建数据...")
+            logger.warning("JSON解析错误: %s，尝试从Excel重建数据...", e)
             
             orders = recreate_orders_from_excel()
             if orders:
-                with open(file_path, 'w', encoding='utf-8') as f:
+                with atomic_write(file_path) as f:
                     json.dump(orders, f, ensure_ascii=False, indent=2)
-                print(f"已用重建的数据替换 {file_path}")
+                logger.info("已用重建的数据替换 %s", file_path)
                 return True
             else:
-                print("无法从Excel重建数据，尝试其他修复方法...")
+                logger.warning("无法从Excel重建数据，尝试其他修复方法...")
         
         # 如果上面的方法都失败了，尝试更激进的修复
-        print("尝试修复JSON格式问题...")
+        logger.info("尝试修复JSON格式问题...")
         
         # 修复所有可能的中文引号问题
         fixed_content = fix_chinese_quotes(content)
         if fixed_content != content:
-            print("已修复中文引号问题")
+            logger.info("已修复中文引号问题")
             content = fixed_content
 
         # 修复常见的JSON格式问题
@@ -159,34 +182,34 @@ def fix_json_file(file_path):
         content = re.sub(r',\s*]', ']', content)  # 移除数组末尾多余的逗号
         
         # 保存修复后的内容
-        with open(file_path, 'w', encoding='utf-8') as f:
+        with atomic_write(file_path) as f:
             f.write(content)
             
-        print(f"已保存修复后的文件: {file_path}")
+        logger.info("已保存修复后的文件: %s", file_path)
             
         # 验证修复后的JSON
         try:
             json.loads(content)
-            print("验证通过：修复后的JSON格式正确")
+            logger.info("验证通过：修复后的JSON格式正确")
             return True
         except json.JSONDecodeError as e:
-            print(f"修复后JSON仍然存在问题，最后尝试从Excel重建...")
+            logger.warning("修复后JSON仍然存在问题，最后尝试从Excel重建...")
             orders = recreate_orders_from_excel()
             if orders:
-                with open(file_path, 'w', encoding='utf-8') as f:
+                with atomic_write(file_path) as f:
                     json.dump(orders, f, ensure_ascii=False, indent=2)
-                print(f"已用重建的数据替换 {file_path}")
+                logger.info("已用重建的数据替换 %s", file_path)
                 return True
             else:
-                print("所有修复方法都失败，请手动检查数据")
+                logger.error("所有修复方法都失败，请手动检查数据")
                 return False
             
-    except Exception as e:
-        print(f"处理文件时出错: {e}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("处理文件时出错")
         return False
 
 if __name__ == "__main__":
+    configure_logging()
     # 修复parsed_orders.json文件
     print("=" * 50)
     print("修复JSON文件中的编码和格式问题")
@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+
+# 小于该字节数的响应不压缩，压缩收益抵不过额外的开销
+GZIP_MIN_SIZE = 1024
+
+class CachedBody:
+    """序列化后的响应体，以及预先计算好的ETag和gzip压缩结果"""
+
+    __slots__ = ('body', 'gzipped', 'etag', 'mimetype')
+
+    def __init__(self, body, mimetype='application/json'):
+        self.body = body
+        self.mimetype = mimetype
+        # 以内容哈希作为强ETag，内容相同的版本ETag相同
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None
+
+def accepts_gzip(accept_encoding):
+    """判断客户端是否接受gzip编码"""
+    for part in (accept_encoding or '').lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0')
+    return False
+
+def load_asset(file_path, default_value=None):
+    """读取前端静态文件并预先压缩，配合 DataStore 使用时每个文件版本只压缩一次"""
+    try:
+        with open(file_path, 'rb') as f:
+            body = f.read()
+    except OSError:
+        return default_value
+    mimetype = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+    return CachedBody(body, mimetype)
+
+class ResponseCache:
+    """API响应缓存：按请求键保存 CachedBody，生成它的源数据对象不变（同一数据版本）时直接复用
+
+    源数据对象来自 DataStore / OptimizationCache，数据变化时会换成新的对象，
+    因此只需按对象身份比较，不必在每个请求中重新序列化或哈希。
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, sources, build):
+        """返回键对应的 CachedBody；sources 为源数据对象元组，build() 在版本变化时生成新的 CachedBody"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and len(entry[0]) == len(sources) and all(a is b for a, b in zip(entry[0], sources)):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        cached = build()
+        with self._lock:
+            # 保存源对象的引用，保证比较身份时对象仍然存活
+            self._entries[key] = (tuple(sources), cached)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """返回缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": len(self._entries)
+            }
@@ -0,0 +1,87 @@
+import logging
+import os
+import threading
+import time
+
+# 所有模块的日志记录器都挂在该名称下，级别和输出由 configure_logging 统一设置
+LOGGER_NAME = 'print_order'
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# 默认只输出警告和错误；调试时设置环境变量 LOG_LEVEL=INFO 或 DEBUG
+DEFAULT_LEVEL = 'WARNING'
+
+def get_logger(name):
+    """返回模块的日志记录器"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+class RateLimitFilter(logging.Filter):
+    """限制同一位置的同一条消息的输出频率
+
+    每 interval 秒内最多输出 burst 条，其余只计数，下一个时间窗口的第一条消息附带省略的条数。
+    """
+
+    def __init__(self, interval=60.0, burst=5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        # (文件, 行号, 消息模板) -> [窗口开始时间, 已输出条数, 已省略条数]
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                window = self._windows[key] = [now, 0, 0]
+                if suppressed:
+                    record.msg = f"{record.msg}（此前省略 {suppressed} 条相同消息）"
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+        return True
+
+def configure_logging(level=None, stream=None):
+    """设置日志级别并添加输出（只添加一次）；未指定级别时读取环境变量 LOG_LEVEL，默认 WARNING"""
+    level = level or os.environ.get('LOG_LEVEL') or DEFAULT_LEVEL
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    if not any(isinstance(f, RateLimitFilter) for h in logger.handlers for f in h.filters):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.addFilter(RateLimitFilter())
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+class IssueCounter:
+    """汇总逐条记录中的问题：处理过程中只计数，结束后每类问题输出一条，如 "312 条订单缺少印刷方式"
+
+    每类问题保留前 sample 条示例，只在 DEBUG 级别输出。
+    """
+
+    def __init__(self, logger, sample=3):
+        self.logger = logger
+        self.sample = sample
+        self.counts = {}
+        self.examples = {}
+
+    def add(self, issue, example=None):
+        count = self.counts.get(issue, 0)
+        self.counts[issue] = count + 1
+        if example is not None and count < self.sample:
+            self.examples.setdefault(issue, []).append(example)
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def report(self, level=logging.WARNING):
+        """输出各类问题的汇总"""
+        for issue, count in self.counts.items():
+            self.logger.log(level, f"%d 条{issue}", count)
+            if issue in self.examples:
+                self.logger.debug(f"{issue}示例: %s", self.examples[issue])
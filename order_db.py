@@ -0,0 +1,299 @@
+import json
+import sqlite3
+import sys
+import threading
+
+from atomic_io import atomic_write
+from log_utils import get_logger, configure_logging
+from order_model import ORDER_FIELDS, parse_delivery_date
+from order_query import DEFAULT_LIMIT, date_range_sql
+
+logger = get_logger(__name__)
+
+# 以这些扩展名结尾的订单路径按SQLite数据库处理
+DB_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+# 订单位置之间的间隔：增量写入时新订单取前后订单位置之间的值，间隔用完时重新编号全部订单
+POSITION_GAP = 1 << 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    position INTEGER NOT NULL DEFAULT 0,
+    order_id TEXT NOT NULL UNIQUE,
+    product_name TEXT NOT NULL,
+    printing_method TEXT NOT NULL,
+    delivery_date TEXT NOT NULL,
+    date_key INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orders_method ON orders (printing_method, date_key);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders (date_key);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+UPSERT_SQL = """
+INSERT INTO orders (order_id, product_name, printing_method, delivery_date, date_key, extra, position)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (order_id) DO UPDATE SET
+    product_name = excluded.product_name,
+    printing_method = excluded.printing_method,
+    delivery_date = excluded.delivery_date,
+    date_key = excluded.date_key,
+    extra = excluded.extra{position}
+"""
+
+# 更新已有订单时保留原位置 / 改为新位置
+UPSERT_KEEP_POSITION_SQL = UPSERT_SQL.format(position="")
+UPSERT_MOVE_SQL = UPSERT_SQL.format(position=",\n    position = excluded.position")
+
+# 旧版本创建的数据库没有 position 列，按写入顺序补上
+MIGRATE_POSITION_SQL = f"""
+ALTER TABLE orders ADD COLUMN position INTEGER NOT NULL DEFAULT 0;
+UPDATE orders SET position = seq * {POSITION_GAP};
+"""
+
+def is_db_path(file_path):
+    """判断订单路径是否为SQLite数据库"""
+    return str(file_path).lower().endswith(DB_EXTENSIONS)
+
+def _row_values(order):
+    """订单字典转换为数据库行"""
+    extra = {k: v for k, v in order.items() if k not in ORDER_FIELDS}
+    delivery_date = str(order.get('delivery_date', ''))
+    return (
+        str(order.get('order_id', '')),
+        str(order.get('product_name', '')),
+        str(order.get('printing_method') or '').strip(),
+        delivery_date,
+        parse_delivery_date(delivery_date),
+        json.dumps(extra, ensure_ascii=False) if extra else None
+    )
+
+def _row_to_order(row):
+    """数据库行转换为订单字典"""
+    order = {
+        "order_id": row[0],
+        "product_name": row[1],
+        "printing_method": row[2],
+        "delivery_date": row[3]
+    }
+    if row[4]:
+        order.update(json.loads(row[4]))
+    return order
+
+class OrderDatabase:
+    """SQLite订单存储：WAL模式下读不阻塞写，按印刷方式和交货日期建索引"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        if 'position' not in {row[1] for row in conn.execute("PRAGMA table_info(orders)")}:
+            conn.executescript(MIGRATE_POSITION_SQL)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_position ON orders (position)")
+        conn.commit()
+
+    def _connection(self):
+        """每个线程使用独立的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.file_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def version(self):
+        """数据版本号，每次写入后递增，可用于判断缓存是否过期"""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def count(self):
+        """订单总数"""
+        return self._connection().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+
+    def _positions(self, conn, order_ids):
+        """订单编号 -> 当前位置"""
+        order_ids = list(order_ids)
+        positions = {}
+        for start in range(0, len(order_ids), 500):
+            chunk = order_ids[start:start + 500]
+            rows = conn.execute(f"SELECT order_id, position FROM orders WHERE order_id IN ({','.join('?' * len(chunk))})", chunk)
+            positions.update(rows)
+        return positions
+
+    def _place(self, conn, orders, order_ids):
+        """按 order_ids（写入后全部订单的顺序）为要写入的订单计算位置：连续的一段新位置平均分布在前后未变化订单的位置之间
+
+        某一段的间隔不够时返回None，由调用方重新编号全部订单。
+        """
+        moving = {o['order_id'] for o in orders}
+        runs = []
+        run = []
+        previous = None
+        for order_id in order_ids:
+            if order_id in moving:
+                run.append(order_id)
+                continue
+            if run:
+                runs.append((previous, run, order_id))
+                run = []
+            previous = order_id
+        if run:
+            runs.append((previous, run, None))
+
+        anchors = self._positions(conn, {a for before, _, after in runs for a in (before, after) if a is not None})
+        placed = {}
+        for before, run, after in runs:
+            lo = anchors.get(before)
+            hi = anchors.get(after)
+            if lo is None and hi is None:
+                lo, hi = 0, (len(run) + 1) * POSITION_GAP
+            elif lo is None:
+                lo = hi - (len(run) + 1) * POSITION_GAP
+            elif hi is None:
+                hi = lo + (len(run) + 1) * POSITION_GAP
+            if hi - lo <= len(run):
+                return None
+            for i, order_id in enumerate(run, start=1):
+                placed[order_id] = lo + (hi - lo) * i // (len(run) + 1)
+        return placed
+
+    def upsert_orders(self, orders, order_ids=None):
+        """在一个事务中批量插入或更新订单（按 order_id）
+
+        不给出 order_ids 时新订单排在最后，已有订单保留原位置；
+        order_ids 为写入后全部订单的编号（按顺序）时，写入的订单放到该顺序中的位置，其它订单的相对顺序不变。
+        """
+        orders = [o for o in orders if isinstance(o, dict)]
+        conn = self._connection()
+        with conn:
+            if order_ids is None:
+                start = conn.execute("SELECT COALESCE(MAX(position), 0) FROM orders").fetchone()[0]
+                conn.executemany(UPSERT_KEEP_POSITION_SQL, (
+                    _row_values(o) + (start + i * POSITION_GAP,) for i, o in enumerate(orders, start=1)))
+            else:
+                placed = self._place(conn, orders, order_ids)
+                if placed is None:
+                    conn.executemany(UPSERT_MOVE_SQL, (_row_values(o) + (0,) for o in orders))
+                    conn.executemany("UPDATE orders SET position = ? WHERE order_id = ?",
+                                     ((i * POSITION_GAP, order_id) for i, order_id in enumerate(order_ids, start=1)))
+                else:
+                    conn.executemany(UPSERT_MOVE_SQL, (_row_values(o) + (placed[o['order_id']],) for o in orders))
+            self._bump_version(conn)
+
+    def replace_all(self, orders):
+        """在一个事务中用新的订单列表替换全部订单"""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM orders")
+            conn.executemany(UPSERT_MOVE_SQL, (
+                _row_values(o) + (i * POSITION_GAP,) for i, o in enumerate(orders, start=1) if isinstance(o, dict)))
+            self._bump_version(conn)
+
+    def delete_orders(self, order_ids):
+        """在一个事务中批量删除订单"""
+        conn = self._connection()
+        with conn:
+            conn.executemany("DELETE FROM orders WHERE order_id = ?", ((str(i),) for i in order_ids))
+            self._bump_version(conn)
+
+    @staticmethod
+    def _where(printing_method, date_from, date_to):
+        """过滤条件：印刷方式走 (printing_method, date_key) 索引，日期范围与内存中的查询索引（order_query.py）规则相同"""
+        clauses = []
+        params = []
+        if printing_method is not None:
+            clauses.append("printing_method = ?")
+            params.append(printing_method)
+        if date_from is not None or date_to is not None:
+            clause, date_params = date_range_sql("date_key", date_from, date_to)
+            clauses.append(clause)
+            params.extend(date_params)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def load_orders(self, printing_method=None, date_from=None, date_to=None, limit=None, offset=0, conn=None):
+        """按条件读取订单，按订单位置排序（与写入时的列表顺序相同）；日期范围为交货日期键（含端点）"""
+        where, params = self._where(printing_method, date_from, date_to)
+        sql = "SELECT order_id, product_name, printing_method, delivery_date, extra FROM orders" + where
+        sql += " ORDER BY position, seq"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([int(limit), int(offset)])
+
+        return [_row_to_order(row) for row in (conn or self._connection()).execute(sql, params)]
+
+    def query_orders(self, printing_method=None, date_from=None, date_to=None, limit=DEFAULT_LIMIT, cursor=0, fields=None):
+        """分页查询，返回与 OrderQueryIndex.query 相同的 {items, total, next_cursor}，只读取当前页的订单"""
+        conn = self._connection()
+        where, params = self._where(printing_method, date_from, date_to)
+        # 计数和读取当前页在同一个读事务中，看到同一版本的数据
+        conn.execute("BEGIN")
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM orders" + where, params).fetchone()[0]
+            items = self.load_orders(printing_method, date_from, date_to, limit, cursor, conn=conn)
+        finally:
+            conn.commit()
+        if fields:
+            items = [{f: order.get(f) for f in fields} for order in items]
+        end = cursor + len(items)
+        return {
+            "items": items,
+            "total": total,
+            "next_cursor": str(end) if end < total else None
+        }
+
+    def import_json(self, json_path):
+        """从JSON订单文件导入（替换全部订单），返回导入条数"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        orders = json.loads(content) if content.strip() else []
+        self.replace_all(orders)
+        return len(orders)
+
+    def export_json(self, json_path):
+        """导出为与 parsed_orders.json 相同格式的JSON文件，返回导出条数"""
+        orders = self.load_orders()
+        with atomic_write(json_path) as f:
+            json.dump(orders, f, ensure_ascii=False, indent=2)
+        return len(orders)
+
+    def reset_after_fork(self):
+        """fork之后在子进程中调用：丢弃从父进程继承的连接（不关闭，父进程仍在使用），之后按需重新连接"""
+        self._local = threading.local()
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+def main():
+    """命令行：python order_db.py import|export <JSON文件> <数据库文件>"""
+    if len(sys.argv) != 4 or sys.argv[1] not in ('import', 'export'):
+        print("用法: python order_db.py import|export <JSON文件> <数据库文件>")
+        sys.exit(1)
+
+    configure_logging()
+    command, json_path, db_path = sys.argv[1:]
+    try:
+        db = OrderDatabase(db_path)
+        if command == 'import':
+            print(f"已从 {json_path} 导入 {db.import_json(json_path)} 条订单到 {db_path}")
+        else:
+            print(f"已从 {db_path} 导出 {db.export_json(json_path)} 条订单到 {json_path}")
+    except Exception:
+        logger.exception("%s 订单数据时出错", command)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
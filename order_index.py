@@ -0,0 +1,208 @@
+from bisect import bisect_left, bisect_right
+
+from changeover_optimization import delivery_sort_key, get_cost_model
+from data_store import PendingList
+
+# 优化序列累积这么多次未生成的插入/删除后重新展开一次，避免读取时逐个应用大量插入
+COMPACT_CHANGES = 256
+
+class SequenceIndex:
+    """维护优化后的排产序列，新订单按交货日期直接插入所属印刷方式分组，无需重新分组排序"""
+
+    def __init__(self, cost_model=None):
+        self.cost_model = cost_model or get_cost_model()
+        self.method_sequence = []
+        # 印刷方式 -> 排序键列表 / 订单列表，两者按交货日期同步有序
+        self._keys = {}
+        self._orders = {}
+        self.order_ids = set()
+        self.max_numeric_id = 0
+        self.changeover_before = 0
+        self.cost_before = 0.0
+        self.cost_after = 0.0
+        # 原始顺序中最后一个订单的印刷方式，用于累加优化前的换版成本
+        self._last_method = None
+        # 优化后的订单列表；插入和删除只记录在 PendingList 上，读取时才生成
+        self._sequence = PendingList([])
+
+    @classmethod
+    def from_result(cls, orders, result, cost_model=None):
+        """由一次完整优化的结果构建索引"""
+        index = cls(cost_model)
+        index.changeover_before = result.get('changeover_before', len(orders))
+        index.cost_before = result.get('changeover_cost_before') or 0.0
+        index.cost_after = result.get('changeover_cost_after') or 0.0
+        index.method_sequence = list(result.get('method_sequence', []))
+        for method in index.method_sequence:
+            index._keys[method] = []
+            index._orders[method] = []
+
+        for order in result.get('optimized_orders', []):
+            method = order.get('printing_method', '').strip()
+            if method not in index._keys:
+                continue
+            index._keys[method].append(delivery_sort_key(order))
+            index._orders[method].append(order)
+        index._sequence = PendingList(index._flatten())
+
+        for order in orders:
+            if isinstance(order, dict):
+                index._add_id(str(order.get('order_id', '')))
+                if order.get('printing_method', ''):
+                    index._last_method = order['printing_method'].strip()
+        return index
+
+    def _add_id(self, order_id):
+        self.order_ids.add(order_id)
+        if order_id.isdigit():
+            self.max_numeric_id = max(self.max_numeric_id, int(order_id))
+
+    def next_order_id(self):
+        """为没有编号的新订单分配编号"""
+        self.max_numeric_id += 1
+        return str(self.max_numeric_id)
+
+    def _insert_method(self, method):
+        """新印刷方式插入到使总换版成本增加最少的位置"""
+        cost = self.cost_model.cost
+        sequence = self.method_sequence
+        if not sequence:
+            sequence.append(method)
+            return 0.0
+
+        # 放在最前或最后只增加一条边
+        best_pos, best_delta = 0, cost(method, sequence[0])
+        delta = cost(sequence[-1], method)
+        if delta < best_delta:
+            best_pos, best_delta = len(sequence), delta
+        for pos in range(1, len(sequence)):
+            prev_method, next_method = sequence[pos - 1], sequence[pos]
+            delta = cost(prev_method, method) + cost(method, next_method) - cost(prev_method, next_method)
+            if delta < best_delta:
+                best_pos, best_delta = pos, delta
+
+        sequence.insert(best_pos, method)
+        return best_delta
+
+    def _offset(self, method):
+        """印刷方式分组在优化序列中的起始位置"""
+        offset = 0
+        for other in self.method_sequence:
+            if other == method:
+                break
+            offset += len(self._orders[other])
+        return offset
+
+    def _change_sequence(self, sequence):
+        if sequence.depth >= COMPACT_CHANGES:
+            sequence = PendingList(self._flatten())
+        self._sequence = sequence
+
+    def insert(self, order):
+        """插入一个订单，返回它在优化序列中的位置；没有印刷方式的订单不进入序列，返回None"""
+        self._add_id(str(order.get('order_id', '')))
+        self.changeover_before += 1
+
+        method = order.get('printing_method', '').strip()
+        if not method:
+            return None
+
+        if self._last_method is not None:
+            self.cost_before += self.cost_model.cost(self._last_method, method)
+        self._last_method = method
+
+        if method not in self._keys:
+            self.cost_after += self._insert_method(method)
+            self._keys[method] = []
+            self._orders[method] = []
+
+        keys = self._keys[method]
+        key = delivery_sort_key(order)
+        idx = bisect_right(keys, key)
+        keys.insert(idx, key)
+        self._orders[method].insert(idx, order)
+
+        position = self._offset(method) + idx
+        self._change_sequence(self._sequence.insert(position, order))
+        return position
+
+    def _remove_method(self, method):
+        """删除已经没有订单的印刷方式分组，前后两个分组直接相邻"""
+        cost = self.cost_model.cost
+        sequence = self.method_sequence
+        pos = sequence.index(method)
+        prev_method = sequence[pos - 1] if pos > 0 else None
+        next_method = sequence[pos + 1] if pos + 1 < len(sequence) else None
+        if prev_method is not None:
+            self.cost_after -= cost(prev_method, method)
+        if next_method is not None:
+            self.cost_after -= cost(method, next_method)
+        if prev_method is not None and next_method is not None:
+            self.cost_after += cost(prev_method, next_method)
+        del sequence[pos]
+        del self._keys[method]
+        del self._orders[method]
+
+    def remove(self, order):
+        """按订单编号删除一个订单，返回是否在序列中找到；分组变空时从分组顺序中去掉该印刷方式"""
+        order_id = str(order.get('order_id', ''))
+        self.order_ids.discard(order_id)
+        self.changeover_before -= 1
+
+        method = order.get('printing_method', '').strip()
+        orders = self._orders.get(method)
+        if not orders:
+            return False
+        keys = self._keys[method]
+        key = delivery_sort_key(order)
+        for idx in range(bisect_left(keys, key), bisect_right(keys, key)):
+            if str(orders[idx].get('order_id', '')) == order_id:
+                break
+        else:
+            return False
+
+        position = self._offset(method) + idx
+        del keys[idx]
+        del orders[idx]
+        self._change_sequence(self._sequence.delete(position))
+        if not orders:
+            self._remove_method(method)
+        return True
+
+    def recount(self, orders):
+        """按订单的原始顺序重新计算优化前的换版次数和成本（删除或修改订单之后调用）"""
+        methods = [
+            order['printing_method'].strip()
+            for order in orders
+            if isinstance(order, dict) and order.get('printing_method', '')
+        ]
+        self.changeover_before = len(orders)
+        self.cost_before = self.cost_model.sequence_cost(methods)
+        self._last_method = methods[-1] if methods else None
+
+    def _flatten(self):
+        flat = []
+        for method in self.method_sequence:
+            flat.extend(self._orders[method])
+        return flat
+
+    def optimized_orders(self):
+        """按分组顺序展开的优化后订单列表"""
+        return self._sequence.resolve()
+
+    def result(self):
+        """返回与 optimize_changeovers 相同格式的结果；optimized_orders 为 PendingList，第一次读取时才生成列表"""
+        changeover_after = len(self.method_sequence)
+        if self.changeover_before > 0:
+            reduction_pct = (self.changeover_before - changeover_after) / self.changeover_before
+        else:
+            reduction_pct = 0
+        return {
+            'optimized_orders': self._sequence,
+            'changeover_before': self.changeover_before,
+            'changeover_after': changeover_after,
+            'changeover_reduction_pct': round(reduction_pct, 2),
+            'changeover_cost_before': round(self.cost_before, 2),
+            'changeover_cost_after': round(self.cost_after, 2),
+            'method_sequence': list(self.method_sequence)
+        }
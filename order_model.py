@@ -0,0 +1,120 @@
+import re
+import sys
+from functools import lru_cache
+
+# 订单的基本字段，其它字段保存在 extra 中
+ORDER_FIELDS = ("order_id", "product_name", "printing_method", "delivery_date")
+_ORDER_FIELD_SET = frozenset(ORDER_FIELDS)
+
+# 无法解析的交货日期排在所有日期之后
+UNKNOWN_DATE_KEY = 10 ** 6
+
+_DATE_PATTERNS = (
+    # 2025-06-09 / 2025/6/9 / 2025.6.9
+    re.compile(r'^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})'),
+    # 6.9 / 6/9 / 6-9 / 6月9日
+    re.compile(r'^()(\d{1,2})\s*[./\-月]\s*(\d{1,2})\s*日?$'),
+)
+
+@lru_cache(maxsize=4096)
+def parse_delivery_date(value):
+    """将交货日期解析为可比较的整数（年*10000 + 月*100 + 日，年份缺省为0）
+
+    Excel中以数字保存的日期会丢失末尾的0，例如6月30日读出来是"6.3"，
+    这类值按字面解析为6月3日。
+    """
+    text = str(value).strip() if value is not None else ''
+    for pattern in _DATE_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            year = int(match.group(1) or 0)
+            month, day = int(match.group(2)), int(match.group(3))
+            if 1 <= month <= 12 and 1 <= day <= 31:
+                return year * 10000 + month * 100 + day
+    return UNKNOWN_DATE_KEY
+
+class Order:
+    """紧凑的订单记录：印刷方式和交货日期字符串驻留共享，交货日期只解析一次"""
+
+    __slots__ = ('id', 'order_id', 'product_name', 'printing_method', 'delivery_date', 'date_key', 'extra')
+
+    def __init__(self, id, order_id, product_name, printing_method, delivery_date, extra=None):
+        self.id = id
+        self.order_id = order_id
+        self.product_name = product_name
+        self.printing_method = sys.intern(printing_method)
+        self.delivery_date = sys.intern(delivery_date)
+        self.date_key = parse_delivery_date(delivery_date)
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data, id):
+        """由订单字典创建记录，id 为记录在列表中的位置；缺少基本字段时其它字段同样保存在 extra 中"""
+        extra = None if data.keys() <= _ORDER_FIELD_SET else {k: v for k, v in data.items() if k not in _ORDER_FIELD_SET}
+        return cls(
+            id,
+            str(data.get('order_id', '')),
+            str(data.get('product_name', '')),
+            str(data.get('printing_method') or '').strip(),
+            str(data.get('delivery_date', '')),
+            extra or None
+        )
+
+    def get(self, key, default=None):
+        """与字典相同的取值方式，便于已有代码同时处理字典和记录"""
+        if key in ORDER_FIELDS:
+            return getattr(self, key)
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        if key in ORDER_FIELDS:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def to_dict(self):
+        """转换回订单字典"""
+        data = {
+            "order_id": self.order_id,
+            "product_name": self.product_name,
+            "printing_method": self.printing_method,
+            "delivery_date": self.delivery_date
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        return f"Order({self.order_id!r}, {self.printing_method!r}, {self.delivery_date!r})"
+
+def to_records(orders):
+    """将订单字典列表转换为记录列表，已经是记录的直接返回；非字典元素被跳过"""
+    if orders and isinstance(orders[0], Order):
+        return orders
+    return [Order.from_dict(order, i) for i, order in enumerate(orders) if isinstance(order, dict)]
+
+def delivery_sort_key(order):
+    """订单在分组内的排序键（交货日期序数）"""
+    if isinstance(order, Order):
+        return order.date_key
+    return parse_delivery_date(order.get('delivery_date', ''))
+
+def date_key_function():
+    """返回订单字典的交货日期排序键函数，同一批排序中相同的日期字符串只解析一次"""
+    cache = {}
+
+    def key(order):
+        value = order.get('delivery_date', '')
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = parse_delivery_date(value)
+            return result
+        except TypeError:
+            # 不可哈希的值不缓存
+            return parse_delivery_date.__wrapped__(value)
+
+    return key
@@ -0,0 +1,186 @@
+# pandas 只在处理DataFrame的函数中导入；流式解析只需要 openpyxl，同样在使用时才导入
+
+# Excel中各字段所在的列
+SERIAL_COL = 0
+PRODUCT_NAME_COL = 1
+PRINTING_METHOD_COL = 5
+DELIVERY_DATE_COL = 15
+
+# 中文引号替换为英文引号
+QUOTE_REPLACEMENTS = (('“', '"'), ('”', '"'), ('‘', "'"), ('’', "'"))
+
+# 批量替换时用于拼接整列的分隔符（单元格内容中不会出现）
+_JOIN_SEP = '\x1f'
+
+def stripped_column(df, idx, keep=None):
+    """将整列转换为字符串Series：缺失值变为空字符串并去除首尾空白"""
+    if idx >= df.shape[1]:
+        import pandas as pd
+        size = len(df) if keep is None else int(keep.sum())
+        return pd.Series([""] * size, dtype=object)
+
+    column = df.iloc[:, idx]
+    if keep is not None:
+        column = column[keep]
+    column = column.astype(object)
+    column = column.where(column.notna(), "")
+    return column.astype(str).str.strip()
+
+def normalize_quotes(values):
+    """批量替换中文引号：整列拼接成一个字符串替换后再拆分，避免逐个单元格处理"""
+    if not values:
+        return []
+
+    joined = _JOIN_SEP.join(values)
+    if joined.count(_JOIN_SEP) != len(values) - 1:
+        # 单元格内容本身含有分隔符时退回逐个处理
+        result = []
+        for value in values:
+            for old, new in QUOTE_REPLACEMENTS:
+                value = value.replace(old, new)
+            result.append(value)
+        return result
+
+    for old, new in QUOTE_REPLACEMENTS:
+        joined = joined.replace(old, new)
+    return joined.split(_JOIN_SEP)
+
+def clean_column(df, idx, keep=None):
+    """返回清洗后的列值列表"""
+    return normalize_quotes(stripped_column(df, idx, keep).tolist())
+
+def _build_orders(order_ids, product_names, printing_methods, delivery_dates):
+    """由列向量组装订单字典列表"""
+    return [
+        {
+            "order_id": order_id,
+            "product_name": product_name,
+            "printing_method": printing_method,
+            "delivery_date": delivery_date
+        }
+        for order_id, product_name, printing_method, delivery_date
+        in zip(order_ids, product_names, printing_methods, delivery_dates)
+    ]
+
+def parse_orders(df):
+    """按行号生成订单（上传接口使用的格式）：跳过第一行，产品名称为空的行不生成订单"""
+    product_names = stripped_column(df, PRODUCT_NAME_COL)
+    keep = (product_names != "").to_numpy() & (df.index > 0)
+
+    return _build_orders(
+        df.index[keep].astype(str).tolist(),
+        normalize_quotes(product_names[keep].tolist()),
+        clean_column(df, PRINTING_METHOD_COL, keep),
+        clean_column(df, DELIVERY_DATE_COL, keep)
+    )
+
+def parse_numbered_orders(df):
+    """按产品序号生成订单：只保留第一列为数字序号的行，标题行和进度说明行被过滤"""
+    if df.shape[1] <= SERIAL_COL:
+        return []
+
+    import pandas as pd
+    serials = pd.to_numeric(df.iloc[:, SERIAL_COL], errors='coerce')
+    keep = serials.notna().to_numpy()
+
+    return _build_orders(
+        serials[keep].astype('int64').astype(str).tolist(),
+        clean_column(df, PRODUCT_NAME_COL, keep),
+        clean_column(df, PRINTING_METHOD_COL, keep),
+        clean_column(df, DELIVERY_DATE_COL, keep)
+    )
+
+def _cell_text(value):
+    """单元格值转换为字符串：空单元格为空字符串，整数值的浮点数不带小数部分"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def iter_workbook_rows(source):
+    """以只读流式模式逐行读取第一个工作表，source 可以是文件路径或文件对象
+
+    只读模式不会把整个工作表载入内存，内存占用与表格大小基本无关。
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        # 工作表记录的范围可能不准确，与 pandas 一样从第一行开始读取
+        sheet.reset_dimensions()
+        for row in sheet.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+def parse_orders_from_workbook(source, serial_ids=False):
+    """直接从Excel文件流解析订单，按行号编号的规则与 parse_orders 相同
+
+    第一行为标题行，其后第 i 行（从0开始）的订单编号为 i；与 parse_orders 一样跳过 i=0 的行，
+    产品名称为空的行不生成订单。单元格按各自的值转换为文本，不经过 pandas 按整列推断类型，
+    因此与 parse_orders(pd.read_excel(source)) 的结果不一定相同（例如混有数字的列中布尔值不会变成1）；
+    后端、流水线和命令行脚本都使用流式解析，同一工作簿得到相同的订单。serial_ids 为True时订单编号改为第一列的产品序号，
+    插入或删除行时不会变化；没有序号的行订单编号为空字符串。
+    """
+    order_ids = []
+    product_names = []
+    printing_methods = []
+    delivery_dates = []
+    for index, row in enumerate(iter_workbook_rows(source), start=-1):
+        if index <= 0 or len(row) <= PRODUCT_NAME_COL:
+            continue
+        product_name = _cell_text(row[PRODUCT_NAME_COL])
+        if not product_name:
+            continue
+        if serial_ids:
+            serial = _serial_number(row[SERIAL_COL])
+            order_ids.append("" if serial is None else str(serial))
+        else:
+            order_ids.append(str(index))
+        product_names.append(product_name)
+        printing_methods.append(_cell_text(row[PRINTING_METHOD_COL]) if len(row) > PRINTING_METHOD_COL else "")
+        delivery_dates.append(_cell_text(row[DELIVERY_DATE_COL]) if len(row) > DELIVERY_DATE_COL else "")
+
+    return _build_orders(
+        order_ids,
+        normalize_quotes(product_names),
+        normalize_quotes(printing_methods),
+        normalize_quotes(delivery_dates)
+    )
+
+def _serial_number(value):
+    """第一列的产品序号：数字或数字字符串返回整数序号，其它返回None（与 pd.to_numeric 后取整一致）"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if not isinstance(value, (int, float)):
+        try:
+            value = float(str(value).strip())
+        except ValueError:
+            return None
+    if value != value or value in (float('inf'), float('-inf')):
+        return None
+    return int(value)
+
+def parse_numbered_orders_from_workbook(source):
+    """直接从Excel文件流按产品序号解析订单，过滤规则与 parse_numbered_orders 相同，单元格转换为文本的方式同 parse_orders_from_workbook"""
+    order_ids = []
+    product_names = []
+    printing_methods = []
+    delivery_dates = []
+    for row in iter_workbook_rows(source):
+        serial = _serial_number(row[SERIAL_COL]) if row else None
+        if serial is None:
+            continue
+        order_ids.append(str(serial))
+        product_names.append(_cell_text(row[PRODUCT_NAME_COL]) if len(row) > PRODUCT_NAME_COL else "")
+        printing_methods.append(_cell_text(row[PRINTING_METHOD_COL]) if len(row) > PRINTING_METHOD_COL else "")
+        delivery_dates.append(_cell_text(row[DELIVERY_DATE_COL]) if len(row) > DELIVERY_DATE_COL else "")
+
+    return _build_orders(
+        order_ids,
+        normalize_quotes(product_names),
+        normalize_quotes(printing_methods),
+        normalize_quotes(delivery_dates)
+    )
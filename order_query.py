@@ -0,0 +1,204 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+
+from order_model import Order, delivery_sort_key, parse_delivery_date, UNKNOWN_DATE_KEY
+
+# 分页默认和最大条数
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+# 交货日期键中年份的倍数（年*10000 + 月*100 + 日），小于它的键不含年份
+YEAR_SCALE = 10000
+
+def _split(pairs):
+    pairs.sort()
+    return [key for key, _ in pairs], [pos for _, pos in pairs]
+
+def _range(keys, positions, date_from, date_to):
+    lo = bisect_left(keys, date_from) if date_from is not None else 0
+    hi = bisect_right(keys, date_to) if date_to is not None else len(keys)
+    return positions[lo:hi]
+
+def _has_year(key):
+    return key is not None and key >= YEAR_SCALE
+
+class DateIndex:
+    """一组订单按交货日期排序的位置；无法识别的交货日期不出现在任何日期范围的结果中
+
+    明细表中的交货日期大多不含年份。不带年份的查询条件按月日比较所有订单；
+    带年份的条件按完整日期比较带年份的订单，按月日比较不带年份的订单（跨年的范围包含两端的月日）。
+    """
+
+    def __init__(self, pairs):
+        yearless = []
+        dated = []
+        for key, pos in pairs:
+            if key == UNKNOWN_DATE_KEY:
+                continue
+            (dated if key >= YEAR_SCALE else yearless).append((key, pos))
+        self._yearless = _split(yearless)
+        self._dated_month_day = _split([(key % YEAR_SCALE, pos) for key, pos in dated])
+        self._dated = _split(dated)
+
+    def positions(self, date_from, date_to):
+        """交货日期在 [date_from, date_to] 内的订单位置（保持原列表顺序）；两端已由 parse_query_args 统一是否带年份"""
+        if not _has_year(date_from) and not _has_year(date_to):
+            return sorted(_range(*self._yearless, date_from, date_to) + _range(*self._dated_month_day, date_from, date_to))
+
+        result = _range(*self._dated, date_from, date_to)
+        month_from = date_from % YEAR_SCALE if date_from is not None else None
+        month_to = date_to % YEAR_SCALE if date_to is not None else None
+        years = date_to // YEAR_SCALE - date_from // YEAR_SCALE if date_from is not None and date_to is not None else 0
+        if years > 1 or (years == 1 and month_to >= month_from):
+            result = result + self._yearless[1]
+        elif years == 1:
+            result = result + _range(*self._yearless, month_from, None) + _range(*self._yearless, None, month_to)
+        else:
+            result = result + _range(*self._yearless, month_from, month_to)
+        return sorted(result)
+
+def _sql_range(column, low, high):
+    clauses = []
+    params = []
+    if low is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(low)
+    if high is not None:
+        clauses.append(f"{column} <= ?")
+        params.append(high)
+    return clauses, params
+
+def date_range_sql(column, date_from, date_to):
+    """与 DateIndex.positions 相同的日期范围条件（SQL），column 为交货日期键列，返回 (条件, 参数)"""
+    known = f"{column} != {UNKNOWN_DATE_KEY}"
+    yearless = f"{column} < {YEAR_SCALE}"
+    if not _has_year(date_from) and not _has_year(date_to):
+        clauses, params = _sql_range(f"{column} % {YEAR_SCALE}", date_from, date_to)
+        return " AND ".join([known] + clauses), params
+
+    clauses, params = _sql_range(column, date_from, date_to)
+    parts = ["(" + " AND ".join([known, f"{column} >= {YEAR_SCALE}"] + clauses) + ")"]
+    month_from = date_from % YEAR_SCALE if date_from is not None else None
+    month_to = date_to % YEAR_SCALE if date_to is not None else None
+    years = date_to // YEAR_SCALE - date_from // YEAR_SCALE if date_from is not None and date_to is not None else 0
+    if years > 1 or (years == 1 and month_to >= month_from):
+        parts.append(yearless)
+    elif years == 1:
+        parts.append(f"({yearless} AND ({column} >= ? OR {column} <= ?))")
+        params += [month_from, month_to]
+    else:
+        clauses, month_params = _sql_range(column, month_from, month_to)
+        parts.append("(" + " AND ".join([yearless] + clauses) + ")")
+        params += month_params
+    return "(" + " OR ".join(parts) + ")", params
+
+class OrderQueryIndex:
+    """为一个订单列表预先建立的查询索引：按印刷方式分组、按交货日期排序，分页只处理当前页"""
+
+    def __init__(self, orders, max_cached_queries=32):
+        self.orders = orders
+        # 全部订单的位置（原列表顺序），以及 印刷方式 -> 订单位置
+        self._all_positions = []
+        self._by_method = defaultdict(list)
+        keyed = []
+        method_keyed = defaultdict(list)
+        for pos, order in enumerate(orders):
+            if not isinstance(order, (dict, Order)):
+                continue
+            method = str(order.get('printing_method', '')).strip()
+            key = delivery_sort_key(order)
+            self._all_positions.append(pos)
+            self._by_method[method].append(pos)
+            keyed.append((key, pos))
+            method_keyed[method].append((key, pos))
+
+        # 全部订单和各印刷方式内的订单按交货日期排序，日期范围查询用二分查找
+        self._dates = DateIndex(keyed)
+        self._method_dates = {method: DateIndex(pairs) for method, pairs in method_keyed.items()}
+
+        # 最近的查询结果（订单位置列表），翻页时不重复计算
+        self._cache = OrderedDict()
+        self._max_cached_queries = max_cached_queries
+
+    def matching_positions(self, printing_method=None, date_from=None, date_to=None):
+        """返回满足条件的订单位置（保持原列表顺序）"""
+        cache_key = (printing_method, date_from, date_to)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
+        if printing_method is not None:
+            if date_from is None and date_to is None:
+                result = self._by_method.get(printing_method, [])
+            else:
+                dates = self._method_dates.get(printing_method)
+                result = dates.positions(date_from, date_to) if dates is not None else []
+        elif date_from is not None or date_to is not None:
+            result = self._dates.positions(date_from, date_to)
+        else:
+            result = self._all_positions
+
+        self._cache[cache_key] = result
+        while len(self._cache) > self._max_cached_queries:
+            self._cache.popitem(last=False)
+        return result
+
+    def query(self, printing_method=None, date_from=None, date_to=None, limit=DEFAULT_LIMIT, cursor=0, fields=None):
+        """分页查询，返回 {items, total, next_cursor}"""
+        positions = self.matching_positions(printing_method, date_from, date_to)
+        page = positions[cursor:cursor + limit]
+        if fields:
+            items = [{f: self.orders[pos].get(f) for f in fields} for pos in page]
+        else:
+            items = [self.orders[pos] for pos in page]
+        end = cursor + len(page)
+        return {
+            "items": items,
+            "total": len(positions),
+            "next_cursor": str(end) if end < len(positions) else None
+        }
+
+def parse_query_args(args):
+    """从请求参数解析查询条件；没有任何查询参数时返回None（保持返回完整列表的旧行为）
+
+    date_from / date_to 接受与交货日期相同的写法（如 "6.9"、"6月9日"、"2025-06-09"），无法识别时报错；
+    只有一端带年份时另一端使用同一年份。cursor 为上一页返回的 next_cursor。
+    """
+    names = ('limit', 'cursor', 'printing_method', 'date_from', 'date_to', 'fields')
+    if not any(name in args for name in names):
+        return None
+
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+        cursor = int(args.get('cursor') or 0)
+    except ValueError:
+        raise ValueError("limit 和 cursor 必须是整数")
+    if limit < 1 or cursor < 0:
+        raise ValueError("limit 必须大于0，cursor 不能为负数")
+
+    query = {
+        "printing_method": args.get('printing_method') or None,
+        "date_from": None,
+        "date_to": None,
+        "limit": min(limit, MAX_LIMIT),
+        "cursor": cursor,
+        "fields": [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or None
+    }
+    for name in ('date_from', 'date_to'):
+        value = args.get(name)
+        if value:
+            query[name] = parse_delivery_date(value)
+            if query[name] == UNKNOWN_DATE_KEY:
+                raise ValueError(f"无法识别的日期 {name}={value}")
+
+    date_from, date_to = query["date_from"], query["date_to"]
+    if date_from is not None and date_to is not None:
+        if _has_year(date_from) and not _has_year(date_to):
+            date_to += date_from // YEAR_SCALE * YEAR_SCALE
+        elif _has_year(date_to) and not _has_year(date_from):
+            date_from += date_to // YEAR_SCALE * YEAR_SCALE
+        if date_from > date_to:
+            raise ValueError("date_from 不能晚于 date_to")
+        query["date_from"], query["date_to"] = date_from, date_to
+    return query
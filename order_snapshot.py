@@ -0,0 +1,213 @@
+"""订单的列式二进制快照：与 parsed_orders.json 一起写入，读取时用内存映射，不必解析整个JSON
+
+文件布局（整数均为本机字节序）：
+    每个字段依次为：去重后的字符串表（UTF-8，以 \0 分隔）| uint32 编码列（字符串表下标，订单数 个，按4字节对齐）
+    之后是描述各部分位置的JSON | JSON长度（uint32）| MAGIC
+
+每个字段单独去重，印刷方式、交货日期等重复值在文件和内存中都只有一份；
+编码列可以直接用 memoryview（或 numpy.frombuffer / numpy.memmap）映射，只读取和解码需要的列。
+JSON仍是交换格式和数据来源：快照记录写入时JSON文件的大小和修改时间，JSON被其它程序修改后快照不再使用。
+"""
+import gc
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from atomic_io import atomic_write
+from log_utils import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b'POSNAP1\n'
+SNAPSHOT_VERSION = 1
+FIELDS = ("order_id", "product_name", "printing_method", "delivery_date")
+# 上传的订单带有行标识（见 row_index.py），全部订单都有时才写入这一列
+OPTIONAL_FIELDS = ("row_key",)
+
+# 4字节无符号整数的类型码
+_CODE_TYPE = 'I' if array('I').itemsize == 4 else 'L'
+_FOOTER = struct.Struct('<I')
+
+def snapshot_path(json_path):
+    """与订单JSON文件对应的快照文件路径"""
+    return os.path.splitext(json_path)[0] + '.snapshot'
+
+def _file_state(file_path):
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def _pad(f, alignment=4):
+    remainder = f.tell() % alignment
+    if remainder:
+        f.write(b'\0' * (alignment - remainder))
+
+def write_snapshot(json_path, orders):
+    """在订单JSON文件写入后生成快照，返回快照路径
+
+    订单不全是只含标准字段（及相同的可选字段）、值为字符串（不含 \0）的字典时无法用快照表示，
+    删除旧快照并返回None，读取时使用JSON。
+    """
+    path = snapshot_path(json_path)
+    source = _file_state(json_path)
+    columns = []
+    first = orders[0] if orders and type(orders[0]) is dict else {}
+    fields = FIELDS + tuple(field for field in OPTIONAL_FIELDS if field in first)
+    representable = source is not None and all(
+        type(order) is dict and len(order) == len(fields) and all(type(order.get(field)) is str for field in fields)
+        for order in orders
+    )
+    if representable:
+        for field in fields:
+            # 按首次出现的顺序给不同的值编号
+            table = {}
+            codes = array(_CODE_TYPE, [table.setdefault(order[field], len(table)) for order in orders])
+            text = '\0'.join(table)
+            if text.count('\0') != max(len(table) - 1, 0):
+                representable = False
+                break
+            columns.append((field, len(table), text.encode('utf-8'), codes))
+    if not representable:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    layout = {
+        "version": SNAPSHOT_VERSION,
+        "byteorder": sys.byteorder,
+        "count": len(orders),
+        "source": source,
+        "columns": {}
+    }
+    with atomic_write(path, 'wb') as f:
+        for field, count, text, codes in columns:
+            column = {"strings": count, "text": f.tell(), "text_bytes": len(text)}
+            f.write(text)
+            _pad(f)
+            column["codes"] = f.tell()
+            codes.tofile(f)
+            layout["columns"][field] = column
+        header = json.dumps(layout).encode('utf-8')
+        f.write(header)
+        f.write(_FOOTER.pack(len(header)))
+        f.write(MAGIC)
+    return path
+
+class OrderSnapshot:
+    """以内存映射方式打开的订单快照；字符串表和各列在第一次使用时才读取"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            tail = len(MAGIC) + _FOOTER.size
+            if len(self._mmap) < tail or self._mmap[-len(MAGIC):] != MAGIC:
+                raise ValueError(f"不是订单快照文件: {path}")
+            (header_size,) = _FOOTER.unpack_from(self._mmap, len(self._mmap) - tail)
+            header_start = len(self._mmap) - tail - header_size
+            self.layout = json.loads(self._mmap[header_start:header_start + header_size])
+            if self.layout.get("version") != SNAPSHOT_VERSION or self.layout.get("byteorder") != sys.byteorder:
+                raise ValueError(f"快照版本或字节序不匹配: {path}")
+        except Exception:
+            self._mmap.close()
+            raise
+        self.count = self.layout["count"]
+        self.source = self.layout["source"]
+        # 快照中的全部字段，按写入顺序
+        self.fields = tuple(self.layout["columns"])
+        self._strings = {}
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._strings.clear()
+        self._mmap.close()
+
+    def _uint32(self, offset, count):
+        return memoryview(self._mmap)[offset:offset + count * 4].cast(_CODE_TYPE)
+
+    def codes(self, field):
+        """字段的编码列（字符串表下标），直接映射文件内容，不复制"""
+        return self._uint32(self.layout["columns"][field]["codes"], self.count)
+
+    def strings(self, field):
+        """字段去重后的字符串表，整体解码一次后拆分"""
+        strings = self._strings.get(field)
+        if strings is None:
+            info = self.layout["columns"][field]
+            start = info["text"]
+            strings = self._mmap[start:start + info["text_bytes"]].decode('utf-8').split('\0') if info["strings"] else []
+            if len(strings) != info["strings"]:
+                raise ValueError(f"快照字符串表已损坏: {self.path}")
+            self._strings[field] = strings
+        return strings
+
+    def column(self, field):
+        """字段的值列表；相同的值共用同一个字符串对象"""
+        return list(map(self.strings(field).__getitem__, self.codes(field).tolist()))
+
+    def orders(self, fields=None):
+        """组装为订单字典列表，只读取 fields 中的列（默认全部字段）"""
+        fields = self.fields if fields is None else fields
+        # 一次创建大量字典时暂停循环垃圾回收，避免分代回收反复扫描刚创建的对象
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            columns = [self.column(field) for field in fields]
+            if tuple(fields) == FIELDS:
+                return [
+                    {"order_id": order_id, "product_name": product_name, "printing_method": printing_method, "delivery_date": delivery_date}
+                    for order_id, product_name, printing_method, delivery_date in zip(*columns)
+                ]
+            return [dict(zip(fields, values)) for values in zip(*columns)]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+def load_snapshot_orders(json_path, fields=None):
+    """从订单JSON文件对应的快照读取订单（默认全部字段）；快照不存在、损坏、缺少字段或与JSON文件不一致时返回None"""
+    path = snapshot_path(json_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with OrderSnapshot(path) as snapshot:
+            if snapshot.source is None or snapshot.source != _file_state(json_path):
+                logger.info("订单快照与 %s 不一致，改为读取JSON", json_path)
+                return None
+            return snapshot.orders(fields)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("读取订单快照 %s 时出错: %s", path, e)
+        return None
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="印刷流程数字化系统 - 由订单JSON文件生成列式快照")
+    parser.add_argument('json_file', nargs='?', default='parsed_orders.json')
+    args = parser.parse_args(argv)
+
+    with open(args.json_file, 'r', encoding='utf-8') as f:
+        orders = json.load(f)
+    path = write_snapshot(args.json_file, orders)
+    if path is None:
+        print(f"{args.json_file} 中有非标准字段或非字符串的值，无法生成快照")
+        return 1
+    print(f"已生成快照 {path}，共 {len(orders)} 条订单，{os.path.getsize(path)} 字节")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# 直方图桶的上界（秒），与 Prometheus 客户端的默认桶相近
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 每个序列保留最近的样本数，用于计算 p50/p95/p99
+SAMPLE_SIZE = 1024
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class LatencySeries:
+    """一个路由或处理阶段的耗时统计：累计直方图 + 最近样本（用于分位数）"""
+
+    __slots__ = ('count', 'total', 'max', 'bytes', 'errors', 'buckets', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.errors = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, seconds, size=0, error=False):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.bytes += size
+        if error:
+            self.errors += 1
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.samples.append(seconds)
+
+    def quantiles(self):
+        """最近样本的分位数（秒）"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+    def to_dict(self, with_bytes=True):
+        quantiles = self.quantiles()
+        result = {
+            "count": self.count,
+            "p50_ms": round(quantiles[0.5] * 1000, 3),
+            "p95_ms": round(quantiles[0.95] * 1000, 3),
+            "p99_ms": round(quantiles[0.99] * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "total_ms": round(self.total * 1000, 3)
+        }
+        if with_bytes:
+            result["errors"] = self.errors
+            result["bytes_total"] = self.bytes
+            result["bytes_mean"] = round(self.bytes / self.count, 1) if self.count else 0.0
+        return result
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+
+class PerfRecorder:
+    """进程内的性能统计：按路由记录请求耗时、次数、响应大小，按阶段记录上传处理耗时
+
+    记录一次只做几次加法和一次二分查找；分位数在查询时才计算。
+    """
+
+    def __init__(self, prefix='print_order'):
+        self.prefix = prefix
+        self.started_at = time.time()
+        self._routes = {}
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record_request(self, method, route, seconds, size=0, status=200):
+        key = (method, route)
+        with self._lock:
+            series = self._routes.get(key)
+            if series is None:
+                series = self._routes[key] = LatencySeries()
+            series.add(seconds, size, status >= 500)
+
+    def record_stage(self, stage, seconds):
+        with self._lock:
+            series = self._stages.get(stage)
+            if series is None:
+                series = self._stages[stage] = LatencySeries()
+            series.add(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._stages.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """JSON格式的统计结果"""
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "routes": {f"{method} {route}": series.to_dict() for (method, route), series in sorted(self._routes.items())},
+                "upload_stages": {stage: series.to_dict(with_bytes=False) for stage, series in sorted(self._stages.items())}
+            }
+
+    def _histogram_lines(self, name, labels, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), series.buckets):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {series.total:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {series.count}')
+        return lines
+
+    def prometheus(self):
+        """Prometheus文本格式的统计结果"""
+        p = self.prefix
+        with self._lock:
+            routes = sorted(self._routes.items())
+            stages = sorted(self._stages.items())
+            lines = [
+                f"# HELP {p}_http_request_duration_seconds HTTP request latency by route.",
+                f"# TYPE {p}_http_request_duration_seconds histogram"
+            ]
+            for (method, route), series in routes:
+                lines.extend(self._histogram_lines(f"{p}_http_request_duration_seconds", _labels(method=method, route=route), series))
+
+            lines.append(f"# HELP {p}_http_request_latency_seconds Recent HTTP request latency quantiles by route.")
+            lines.append(f"# TYPE {p}_http_request_latency_seconds gauge")
+            for (method, route), series in routes:
+                for q, value in series.quantiles().items():
+                    lines.append(f'{p}_http_request_latency_seconds{{{_labels(method=method, route=route, quantile=q)}}} {value:.6f}')
+
+            lines.append(f"# HELP {p}_http_response_bytes_total Response payload bytes by route.")
+            lines.append(f"# TYPE {p}_http_response_bytes_total counter")
+            for (method, route), series in routes:
+                lines.append(f'{p}_http_response_bytes_total{{{_labels(method=method, route=route)}}} {series.bytes}')
+
+            lines.append(f"# HELP {p}_http_server_errors_total Responses with status >= 500 by route.")
+            lines.append(f"# TYPE {p}_http_server_errors_total counter")
+            for (method, route), series in routes:
+                lines.append(f'{p}_http_server_errors_total{{{_labels(method=method, route=route)}}} {series.errors}')
+
+            lines.append(f"# HELP {p}_upload_stage_duration_seconds Upload processing time by stage.")
+            lines.append(f"# TYPE {p}_upload_stage_duration_seconds histogram")
+            for stage, series in stages:
+                lines.extend(self._histogram_lines(f"{p}_upload_stage_duration_seconds", _labels(stage=stage), series))
+        return "\n".join(lines) + "\n"
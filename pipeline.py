@@ -0,0 +1,223 @@
+"""订单数据处理流水线：解析Excel、修复订单、换版优化、生成指标，在一个进程内完成
+
+用法: python pipeline.py [--workbook 内文印刷明细总表.xlsx] [--orders parsed_orders.json]
+                         [--metrics metrics.json] [--cache-dir .pipeline_cache] [--force]
+
+取代依次运行 read_excel.py、fix_json.py、changeover_optimization.py 三个进程：各阶段的结果在内存中
+直接传给下一阶段，并按输入内容、代码和配置的哈希缓存；工作簿、代码和配置都未变化时跳过所有阶段，
+只检查输出文件是否需要重新写入。
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from atomic_io import write_json_atomic
+from log_utils import get_logger, configure_logging
+from order_snapshot import write_snapshot
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 缓存格式或阶段划分变化时加一，使所有旧缓存失效
+PIPELINE_VERSION = 3
+
+# 各阶段依赖的代码文件和配置文件，内容变化时该阶段及之后的阶段重新运行
+STAGES = (
+    ("parse", ("order_parser.py", "row_index.py"), ()),
+    ("repair", ("fix_json.py", "order_model.py"), ()),
+    ("optimize", ("changeover_optimization.py", "changeover_cost.py", "order_model.py", "scheduler.py"), ("changeover_costs.json",)),
+    ("metrics", ("changeover_optimization.py",), ()),
+)
+
+def _parse(workbook_path, _):
+    # 产品序号在明细表中分段重新编号，与上传接口一样给重复的序号加 #2、#3 后缀（并以产品序号 + 产品名称作为行标识），
+    # 修复阶段不会把它们当作重复订单丢弃
+    from order_parser import parse_numbered_orders_from_workbook
+    from row_index import assign_order_keys
+    return assign_order_keys(parse_numbered_orders_from_workbook(workbook_path))
+
+def _repair(_, orders):
+    from fix_json import repair_orders
+    repaired, report = repair_orders(orders)
+    return {"orders": repaired, "report": report}
+
+def _optimize(_, repaired):
+    from changeover_optimization import optimize_changeovers
+    return optimize_changeovers(repaired["orders"])
+
+def _metrics(_, optimization_result):
+    from changeover_optimization import build_metrics
+    return build_metrics(optimization_result)
+
+STAGE_FUNCS = {"parse": _parse, "repair": _repair, "optimize": _optimize, "metrics": _metrics}
+
+class FileDigests:
+    """文件内容哈希，按 (大小, 修改时间) 缓存，文件未变化时不重新读取"""
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+        self.changed = False
+
+    def digest(self, file_path):
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return "missing"
+        cached = self.known.get(file_path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        self.known[file_path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        self.changed = True
+        return digest.hexdigest()
+
+def _file_state(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+class Pipeline:
+    """按阶段运行并缓存处理结果
+
+    每个阶段的缓存键由上一阶段的缓存键（第一阶段为工作簿内容哈希）、该阶段的代码和配置文件哈希组成；
+    阶段是确定性的，缓存键相同即结果相同，因此全部命中时不需要读取任何缓存结果。
+    """
+
+    def __init__(self, workbook, orders_file, metrics_file, cache_dir):
+        self.workbook = os.path.abspath(workbook)
+        self.outputs = {"repair": os.path.abspath(orders_file), "metrics": os.path.abspath(metrics_file)}
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == PIPELINE_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"version": PIPELINE_VERSION, "files": {}, "stages": {}, "outputs": {}}
+
+    def _blob_path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key[:16]}.json")
+
+    def _load_blob(self, stage, key):
+        with open(self._blob_path(stage, key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _stage_key(self, files, name, upstream, code_files, config_files):
+        parts = [PIPELINE_VERSION, name, upstream]
+        parts.extend(files.digest(os.path.join(BASE_DIR, path)) for path in code_files + config_files)
+        return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+    def run(self, force=False):
+        """运行流水线，返回各阶段的状态（ran / cached）和耗时"""
+        if not os.path.exists(self.workbook):
+            raise FileNotFoundError(f"Excel文件不存在: {self.workbook}")
+
+        start = time.perf_counter()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        manifest = self._load_manifest()
+        files = FileDigests(manifest["files"])
+
+        results = {}
+        keys = {}
+        report = {"stages": []}
+        upstream = files.digest(self.workbook)
+        previous = None
+        for name, code_files, config_files in STAGES:
+            stage_start = time.perf_counter()
+            key = self._stage_key(files, name, upstream, code_files, config_files)
+            entry = manifest["stages"].get(name)
+            if not force and entry is not None and entry["key"] == key and os.path.exists(self._blob_path(name, key)):
+                status = "cached"
+            else:
+                # 上一阶段命中缓存时才读取它的结果
+                inputs = None
+                if previous is not None:
+                    if previous not in results:
+                        results[previous] = self._load_blob(previous, keys[previous])
+                    inputs = results[previous]
+                results[name] = STAGE_FUNCS[name](self.workbook, inputs)
+                write_json_atomic(self._blob_path(name, key), results[name], indent=None)
+                if entry is not None and entry["key"] != key:
+                    try:
+                        os.remove(self._blob_path(name, entry["key"]))
+                    except OSError:
+                        pass
+                manifest["stages"][name] = {"key": key}
+                status = "ran"
+            keys[name] = upstream = key
+            previous = name
+            report["stages"].append({"name": name, "status": status,
+                                     "elapsed_ms": round((time.perf_counter() - stage_start) * 1000, 3)})
+
+        # 输出文件与上次写入时一致（大小和修改时间未变）时不重新写入
+        report["written"] = []
+        for stage, file_path in self.outputs.items():
+            recorded = manifest["outputs"].get(file_path)
+            if not force and recorded is not None and recorded["key"] == keys[stage] and recorded["state"] == _file_state(file_path):
+                continue
+            data = results.get(stage)
+            if data is None:
+                data = results[stage] = self._load_blob(stage, keys[stage])
+            if stage == "repair":
+                write_json_atomic(file_path, data["orders"])
+                write_snapshot(file_path, data["orders"])
+            else:
+                write_json_atomic(file_path, data)
+            manifest["outputs"][file_path] = {"key": keys[stage], "state": _file_state(file_path)}
+            report["written"].append(file_path)
+
+        # 全部命中缓存且没有文件需要重新计算哈希时，清单不变，不必写入
+        if files.changed or report["written"] or any(s["status"] == "ran" for s in report["stages"]):
+            manifest["files"] = files.known
+            write_json_atomic(self.manifest_path, manifest, indent=None)
+
+        if "repair" in results:
+            report["repair"] = results["repair"]["report"]
+        if "metrics" in results:
+            report["metrics"] = results["metrics"]
+        report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="印刷流程数字化系统 - 订单数据处理流水线")
+    parser.add_argument('--workbook', default=os.path.join(BASE_DIR, '内文印刷明细总表.xlsx'))
+    parser.add_argument('--orders', default=os.path.join(BASE_DIR, 'parsed_orders.json'))
+    parser.add_argument('--metrics', default=os.path.join(BASE_DIR, 'metrics.json'))
+    parser.add_argument('--cache-dir', default=os.path.join(BASE_DIR, '.pipeline_cache'))
+    parser.add_argument('--force', action='store_true', help="忽略缓存，重新运行所有阶段")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    try:
+        report = Pipeline(args.workbook, args.orders, args.metrics, args.cache_dir).run(force=args.force)
+    except Exception:
+        logger.exception("流水线运行失败")
+        return 1
+
+    for stage in report["stages"]:
+        print(f"- {stage['name']:<8} {'已运行' if stage['status'] == 'ran' else '缓存命中'} {stage['elapsed_ms']:.1f} ms")
+    for file_path in report["written"]:
+        print(f"已写入 {file_path}")
+    if "metrics" in report:
+        metrics = report["metrics"]
+        print(f"换版次数: {metrics['changeover_before']} -> {metrics['changeover_after']}，"
+              f"换版成本: {metrics['changeover_cost_before']} -> {metrics['changeover_cost_after']}")
+    print(f"总耗时 {report['elapsed_ms']:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""行内容哈希索引：重新上传明细表时只处理新增、修改和删除的行
+
+每条订单以稳定的行标识（row_key 字段）为键，记录该行内容的哈希。明细表中的产品序号按分段重新编号，单独不能区分订单，
+行标识取产品序号 + 产品名称的哈希：插入或删除其它行时不变，修改印刷方式或交货日期时也不变。
+订单编号仍为看板上显示的产品序号，重复的序号依次加 #2、#3 后缀。
+索引与订单数据一起保存，下次上传时逐行比较哈希即可得到变化的行，修复、排产序列更新和数据库写入都只针对这些行。
+"""
+import hashlib
+import json
+
+from atomic_io import write_json_atomic
+
+# 索引格式变化时加一，旧索引失效后按完整导入处理
+INDEX_VERSION = 2
+
+# 参与行内容哈希的字段
+ROW_FIELDS = ('product_name', 'printing_method', 'delivery_date')
+
+_FIELD_SEP = '\x1f'
+
+def row_key(order):
+    """由产品序号（解析时放在 order_id 中，可以为空）和产品名称得到的行标识（16位十六进制）"""
+    identity = _FIELD_SEP.join((str(order.get('order_id') or '').strip(), ' '.join(str(order.get('product_name') or '').split())))
+    return hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()
+
+def assign_row_keys(orders):
+    """为订单加上行标识 row_key，订单编号中须为产品序号；序号和名称都相同的行依次加 #2、#3 后缀"""
+    counts = {}
+    for order in orders:
+        key = row_key(order)
+        seen = counts.get(key, 0) + 1
+        counts[key] = seen
+        order['row_key'] = key if seen == 1 else f"{key}#{seen}"
+    return orders
+
+def number_order_ids(orders):
+    """订单编号保持为产品序号，重复的序号依次加 #2、#3 后缀；没有序号的行编号为 #1、#2……"""
+    counts = {}
+    for order in orders:
+        serial = order['order_id']
+        seen = counts.get(serial, 0) + 1
+        counts[serial] = seen
+        if seen > 1 or not serial:
+            order['order_id'] = f"{serial}#{seen}"
+    return orders
+
+def assign_order_keys(orders):
+    """为按产品序号解析的订单加上行标识，并使订单编号不重复"""
+    return number_order_ids(assign_row_keys(orders))
+
+def row_hash(order):
+    """订单一行内容的哈希（16位十六进制）"""
+    payload = _FIELD_SEP.join(str(order.get(field) or '') for field in ROW_FIELDS)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+class RowIndex:
+    """行标识 -> 行内容哈希，按工作簿中的行顺序保存
+
+    source 为建立索引时订单存储的版本（文件的修改时间和大小，或数据库版本号），
+    订单被其它途径（新增订单接口、批量导入、流水线）修改后版本不再一致，索引随之失效；
+    workbook 为上传文件的内容哈希，再次上传完全相同的文件时不必解析。
+    """
+
+    def __init__(self, hashes=None, source=None, workbook=None):
+        self.hashes = dict(hashes or {})
+        self.source = source
+        self.workbook = workbook
+
+    @classmethod
+    def from_orders(cls, orders, source=None, workbook=None):
+        return cls({order['row_key']: row_hash(order) for order in orders}, source, workbook)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def matches(self, source):
+        """索引是否对应订单存储的当前版本"""
+        return self.source is not None and source is not None and list(self.source) == list(source)
+
+    def diff(self, other):
+        """与新的索引比较，返回 (新增行标识, 修改行标识, 删除行标识)；新增和修改按新索引的行顺序"""
+        old = self.hashes
+        added = []
+        changed = []
+        for key, digest in other.hashes.items():
+            previous = old.get(key)
+            if previous is None:
+                added.append(key)
+            elif previous != digest:
+                changed.append(key)
+        new = other.hashes
+        removed = [key for key in old if key not in new]
+        return added, changed, removed
+
+    @classmethod
+    def load(cls, file_path):
+        """读取保存的索引，文件不存在、损坏或格式版本不同时返回None"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return None
+        return cls(data.get("rows"), data.get("source"), data.get("workbook"))
+
+    def save(self, file_path):
+        write_json_atomic(file_path, {"version": INDEX_VERSION, "source": self.source, "workbook": self.workbook,
+                                      "rows": self.hashes}, indent=None)
+
+def file_digest(stream):
+    """文件对象全部内容的哈希，读取后回到开头"""
+    digest = hashlib.blake2b(digest_size=16)
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
@@ -7,19 +7,11 @@ echo "========================================"
 
 # 安装依赖
 echo "安装依赖..."
-pip install flask flask-cors pandas openpyxl pytest pytest-cov
+pip install flask flask-cors pandas openpyxl gunicorn pytest pytest-cov
 
-# 运行数据处理
+# 解析Excel、修复订单、换版优化、生成指标（一个进程内完成，输入未变化时直接使用缓存结果）
 echo "处理订单数据..."
-python read_excel.py
-
-# 修复JSON格式问题
-echo "修复JSON格式..."
-python fix_json.py
-
-# 运行换版优化
-echo "执行换版优化..."
-python changeover_optimization.py
+python pipeline.py
 
 # 运行单元测试并生成覆盖率报告
 echo "运行单元测试..."
@@ -27,10 +19,8 @@ python -m pytest test_optimization.py --cov=changeover_optimization --cov-report
 
 # 启动后端服务
 echo "启动后端服务..."
-cd backend
-python app.py &
+python backend/serve.py &
 SERVER_PID=$!
-cd ..
 
 # 等待服务启动
 echo "等待服务启动..."
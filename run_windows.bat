@@ -4,24 +4,16 @@ echo 印刷流程数字化系统 - 启动脚本
 echo ========================================
 
 echo 安装依赖...
-pip install flask flask-cors pandas openpyxl pytest pytest-cov
+pip install flask flask-cors pandas openpyxl waitress pytest pytest-cov
 
 echo 处理订单数据...
-python read_excel.py
-
-echo 修复JSON格式...
-python fix_json.py
-
-echo 执行换版优化...
-python changeover_optimization.py
+python pipeline.py
 
 echo 运行单元测试...
 python -m pytest test_optimization.py --cov=changeover_optimization --cov-report=xml
 
 echo 启动后端服务...
-cd backend
-start python app.py
-cd ..
+start python backend\serve.py
 
 echo ========================================
 echo 系统启动完成!
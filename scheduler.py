@@ -0,0 +1,210 @@
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from order_model import Order, delivery_sort_key
+
+# 幅面等级，数值越大幅面越大；大幅面机器可以印刷小幅面的活件
+SIZE_RANKS = {
+    '大全开': 4,
+    '小全开': 3,
+    '小开全': 3,
+    '全开': 3,
+    '对开': 2,
+    '四开': 1
+}
+
+# 按长度优先匹配，避免"全开"先于"小全开"匹配
+_SIZE_TOKENS = sorted(SIZE_RANKS, key=len, reverse=True)
+
+# 设备类型中没有幅面信息时，按最大纸张长度推断幅面等级
+LENGTH_RANKS = ((1040, 3), (740, 2), (0, 1))
+
+# 订单没有印张数时使用的默认值
+DEFAULT_SHEETS_PER_ORDER = 5000
+
+# 每次换版（切换印刷方式）的准备时间，单位分钟
+CHANGEOVER_MINUTES = 30
+
+def size_rank(text):
+    """从印刷方式或设备类型中提取幅面等级，无法识别时返回None"""
+    for token in _SIZE_TOKENS:
+        if token in text:
+            return SIZE_RANKS[token]
+    return None
+
+def method_requirements(printing_method):
+    """解析印刷方式对设备的要求：幅面等级、色组数、是否专色、是否轮转"""
+    ranks = []
+    color_units = 1
+    for part in printing_method.split('+'):
+        rank = size_rank(part)
+        if rank is not None:
+            ranks.append(rank)
+        if '彩' in part:
+            color_units = max(color_units, 4)
+        elif '双色' in part:
+            color_units = max(color_units, 2)
+
+    return {
+        'size_rank': max(ranks) if ranks else None,
+        'color_units': color_units,
+        'spot_color': '专色' in printing_method,
+        'web': '轮转' in printing_method
+    }
+
+def machine_capabilities(device):
+    """解析设备能力：幅面等级、色组数、是否支持专色、是否轮转、速度"""
+    machine_type = str(device.get('type', ''))
+    rank = size_rank(machine_type)
+    if rank is None:
+        length = device.get('max_length_mm') or 0
+        rank = next(r for min_length, r in LENGTH_RANKS if length >= min_length)
+
+    return {
+        'size_rank': rank,
+        'color_units': int(device.get('color_units') or 0),
+        'spot_color': bool(device.get('supports_spot_color')),
+        'web': '轮转' in machine_type,
+        'speed': float(device.get('speed_sheets_per_hour') or 0)
+    }
+
+def is_compatible(requirements, capabilities):
+    """判断设备是否能够印刷该印刷方式"""
+    if capabilities['speed'] <= 0:
+        return False
+    if requirements['size_rank'] is not None and requirements['size_rank'] > capabilities['size_rank']:
+        return False
+    if requirements['color_units'] > capabilities['color_units']:
+        return False
+    if requirements['spot_color'] and not capabilities['spot_color']:
+        return False
+    return requirements['web'] == capabilities['web']
+
+def order_sheets(order):
+    """返回订单的印张数，缺失或无法解析时使用默认值"""
+    try:
+        sheets = float(order.get('sheets'))
+        if sheets > 0:
+            return sheets
+    except (TypeError, ValueError):
+        pass
+    return DEFAULT_SHEETS_PER_ORDER
+
+def _build_batches(orders):
+    """按印刷方式将订单合并为批次，批次内按交货日期排序"""
+    groups = defaultdict(list)
+    for order in orders:
+        if isinstance(order, (dict, Order)):
+            groups[str(order.get('printing_method', '')).strip()].append(order)
+
+    batches = []
+    for method, method_orders in groups.items():
+        method_orders.sort(key=delivery_sort_key)
+        batches.append({
+            'printing_method': method,
+            'orders': method_orders,
+            'sheets': sum(order_sheets(order) for order in method_orders),
+            'due_key': delivery_sort_key(method_orders[0])
+        })
+    return batches
+
+def schedule_orders(orders, devices, start_time=None, changeover_minutes=CHANGEOVER_MINUTES):
+    """将印刷方式批次分配到兼容的机台，最小化所有机台的完工时间
+
+    采用最长加工时间优先（LPT）的列表调度：批次按印张数从大到小依次分配，
+    能力相同的机台放在同一个最小堆中，每个批次只需比较各类机台的堆顶。
+    """
+    start_time = start_time or datetime.now().replace(second=0, microsecond=0)
+    machines = [d for d in (devices or []) if isinstance(d, dict)]
+    capabilities = [machine_capabilities(d) for d in machines]
+
+    # 能力完全相同的机台共用一个按可用时间排序的堆
+    profiles = defaultdict(list)
+    for idx, cap in enumerate(capabilities):
+        key = (cap['size_rank'], cap['color_units'], cap['spot_color'], cap['web'], cap['speed'])
+        profiles[key].append((0.0, idx))
+    for heap in profiles.values():
+        heapq.heapify(heap)
+
+    assigned = defaultdict(list)
+    unscheduled = []
+    compatible_cache = {}
+
+    batches = _build_batches(orders)
+    batches.sort(key=lambda b: b['sheets'], reverse=True)
+
+    for batch in batches:
+        method = batch['printing_method']
+        if method not in compatible_cache:
+            requirements = method_requirements(method)
+            compatible_cache[method] = [
+                key for key in profiles
+                if is_compatible(requirements, capabilities[profiles[key][0][1]])
+            ]
+
+        best = None
+        for key in compatible_cache[method]:
+            available, idx = profiles[key][0]
+            finish = available + changeover_minutes + batch['sheets'] / key[4] * 60
+            if best is None or finish < best[0]:
+                best = (finish, key)
+
+        if best is None:
+            unscheduled.append({
+                'printing_method': method,
+                'order_ids': [o.get('order_id') for o in batch['orders']],
+                'reason': '没有兼容的机台'
+            })
+            continue
+
+        finish, key = best
+        _, idx = heapq.heappop(profiles[key])
+        heapq.heappush(profiles[key], (finish, idx))
+        assigned[idx].append(batch)
+
+    # 分配完成后，每台机器上的批次按最早交货日期排列（不影响完工时间）
+    machine_plans = []
+    makespan = 0.0
+    for idx, device in enumerate(machines):
+        speed = capabilities[idx]['speed']
+        clock = 0.0
+        jobs = []
+        for batch in sorted(assigned.get(idx, []), key=lambda b: b['due_key']):
+            job_start = clock
+            clock += changeover_minutes
+            job_orders = []
+            for order in batch['orders']:
+                order_start = clock
+                clock += order_sheets(order) / speed * 60
+                job_orders.append({
+                    'order_id': order.get('order_id'),
+                    'product_name': order.get('product_name'),
+                    'delivery_date': order.get('delivery_date'),
+                    'start_minute': round(order_start, 1),
+                    'end_minute': round(clock, 1)
+                })
+            jobs.append({
+                'printing_method': batch['printing_method'],
+                'setup_minutes': changeover_minutes,
+                'start_minute': round(job_start, 1),
+                'end_minute': round(clock, 1),
+                'start': (start_time + timedelta(minutes=job_start)).isoformat(),
+                'end': (start_time + timedelta(minutes=clock)).isoformat(),
+                'orders': job_orders
+            })
+        makespan = max(makespan, clock)
+        machine_plans.append({
+            'machine': device.get('machine'),
+            'model': device.get('model'),
+            'busy_minutes': round(clock, 1),
+            'jobs': jobs
+        })
+
+    return {
+        'start_time': start_time.isoformat(),
+        'makespan_minutes': round(makespan, 1),
+        'end_time': (start_time + timedelta(minutes=makespan)).isoformat(),
+        'machines': machine_plans,
+        'unscheduled': unscheduled
+    }
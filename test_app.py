@@ -0,0 +1,475 @@
+import unittest
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+import app as backend_app
+import changeover_optimization
+from order_db import OrderDatabase
+from order_query import parse_query_args
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class TestBackendApp(unittest.TestCase):
+    def setUp(self):
+        # 使用临时数据文件，避免修改仓库中的数据
+        self.tmp_dir = tempfile.mkdtemp()
+        self.orig_paths = (backend_app.ORDERS_FILE, backend_app.METRICS_FILE)
+        backend_app.ORDERS_FILE = os.path.join(self.tmp_dir, 'parsed_orders.json')
+        backend_app.METRICS_FILE = os.path.join(self.tmp_dir, 'metrics.json')
+        shutil.copy(os.path.join(BASE_DIR, 'parsed_orders.json'), backend_app.ORDERS_FILE)
+        backend_app.data_store.invalidate()
+        self.client = backend_app.app.test_client()
+
+    def tearDown(self):
+        backend_app.ORDERS_FILE, backend_app.METRICS_FILE = self.orig_paths
+        backend_app.data_store.invalidate()
+        shutil.rmtree(self.tmp_dir)
+
+    def upload(self, file_name='uploaded_file.xlsx'):
+        """上传文件并等待后台任务完成，返回任务状态"""
+        with open(os.path.join(BASE_DIR, file_name), 'rb') as f:
+            response = self.client.post('/api/upload_excel', data={'file': (f, os.path.basename(file_name))})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+        backend_app.upload_jobs.wait(job_id, timeout=60)
+        return self.client.get(f'/api/jobs/{job_id}').get_json()
+
+    def test_upload_excel_repairs_in_process(self):
+        """测试上传后在后台修复订单，任务状态中返回修复报告和各阶段耗时"""
+        job = self.upload()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual([s["name"] for s in job["stages"]], ["parse", "fix", "write", "optimize", "metrics"])
+        self.assertTrue(all(s["status"] == "done" and s["elapsed_ms"] >= 0 for s in job["stages"]))
+        body = job["result"]
+        self.assertIn("elapsed_ms", body["repair"])
+        self.assertEqual(body["repair"]["dropped_header"], 1)
+
+        with open(backend_app.ORDERS_FILE, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.assertEqual(len(saved), body["orders_count"])
+        self.assertNotIn("产品名称", [o["product_name"] for o in saved])
+
+    def test_orders_cached_until_upload(self):
+        """测试订单数据在上传前命中缓存，上传后重新加载"""
+        first = self.client.get('/api/orders').get_json()
+        hits = backend_app.data_store.hits
+        self.client.get('/api/orders')
+        self.assertEqual(backend_app.data_store.hits, hits + 1)
+
+        self.upload()
+        second = self.client.get('/api/orders').get_json()
+        self.assertEqual(len(second), len(first) - 1)
+
+    def test_add_orders_incrementally(self):
+        """测试增量插入订单：插入到所属分组的交货日期位置，并更新指标"""
+        before = self.client.get('/api/optimized_orders').get_json()
+        response = self.client.post('/api/orders', json={"orders": [
+            {"product_name": "新产品B", "printing_method": "全新印刷方式", "delivery_date": "6.5"},
+            {"product_name": "新产品A", "printing_method": "对开双黑", "delivery_date": "6.1"}
+        ]})
+        self.assertEqual(response.status_code, 201)
+        body = response.get_json()
+        self.assertEqual(len(body["inserted"]), 2)
+        self.assertEqual(body["metrics"]["changeover_before"], len(before) + 2)
+
+        optimized = self.client.get('/api/optimized_orders').get_json()
+        self.assertEqual(len(optimized), len(before) + 2)
+        position = body["inserted"][1]["position"]
+        self.assertEqual(optimized[position]["product_name"], "新产品A")
+        self.assertEqual(optimized[position + 1]["printing_method"], "对开双黑")
+
+        # 重复编号的订单被跳过
+        duplicate = dict(optimized[0])
+        response = self.client.post('/api/orders', json=duplicate)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["skipped_duplicate"], [duplicate["order_id"]])
+
+    def test_add_orders_save_failure(self):
+        """测试保存新增订单失败时排产序列索引不保留未保存的订单，重试后正常插入"""
+        before = self.client.get('/api/optimized_orders').get_json()
+        order = {"order_id": "retry-1", "product_name": "重试订单", "printing_method": "对开双彩", "delivery_date": "6.12"}
+        with mock.patch.object(backend_app, 'save_orders_data', side_effect=OSError("磁盘已满")):
+            self.assertEqual(self.client.post('/api/orders', json=order).status_code, 500)
+        self.assertEqual(self.client.get('/api/optimized_orders').get_json(), before)
+
+        response = self.client.post('/api/orders', json=order)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([o["order_id"] for o in response.get_json()["inserted"]], ["retry-1"])
+        optimized = self.client.get('/api/optimized_orders').get_json()
+        self.assertEqual(len(optimized), len(before) + 1)
+        self.assertEqual(response.get_json()["metrics"]["changeover_before"], len(before) + 1)
+
+    def test_orders_from_sqlite_store(self):
+        """测试启用SQLite存储后订单读写走数据库，增量插入只写入新订单"""
+        db_path = os.path.join(self.tmp_dir, 'orders.db')
+        db = OrderDatabase(db_path)
+        db.import_json(backend_app.ORDERS_FILE)
+        orig = (backend_app.ORDERS_DB, backend_app.order_db)
+        backend_app.ORDERS_DB, backend_app.order_db = db_path, db
+        try:
+            count = len(self.client.get('/api/orders').get_json())
+            self.assertEqual(count, db.count())
+
+            # 从存储读取的版本只哈希一次，之后的增量插入不再重新哈希全部订单
+            self.client.get('/api/optimized_orders')
+            with mock.patch('changeover_optimization.orders_digest', wraps=changeover_optimization.orders_digest) as digest:
+                for name in ("数据库订单", "数据库订单2"):
+                    response = self.client.post('/api/orders', json={"product_name": name, "printing_method": "对开双彩", "delivery_date": "6.1"})
+                    self.assertEqual(response.status_code, 201)
+                optimized = self.client.get('/api/optimized_orders').get_json()
+            digest.assert_not_called()
+            self.assertEqual(db.count(), count + 2)
+            self.assertEqual(len(self.client.get('/api/orders').get_json()), count + 2)
+            self.assertEqual(len(optimized), count + 2)
+            self.assertIn("数据库订单2", [o["product_name"] for o in optimized])
+
+            # 过滤和分页在数据库中查询，不读取全部订单；结果与内存中的查询索引相同
+            url = '/api/orders?printing_method=对开双彩&date_from=6.10&limit=5&cursor=5'
+            expected = backend_app.orders_payload('orders', backend_app.load_orders_data(), parse_query_args({
+                "printing_method": "对开双彩", "date_from": "6.10", "limit": "5", "cursor": "5"}))
+            with mock.patch.object(backend_app, 'load_orders_data') as load_all:
+                response = self.client.get(url)
+                self.assertEqual(response.get_json(), expected)
+                self.assertEqual(self.client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code, 304)
+            load_all.assert_not_called()
+        finally:
+            backend_app.ORDERS_DB, backend_app.order_db = orig
+            db.close()
+
+    def test_schedule(self):
+        """测试多机台排产接口"""
+        response = self.client.get('/api/schedule?start=2025-06-01T08:00:00')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["start_time"], "2025-06-01T08:00:00")
+        self.assertEqual(len(body["machines"]), 3)
+        self.assertGreater(body["makespan_minutes"], 0)
+
+        self.assertEqual(self.client.get('/api/schedule?start=bad').status_code, 400)
+
+    def test_concurrent_uploads(self):
+        """测试并发上传依次写入，订单文件始终是完整的JSON"""
+        job_ids = []
+        for _ in range(3):
+            with open(os.path.join(BASE_DIR, 'uploaded_file.xlsx'), 'rb') as f:
+                response = self.client.post('/api/upload_excel', data={'file': (f, 'uploaded_file.xlsx')})
+            self.assertEqual(response.status_code, 202)
+            job_ids.append(response.get_json()["job_id"])
+        for job_id in job_ids:
+            self.assertEqual(backend_app.upload_jobs.wait(job_id, timeout=60).status, "succeeded")
+
+        with open(backend_app.ORDERS_FILE, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.assertEqual(len(saved), backend_app.upload_jobs.get(job_ids[-1]).result["orders_count"])
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['metrics.json', 'parsed_orders.json', 'parsed_orders.lock', 'parsed_orders.rows.json', 'parsed_orders.snapshot'])
+
+    def edited_workbook(self, insert_row=None):
+        """复制上传用的工作簿：修改一行的交货日期，删除一行，追加（或在 insert_row 行插入）一条订单"""
+        from openpyxl import load_workbook
+        workbook = load_workbook(os.path.join(BASE_DIR, 'uploaded_file.xlsx'))
+        sheet = workbook.worksheets[0]
+        for row in range(sheet.max_row, 0, -1):
+            name = sheet.cell(row, 2).value
+            if name == "写字本橙色2305":
+                sheet.cell(row, 16).value = "7.30"
+            elif name == "妙趣典故（全2册）2309":
+                sheet.delete_rows(row)
+        values = [999, "新增产品", None, None, None, "对开双彩"] + [None] * 9 + ["6.20"]
+        if insert_row is None:
+            sheet.append(values)
+        else:
+            sheet.insert_rows(insert_row)
+            for column, value in enumerate(values, start=1):
+                sheet.cell(insert_row, column).value = value
+        file_name = os.path.join(self.tmp_dir, 'edited.xlsx')
+        workbook.save(file_name)
+        return file_name
+
+    def test_reupload_applies_row_changes(self):
+        """测试重新上传时按行内容哈希只应用新增、修改和删除的行，结果与完整导入一致"""
+        first = self.upload()
+        self.assertEqual(first["result"]["changes"]["mode"], "full")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'parsed_orders.rows.json')))
+
+        # 同一个文件再次上传时不解析也不写入；内容相同的另一个文件逐行比较后也不写入
+        unchanged = self.upload()
+        self.assertEqual(unchanged["result"]["changes"]["counts"], {"added": 0, "changed": 0, "removed": 0})
+        self.assertEqual(unchanged["stages"], [])
+        from openpyxl import load_workbook
+        copy_path = os.path.join(self.tmp_dir, 'copy.xlsx')
+        load_workbook(os.path.join(BASE_DIR, 'uploaded_file.xlsx')).save(copy_path)
+        unchanged = self.upload(copy_path)
+        self.assertEqual(unchanged["result"]["changes"]["counts"], {"added": 0, "changed": 0, "removed": 0})
+        self.assertEqual([s["name"] for s in unchanged["stages"]], ["parse", "diff", "fix"])
+
+        # 增量应用和之后读取优化结果都不重新哈希全部订单
+        with mock.patch('changeover_optimization.orders_digest', wraps=changeover_optimization.orders_digest) as digest:
+            edited = self.upload(self.edited_workbook())
+            optimized = self.client.get('/api/optimized_orders').get_json()
+        digest.assert_not_called()
+        changes = edited["result"]["changes"]
+        self.assertEqual(changes["mode"], "incremental")
+        # 删除的行之后相同序号的行编号后缀前移，与修改的行一起重新写入
+        renumbered = changes["counts"]["changed"] - 1
+        self.assertEqual(changes["counts"], {"added": 1, "changed": 1 + renumbered, "removed": 1})
+        self.assertEqual(edited["result"]["repair"]["input_count"], 2 + renumbered)
+        orders = self.client.get('/api/orders').get_json()
+        by_id = {o["order_id"]: o for o in orders}
+        self.assertEqual(by_id[changes["added"][0]]["product_name"], "新增产品")
+        self.assertEqual(by_id[changes["added"][0]]["order_id"], "999")
+        self.assertEqual(by_id[changes["changed"][0]]["delivery_date"], "7.30")
+        self.assertNotIn("妙趣典故（全2册）2309", [by_id[order_id]["product_name"] for order_id in changes["changed"]])
+        self.assertNotIn("妙趣典故（全2册）2309", [o["product_name"] for o in orders])
+        self.assertEqual(sorted(o["order_id"] for o in optimized), sorted(by_id))
+
+        # 删除行索引后完整导入同一个工作簿，订单和指标相同
+        os.remove(os.path.join(self.tmp_dir, 'parsed_orders.rows.json'))
+        full = self.upload(self.edited_workbook())
+        self.assertEqual(full["result"]["changes"]["mode"], "full")
+        self.assertEqual(self.client.get('/api/orders').get_json(), orders)
+        for key in ("changeover_before", "changeover_after", "changeover_cost_before"):
+            self.assertEqual(full["result"]["metrics"][key], edited["result"]["metrics"][key])
+
+    def test_upload_keeps_serial_order_ids(self):
+        """测试上传后看板显示的订单编号为工作簿第一列的产品序号，重复的序号加 #2、#3 后缀，行标识单独保存"""
+        from openpyxl import load_workbook
+        sheet = load_workbook(os.path.join(BASE_DIR, 'uploaded_file.xlsx'), read_only=True).worksheets[0]
+        serials = {}
+        expected = []
+        for row in sheet.iter_rows(min_row=3, values_only=True):
+            if isinstance(row[0], (int, float)) and row[1]:
+                serial = str(int(row[0]))
+                serials[serial] = serials.get(serial, 0) + 1
+                expected.append(serial if serials[serial] == 1 else f"{serial}#{serials[serial]}")
+        self.upload()
+        orders = self.client.get('/api/orders').get_json()
+        self.assertEqual([o["order_id"] for o in orders], expected)
+        self.assertEqual(len({o["row_key"] for o in orders}), len(orders))
+
+    def test_reupload_keeps_order_in_sqlite_store(self):
+        """测试使用SQLite存储时增量应用的行按工作簿顺序保存，重新打开数据库读出的顺序与内存中相同"""
+        db_path = os.path.join(self.tmp_dir, 'orders.db')
+        db = OrderDatabase(db_path)
+        orig = (backend_app.ORDERS_DB, backend_app.order_db)
+        backend_app.ORDERS_DB, backend_app.order_db = db_path, db
+        try:
+            self.assertEqual(self.upload()["result"]["changes"]["mode"], "full")
+            edited = self.upload(self.edited_workbook(insert_row=6))
+            self.assertEqual(edited["result"]["changes"]["mode"], "incremental")
+            orders = self.client.get('/api/orders').get_json()
+            self.assertEqual(orders[1]["product_name"], "新增产品")
+            reopened = OrderDatabase(db_path)
+            self.assertEqual(reopened.load_orders(), orders)
+            reopened.close()
+        finally:
+            backend_app.ORDERS_DB, backend_app.order_db = orig
+            db.close()
+
+    def test_row_index_invalidated_by_other_writes(self):
+        """测试订单被其它接口修改后行索引失效，下次上传完整导入"""
+        self.upload()
+        response = self.client.post('/api/orders', json={"product_name": "插单", "printing_method": "对开双彩", "delivery_date": "6.1"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.upload()["result"]["changes"]["mode"], "full")
+
+    def test_orders_snapshot(self):
+        """测试写入订单时生成列式快照，重新加载时读取快照；JSON被其它程序修改后改为读取JSON"""
+        self.upload()
+        snapshot = os.path.join(self.tmp_dir, 'parsed_orders.snapshot')
+        self.assertTrue(os.path.exists(snapshot))
+        with open(backend_app.ORDERS_FILE, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+
+        backend_app.data_store.invalidate()
+        orders = backend_app.load_orders_data()
+        self.assertEqual(orders, saved)
+        self.assertIs(orders[0]["printing_method"], next(o for o in orders[1:] if o["printing_method"] == orders[0]["printing_method"])["printing_method"])
+
+        with open(backend_app.ORDERS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(saved[:3], f, ensure_ascii=False)
+        self.assertEqual(self.client.get('/api/orders').get_json(), saved[:3])
+
+    def test_upload_archive_and_size_limit(self):
+        """测试启用归档时保存原始文件，超过大小上限时返回413"""
+        archive_dir = os.path.join(self.tmp_dir, 'archive')
+        orig = backend_app.UPLOAD_ARCHIVE_DIR
+        backend_app.UPLOAD_ARCHIVE_DIR = archive_dir
+        try:
+            job = self.upload()
+        finally:
+            backend_app.UPLOAD_ARCHIVE_DIR = orig
+        self.assertEqual(job["stages"][0]["name"], "save")
+        archived = os.listdir(archive_dir)
+        self.assertEqual(len(archived), 1)
+        self.assertTrue(archived[0].endswith("uploaded_file.xlsx"))
+
+        orig_limit = backend_app.app.config['MAX_CONTENT_LENGTH']
+        backend_app.app.config['MAX_CONTENT_LENGTH'] = 1024
+        try:
+            with open(os.path.join(BASE_DIR, 'uploaded_file.xlsx'), 'rb') as f:
+                response = self.client.post('/api/upload_excel', data={'file': (f, 'uploaded_file.xlsx')})
+        finally:
+            backend_app.app.config['MAX_CONTENT_LENGTH'] = orig_limit
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("error", response.get_json())
+
+    def test_upload_queue_limit(self):
+        """测试上传队列已满时拒绝新的上传，任务不存在时返回404"""
+        queue = backend_app.upload_jobs
+        release = threading.Event()
+        blockers = [queue.submit("blocker", lambda job: release.wait(10)) for _ in range(queue.max_pending)]
+        try:
+            with open(os.path.join(BASE_DIR, 'uploaded_file.xlsx'), 'rb') as f:
+                response = self.client.post('/api/upload_excel', data={'file': (f, 'uploaded_file.xlsx')})
+            self.assertEqual(response.status_code, 429)
+        finally:
+            release.set()
+            for job in blockers:
+                queue.wait(job.id, timeout=10)
+        self.assertEqual(self.client.get('/api/jobs/missing').status_code, 404)
+
+    def test_paginated_optimized_orders(self):
+        """测试优化订单的分页、过滤和字段投影"""
+        full = self.client.get('/api/optimized_orders').get_json()
+        method = full[0]["printing_method"]
+        expected = [o["order_id"] for o in full if o["printing_method"] == method]
+
+        ids = []
+        url = f'/api/optimized_orders?limit=2&fields=order_id&printing_method={method}'
+        page = self.client.get(url).get_json()
+        while True:
+            self.assertTrue(all(list(item) == ["order_id"] for item in page["items"]))
+            ids.extend(item["order_id"] for item in page["items"])
+            if page["next_cursor"] is None:
+                break
+            page = self.client.get(f'{url}&cursor={page["next_cursor"]}').get_json()
+        self.assertEqual(ids, expected)
+        self.assertEqual(page["total"], len(expected))
+
+        self.assertEqual(self.client.get('/api/orders?limit=x').status_code, 400)
+        self.assertEqual(self.client.get('/api/orders?date_to=bogus').status_code, 400)
+        dated = self.client.get('/api/optimized_orders?date_from=6.10&limit=1000').get_json()["items"]
+        self.assertNotIn("", [o["delivery_date"] for o in dated])
+        self.assertNotIn("交货时间", [o["delivery_date"] for o in dated])
+
+    def test_etag_and_gzip(self):
+        """测试API和前端文件的ETag/304以及预先压缩的gzip响应"""
+        for url in ('/api/optimized_orders', '/api/devices', '/dashboard'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers["ETag"]
+            cached = self.client.get(url, headers={"If-None-Match": etag})
+            self.assertEqual(cached.status_code, 304)
+            self.assertEqual(cached.data, b"")
+
+        compressed = self.client.get('/api/optimized_orders', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(compressed.data)), self.client.get('/api/optimized_orders').get_json())
+
+        # 数据变化后ETag随之变化
+        etag = self.client.get('/api/orders').headers["ETag"]
+        self.client.post('/api/orders', json={"product_name": "新订单", "printing_method": "对开双彩", "delivery_date": "6.1"})
+        self.assertEqual(self.client.get('/api/orders', headers={"If-None-Match": etag}).status_code, 200)
+
+        self.assertEqual(self.client.get('/dashboard/../app.py').status_code, 404)
+
+    def test_dashboard_snapshot(self):
+        """测试看板快照与各接口一致，数据未变化时复用序列化结果"""
+        dashboard = self.client.get('/api/dashboard').get_json()
+        self.assertEqual(dashboard["optimized_orders"], self.client.get('/api/optimized_orders').get_json())
+        self.assertEqual(dashboard["devices"], self.client.get('/api/devices').get_json())
+        self.assertEqual(dashboard["metrics"], self.client.get('/api/metrics').get_json())
+
+        hits = backend_app.response_cache.hits
+        self.client.get('/api/dashboard')
+        self.assertEqual(backend_app.response_cache.hits, hits + 1)
+
+        self.client.post('/api/orders', json={"product_name": "看板订单", "printing_method": "对开双彩", "delivery_date": "6.1"})
+        updated = self.client.get('/api/dashboard').get_json()
+        self.assertEqual(len(updated["optimized_orders"]), len(dashboard["optimized_orders"]) + 1)
+        self.assertEqual(updated["metrics"]["changeover_before"], len(updated["optimized_orders"]))
+
+    def test_preload_data(self):
+        """测试预加载后订单、设备、指标和看板响应都已缓存"""
+        backend_app.preload_data()
+        cached = backend_app.data_store.stats()["cached_files"]
+        self.assertIn(backend_app.ORDERS_FILE, cached)
+        self.assertIn(backend_app.DEVICES_FILE, cached)
+        hits = backend_app.response_cache.hits
+        self.client.get('/api/dashboard')
+        self.assertEqual(backend_app.response_cache.hits, hits + 1)
+
+    def test_stream_pushes_order_diff(self):
+        """测试新增订单后通过SSE推送变化的订单和指标"""
+        response = self.client.get('/api/stream')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        stream = iter(response.response)
+        next(stream)
+        self.assertIn(b"event: version", next(stream))
+
+        self.client.post('/api/orders', json={"product_name": "推送订单", "printing_method": "对开双彩", "delivery_date": "6.1"})
+        message = next(stream).decode('utf-8')
+        response.close()
+        self.assertIn("event: update", message)
+        update = json.loads(message.split("data: ", 1)[1])
+        self.assertEqual([o["product_name"] for o in update["orders"]["added"]], ["推送订单"])
+        self.assertIsNotNone(update["metrics"])
+        self.assertEqual(backend_app.event_broker.clients, 0)
+
+    def test_batch_ingest(self):
+        """测试批量导入目录中的工作簿，只允许 BATCH_INGEST_ROOT 之内的目录"""
+        batch_dir = os.path.join(self.tmp_dir, 'batch')
+        os.makedirs(batch_dir)
+        for name in ('a.xlsx', 'b.xlsx'):
+            shutil.copy(os.path.join(BASE_DIR, '内文印刷明细总表.xlsx'), os.path.join(batch_dir, name))
+        orig_root = backend_app.BATCH_INGEST_ROOT
+        backend_app.BATCH_INGEST_ROOT = self.tmp_dir
+        try:
+            self.assertEqual(self.client.post('/api/ingest_batch', json={"directory": "../"}).status_code, 400)
+            self.assertEqual(self.client.post('/api/ingest_batch', json={"directory": "batch", "key": "row"}).status_code, 400)
+            response = self.client.post('/api/ingest_batch', json={"directory": "batch", "workers": 1})
+        finally:
+            backend_app.BATCH_INGEST_ROOT = orig_root
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+        backend_app.upload_jobs.wait(job_id, timeout=60)
+        job = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual([s["name"] for s in job["stages"]], ["parse", "fix", "write", "optimize", "metrics"])
+        ingest = job["result"]["ingest"]
+        self.assertEqual(ingest["duplicates"], ingest["parsed_orders"] // 2)
+        orders = self.client.get('/api/orders').get_json()
+        self.assertEqual(len(orders), ingest["unique_orders"])
+        self.assertEqual(job["result"]["metrics"]["changeover_before"], len(orders))
+
+    def test_perf_stats(self):
+        """测试按路由模板统计请求耗时，上传各阶段耗时，并支持Prometheus格式"""
+        backend_app.perf_stats.reset()
+        self.client.get('/api/orders')
+        self.client.get('/api/jobs/missing')
+        self.upload()
+
+        perf = self.client.get('/api/perf').get_json()
+        self.assertEqual(perf["routes"]["GET /api/orders"]["count"], 1)
+        self.assertGreater(perf["routes"]["GET /api/orders"]["bytes_total"], 0)
+        self.assertIn("GET /api/jobs/<job_id>", perf["routes"])
+        self.assertIn("POST /api/upload_excel", perf["routes"])
+        for stage in ("receive", "parse", "fix", "write", "optimize", "metrics"):
+            self.assertEqual(perf["upload_stages"][stage]["count"], 1)
+
+        response = self.client.get('/api/perf', headers={"Accept": "text/plain;version=0.0.4;q=0.5,*/*;q=0.1"})
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        self.assertIn('print_order_http_request_duration_seconds_count{method="GET",route="/api/orders"} 1', text)
+        self.assertIn('print_order_upload_stage_duration_seconds_count{stage="parse"} 1', text)
+        self.assertEqual(self.client.get('/api/perf?format=xml').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import json
+import os
+import tempfile
+from atomic_io import atomic_write, write_json_atomic
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'orders.json')
+        write_json_atomic(self.path, [{"order_id": "1"}])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_replaces_file(self):
+        """测试写入完成后替换目标文件，不留下临时文件"""
+        write_json_atomic(self.path, [{"order_id": "2"}])
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [{"order_id": "2"}])
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['orders.json'])
+
+    def test_failed_write_keeps_original(self):
+        """测试写入过程中出错时原文件保持不变"""
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path) as f:
+                f.write('[{"order_id": ')
+                raise RuntimeError("写入中断")
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [{"order_id": "1"}])
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['orders.json'])
+
+if __name__ == "__main__":
+    unittest.main()
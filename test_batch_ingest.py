@@ -0,0 +1,97 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from batch_ingest import ingest_directory, merge_orders, order_key, find_workbooks, main
+from order_snapshot import snapshot_path
+from row_index import row_key
+from test_order_parser import write_workbook
+
+class TestBatchIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        write_workbook(os.path.join(self.tmp_dir, 'a.xlsx'), [
+            (1, "写字本", "对开双彩", "6.17"),
+            (2, "练习册", "小全开双彩", "6.9")
+        ])
+        write_workbook(os.path.join(self.tmp_dir, 'b.xlsx'), [
+            (1, " 写字本", "对开双彩", "6.17"),
+            (3, "作文本", "对开双彩", "6.10")
+        ])
+        with open(os.path.join(self.tmp_dir, 'broken.xlsx'), 'wb') as f:
+            f.write(b"not a workbook")
+        open(os.path.join(self.tmp_dir, '~$a.xlsx'), 'wb').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_find_workbooks(self):
+        """测试只查找 .xlsx 文件并跳过Excel锁文件"""
+        names = [os.path.basename(p) for p in find_workbooks(self.tmp_dir)]
+        self.assertEqual(names, ['a.xlsx', 'b.xlsx', 'broken.xlsx'])
+
+    def test_ingest_by_content(self):
+        """测试并行解析多个工作簿，按产品名称+印刷方式+交货日期去重，解析失败的文件单独报告"""
+        orders, report = ingest_directory(self.tmp_dir, workers=2)
+        self.assertEqual([o["product_name"] for o in orders], ["写字本", "练习册", "作文本"])
+        self.assertEqual(report["parsed_orders"], 4)
+        self.assertEqual(report["duplicates"], 1)
+        self.assertEqual(report["failed_files"], 1)
+        self.assertIsNotNone(report["files"][2]["error"])
+        self.assertEqual(orders[0]["order_id"], order_key(orders[0]))
+
+        # 单进程解析的结果相同
+        self.assertEqual(ingest_directory(self.tmp_dir, workers=1)[0], orders)
+
+    def test_ingest_by_serial(self):
+        """测试按产品序号 + 产品名称去重：分段重新编号的相同序号不算重复，行标识与上传接口相同"""
+        write_workbook(os.path.join(self.tmp_dir, 'c.xlsx'), [
+            (1, "写字本", "对开双彩", "7.1"),
+            (1, "新书", "对开双彩", "6.10"),
+            (2, "练习册", "对开双黑", "6.9"),
+            (2, "练习册", "对开双黑", "6.9")
+        ])
+        orders, report = ingest_directory(self.tmp_dir, workers=1, key='serial')
+        self.assertEqual([o["product_name"] for o in orders], ["写字本", "练习册", "作文本", "新书", "练习册"])
+        self.assertEqual(report["duplicates"], 3)
+        self.assertEqual(orders[0]["row_key"], row_key({"order_id": "1", "product_name": "写字本"}))
+        self.assertEqual(orders[4]["row_key"], orders[1]["row_key"] + "#2")
+        # 订单编号仍为产品序号，重复的序号加后缀
+        self.assertEqual([o["order_id"] for o in orders], ["1", "2", "3", "1#2", "2#2"])
+        with self.assertRaises(ValueError):
+            ingest_directory(self.tmp_dir, key='row')
+
+    def test_order_key_ignores_whitespace(self):
+        """测试订单编号不受多余空白影响"""
+        a = {"product_name": "写字本  A", "printing_method": "对开双彩", "delivery_date": "6.17"}
+        b = {"product_name": " 写字本 A", "printing_method": "对开双彩 ", "delivery_date": "6.17"}
+        self.assertEqual(order_key(a), order_key(b))
+        merged, duplicates = merge_orders([[a], [b]])
+        self.assertEqual((len(merged), duplicates), (1, 1))
+
+    def test_cli(self):
+        """测试命令行导入并写入合并后的订单文件"""
+        output = os.path.join(self.tmp_dir, 'out.json')
+        self.assertEqual(main([self.tmp_dir, '--output', output, '--workers', '1']), 0)
+        with open(output, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_cli_keeps_output_without_orders(self):
+        """测试空目录或全部文件解析失败时命令行返回非零，原有的订单文件不被覆盖"""
+        output = os.path.join(self.tmp_dir, 'out.json')
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump([{"order_id": "1"}], f)
+        empty_dir = os.path.join(self.tmp_dir, 'empty')
+        broken_dir = os.path.join(self.tmp_dir, 'broken')
+        os.mkdir(empty_dir)
+        os.mkdir(broken_dir)
+        shutil.copy(os.path.join(self.tmp_dir, 'broken.xlsx'), broken_dir)
+        for directory in (empty_dir, broken_dir):
+            self.assertEqual(main([directory, '--output', output, '--workers', '1']), 1)
+            with open(output, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f), [{"order_id": "1"}])
+        self.assertFalse(os.path.exists(snapshot_path(output)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+from data_store import DataStore, ReadWriteLock, PendingList
+
+
+def load_json(file_path, default_value=None):
+    if not os.path.exists(file_path):
+        return default_value
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestDataStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'orders.json')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([{"order_id": "1"}], f)
+        self.store = DataStore(load_json)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache_hit_when_unchanged(self):
+        """测试文件未变化时命中缓存"""
+        first = self.store.get(self.path, [])
+        second = self.store.get(self.path, [])
+        self.assertIs(first, second)
+        self.assertEqual(self.store.misses, 1)
+        self.assertEqual(self.store.hits, 1)
+
+    def test_reload_when_size_changes(self):
+        """测试文件大小变化后重新加载"""
+        self.store.get(self.path, [])
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([{"order_id": "1"}, {"order_id": "2"}], f)
+        self.assertEqual(len(self.store.get(self.path, [])), 2)
+        self.assertEqual(self.store.misses, 2)
+
+    def test_invalidate(self):
+        """测试主动失效后重新加载"""
+        self.store.get(self.path, [])
+        self.store.invalidate(self.path)
+        self.store.get(self.path, [])
+        self.assertEqual(self.store.misses, 2)
+
+    def test_missing_file_not_cached(self):
+        """测试文件不存在时返回默认值且不缓存"""
+        missing = os.path.join(self.tmp_dir.name, 'missing.json')
+        self.assertEqual(self.store.get(missing, []), [])
+        self.assertNotIn(missing, self.store.stats()["cached_files"])
+
+    def test_pending_list_resolved_on_read(self):
+        """测试放入的 PendingList 在读取时生成列表，resolve=False 时原样返回"""
+        self.store.get(self.path, [])
+        pending = PendingList([{"order_id": "1"}]).extend([{"order_id": "2"}])
+        self.store.set(self.path, pending)
+        self.assertIs(self.store.get(self.path, [], resolve=False), pending)
+        orders = self.store.get(self.path, [])
+        self.assertEqual([o["order_id"] for o in orders], ["1", "2"])
+        self.assertIs(self.store.get(self.path, []), orders)
+
+class TestPendingList(unittest.TestCase):
+    def test_versions_resolved_independently(self):
+        """测试每个版本应用到它为止的变化，生成后不受之后版本影响"""
+        base = [1, 2, 3]
+        first = PendingList(base).insert(1, 9)
+        second = first.delete(0).extend([4, 5])
+        self.assertEqual(second.depth, 3)
+        self.assertEqual(second.resolve(), [9, 2, 3, 4, 5])
+        self.assertEqual(first.resolve(), [1, 9, 2, 3])
+        third = first.insert(0, 0)
+        self.assertEqual(list(third), [0, 1, 9, 2, 3])
+        self.assertEqual(base, [1, 2, 3])
+        self.assertIs(PendingList(base).resolve(), base)
+        self.assertIs(first.resolve(), first.value)
+
+class TestReadWriteLock(unittest.TestCase):
+    def test_readers_share_writer_excludes(self):
+        """测试多个读者可同时持有，写者等待所有读者释放"""
+        lock = ReadWriteLock()
+        events = []
+        reader_in = threading.Event()
+        release_reader = threading.Event()
+
+        def reader():
+            with lock.read():
+                reader_in.set()
+                release_reader.wait(5)
+                events.append("read")
+
+        def writer():
+            with lock.write():
+                events.append("write")
+
+        t_reader = threading.Thread(target=reader)
+        t_reader.start()
+        reader_in.wait(5)
+        # 读锁已被持有时，另一个读者仍可进入
+        with lock.read():
+            pass
+
+        t_writer = threading.Thread(target=writer)
+        t_writer.start()
+        t_writer.join(0.05)
+        self.assertTrue(t_writer.is_alive())
+        release_reader.set()
+        t_reader.join(5)
+        t_writer.join(5)
+        self.assertEqual(events, ["read", "write"])
+
+    @unittest.skipIf(sys.platform == 'win32', "flock 仅在 Linux/macOS 上可用")
+    def test_lock_file_excludes_other_processes(self):
+        """测试使用同一锁文件的两个锁（相当于两个worker进程）写入互相排斥，读取可以共享"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'orders.lock')
+            first, second = ReadWriteLock(lock_file=path), ReadWriteLock(lock_file=lambda: path)
+            events = []
+            holding = threading.Event()
+            release = threading.Event()
+
+            def hold_write():
+                with first.write():
+                    holding.set()
+                    release.wait(5)
+                    events.append("first")
+
+            def write():
+                with second.write():
+                    events.append("second")
+
+            t_first = threading.Thread(target=hold_write)
+            t_first.start()
+            holding.wait(5)
+            t_second = threading.Thread(target=write)
+            t_second.start()
+            t_second.join(0.1)
+            self.assertTrue(t_second.is_alive())
+            release.set()
+            t_first.join(5)
+            t_second.join(5)
+            self.assertEqual(events, ["first", "second"])
+
+            with first.read():
+                with second.read():
+                    pass
+
+if __name__ == '__main__':
+    unittest.main()
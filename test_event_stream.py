@@ -0,0 +1,63 @@
+import unittest
+import json
+import threading
+from event_stream import EventBroker, diff_orders
+
+def order(order_id, method="对开双彩", date="6.1"):
+    return {"order_id": order_id, "product_name": f"产品{order_id}", "printing_method": method, "delivery_date": date}
+
+def parse(message):
+    """解析一条SSE消息为 (事件名, 数据)"""
+    fields = dict(line.split(": ", 1) for line in message.decode('utf-8').strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+class TestDiffOrders(unittest.TestCase):
+    def test_added_changed_removed(self):
+        """测试新增、修改、删除的订单以及追加时不发送顺序"""
+        old = [order("1"), order("2"), order("3")]
+        new = [order("1"), order("3", date="6.5"), order("4")]
+        diff = diff_orders(old, new)
+        self.assertEqual([o["order_id"] for o in diff["added"]], ["4"])
+        self.assertEqual([o["order_id"] for o in diff["changed"]], ["3"])
+        self.assertEqual(diff["removed"], ["2"])
+        self.assertIsNone(diff["sequence"])
+
+    def test_reordered_and_too_many(self):
+        """测试顺序变化时给出新顺序，变化过多时返回None"""
+        old = [order("1"), order("2")]
+        self.assertEqual(diff_orders(old, [order("2"), order("1")])["sequence"], ["2", "1"])
+        self.assertIsNone(diff_orders([], [order(str(i)) for i in range(10)], max_orders=5))
+
+class TestEventBroker(unittest.TestCase):
+    def test_stream_delivers_and_replays(self):
+        """测试事件推送给已连接的客户端，并按 Last-Event-ID 补发"""
+        broker = EventBroker(max_events=2, heartbeat_seconds=0.01)
+        stream = broker.stream()
+        self.assertEqual(next(stream), b"retry: 3000\n\n")
+        self.assertEqual(parse(next(stream)), ("version", {"version": 0}))
+        self.assertEqual(broker.clients, 1)
+        self.assertEqual(next(stream), b": ping\n\n")
+
+        threading.Timer(0.001, broker.publish, ("update", {"metrics": {"a": 1}})).start()
+        message = next(stream)
+        while message == b": ping\n\n":
+            message = next(stream)
+        self.assertEqual(parse(message), ("update", {"metrics": {"a": 1}, "version": 1}))
+        stream.close()
+        self.assertEqual(broker.clients, 0)
+
+        broker.publish("update", {"n": 2})
+        replay = broker.stream(last_event_id="1")
+        next(replay), next(replay)
+        self.assertEqual(parse(next(replay))[1]["version"], 2)
+        replay.close()
+
+        # 所需事件已被淘汰时通知重新加载
+        broker.publish("update", {"n": 3})
+        stale = broker.stream(last_event_id="0")
+        next(stale), next(stale)
+        self.assertEqual(parse(next(stale))[0], "reload")
+        stale.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from fix_json import repair_orders
+
+class TestRepairOrders(unittest.TestCase):
+    def test_repair_orders(self):
+        """测试内存中校验修复订单数据"""
+        orders = [
+            {"order_id": "1", "product_name": "产品名称", "printing_method": "印刷方式", "delivery_date": "交货时间"},
+            {"order_id": "2", "product_name": " “测试”产品 ", "printing_method": "小全开双彩", "delivery_date": 6.9},
+            {"order_id": "3", "product_name": "", "printing_method": "对开双彩", "delivery_date": "6.12"},
+            {"order_id": "2", "product_name": "重复产品", "printing_method": "对开双彩", "delivery_date": "6.12"},
+            "不是订单",
+            {"order_id": "4", "product_name": "产品4"}
+        ]
+        repaired, report = repair_orders(orders)
+
+        self.assertEqual([o["order_id"] for o in repaired], ["2", "4"])
+        self.assertEqual(repaired[0]["product_name"], '"测试"产品')
+        self.assertEqual(repaired[0]["delivery_date"], "6.9")
+        self.assertEqual(repaired[1]["printing_method"], "")
+        self.assertEqual(report["dropped_header"], 1)
+        self.assertEqual(report["dropped_empty"], 1)
+        self.assertEqual(report["dropped_duplicate"], 1)
+        self.assertEqual(report["dropped_invalid"], 1)
+        self.assertEqual(report["output_count"], 2)
+
+    def test_input_not_modified(self):
+        """测试修复不修改原始订单"""
+        orders = [{"order_id": "1", "product_name": " 产品 ", "printing_method": "对开双彩", "delivery_date": "6.1"}]
+        repair_orders(orders)
+        self.assertEqual(orders[0]["product_name"], " 产品 ")
+
+if __name__ == '__main__':
+    unittest.main()
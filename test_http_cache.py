@@ -0,0 +1,51 @@
+import unittest
+import gzip
+from http_cache import CachedBody, ResponseCache, accepts_gzip
+
+class TestResponseCache(unittest.TestCase):
+    def test_reuses_body_until_sources_change(self):
+        """测试源数据对象不变时复用序列化结果，换成新对象后重新生成"""
+        cache = ResponseCache()
+        calls = []
+
+        def build(data):
+            calls.append(1)
+            return CachedBody(repr(data).encode('utf-8'))
+
+        orders = [{"order_id": "1"}]
+        first = cache.get("/api/orders", (orders,), lambda: build(orders))
+        second = cache.get("/api/orders", (orders,), lambda: build(orders))
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+
+        changed = list(orders)
+        third = cache.get("/api/orders", (changed,), lambda: build(changed))
+        self.assertEqual(len(calls), 2)
+        # 内容相同的版本ETag相同
+        self.assertEqual(third.etag, first.etag)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        cache = ResponseCache(max_entries=2)
+        data = []
+        for key in ("a", "b", "a", "c"):
+            cache.get(key, (data,), lambda: CachedBody(b"{}"))
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.get("b", (data,), lambda: CachedBody(b"{}"))
+        self.assertEqual(cache.stats()["misses"], 4)
+
+    def test_gzip_only_large_bodies(self):
+        """测试只压缩较大的响应体"""
+        self.assertIsNone(CachedBody(b"[]").gzipped)
+        body = b"[" + b",".join(b'{"order_id": "%d"}' % i for i in range(200)) + b"]"
+        self.assertEqual(gzip.decompress(CachedBody(body).gzipped), body)
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("br;q=1.0, gzip;q=0.8"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip(None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 后端模块导入耗时上限（毫秒），较慢的机器上可用环境变量 IMPORT_BUDGET_MS 调整
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', 800))
+
+# 只在上传、解析Excel时才需要的重量级依赖
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+# 项目自身的模块（仓库根目录下的 .py 文件）
+PROJECT_MODULES = {name[:-3] for name in os.listdir(BASE_DIR) if name.endswith('.py')}
+
+def import_profile(statement, cwd):
+    """用 python -X importtime 执行语句，返回 {模块名: 累计导入耗时(微秒)}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=cwd,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+class TestImportTime(unittest.TestCase):
+    def test_backend_import_budget(self):
+        """测试后端导入不加载pandas/numpy/openpyxl，且耗时在预算之内（取3次中最快的一次）"""
+        runs = [import_profile('import app', os.path.join(BASE_DIR, 'backend')) for _ in range(3)]
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, runs[0], f"导入后端时加载了 {module}")
+        fastest_ms = min(profile['app'] for profile in runs) / 1000
+        self.assertLess(fastest_ms, IMPORT_BUDGET_MS, f"后端导入耗时 {fastest_ms:.0f} ms，超过预算 {IMPORT_BUDGET_MS:.0f} ms")
+
+    def test_optimizer_imports_stdlib_only(self):
+        """测试换版优化模块只依赖标准库和项目自身的模块"""
+        # 解释器启动时就会加载的模块（site、sitecustomize等）不计入
+        startup = import_profile('pass', BASE_DIR)
+        profile = import_profile('import changeover_optimization', BASE_DIR)
+        third_party = sorted({
+            name.split('.')[0] for name in profile
+            if name not in startup
+            and name.split('.')[0] not in sys.stdlib_module_names and name.split('.')[0] not in PROJECT_MODULES
+        })
+        self.assertEqual(third_party, [])
+
+if __name__ == '__main__':
+    unittest.main()
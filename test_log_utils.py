@@ -0,0 +1,69 @@
+import unittest
+import io
+import logging
+from log_utils import RateLimitFilter, IssueCounter, configure_logging, get_logger
+
+class TestLogUtils(unittest.TestCase):
+    def make_logger(self, name, log_filter):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.addFilter(log_filter)
+        logger = logging.getLogger(f"test_log_utils.{name}")
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        return logger, stream
+
+    def test_rate_limit_same_message(self):
+        """测试同一条消息超过频率上限后被省略，下一个时间窗口附带省略的条数"""
+        log_filter = RateLimitFilter(interval=60, burst=3)
+        logger, stream = self.make_logger("rate", log_filter)
+
+        def emit(i):
+            logger.info("读取文件出错: %d", i)
+
+        for i in range(10):
+            emit(i)
+        logger.info("另一条消息")
+        self.assertEqual(stream.getvalue().splitlines(), ["读取文件出错: 0", "读取文件出错: 1", "读取文件出错: 2", "另一条消息"])
+
+        # 时间窗口结束后恢复输出
+        for window in log_filter._windows.values():
+            window[0] -= 60
+        emit(10)
+        self.assertEqual(stream.getvalue().splitlines()[-1], "读取文件出错: 10（此前省略 7 条相同消息）")
+
+    def test_issue_counter(self):
+        """测试逐条问题只计数，汇总时每类输出一条，示例只在DEBUG级别输出"""
+        logger = get_logger("test_issues")
+        issues = IssueCounter(logger, sample=2)
+        self.assertFalse(issues)
+        for i in range(5):
+            issues.add("订单缺少印刷方式", i)
+        issues.add("非字典类型的订单数据")
+        self.assertTrue(issues)
+
+        with self.assertLogs(logger, level='DEBUG') as logs:
+            issues.report()
+        self.assertEqual([r.getMessage() for r in logs.records], [
+            "5 条订单缺少印刷方式",
+            "订单缺少印刷方式示例: [0, 1]",
+            "1 条非字典类型的订单数据"
+        ])
+        self.assertEqual(logs.records[0].levelno, logging.WARNING)
+
+    def test_configure_logging_default_quiet(self):
+        """测试默认级别为WARNING，重复配置不会重复添加输出"""
+        logger = logging.getLogger('print_order')
+        saved = (logger.level, list(logger.handlers), logger.propagate)
+        try:
+            logger.handlers = []
+            configure_logging()
+            configure_logging('info')
+            self.assertEqual(logger.level, logging.INFO)
+            self.assertEqual(len(logger.handlers), 1)
+        finally:
+            logger.level, logger.handlers, logger.propagate = saved[0], saved[1], saved[2]
+
+if __name__ == '__main__':
+    unittest.main()
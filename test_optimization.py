@@ -1,7 +1,8 @@
 import unittest
 import json
 import os
-from changeover_optimization import optimize_changeovers, group_by_printing_method
+from changeover_optimization import optimize_changeovers, group_by_printing_method, OptimizationCache
+from changeover_cost import ChangeoverCostModel, order_methods
 
 class TestOptimization(unittest.TestCase):
     def setUp(self):
@@ -24,6 +25,14 @@ class TestOptimization(unittest.TestCase):
         self.assertEqual(len(groups["对开双彩"]), 2)  # 对开双彩有2个订单
         self.assertEqual(len(groups["小全开双单"]), 1)  # 小全开双单有1个订单
         
+    def test_missing_methods_reported_once(self):
+        """测试缺少印刷方式的订单只汇总输出一条警告"""
+        orders = self.test_orders + [{"order_id": str(i), "printing_method": ""} for i in range(100, 400)]
+        with self.assertLogs('print_order.changeover_optimization', level='WARNING') as logs:
+            groups = group_by_printing_method(orders)
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(logs.output, ["WARNING:print_order.changeover_optimization:300 条订单缺少印刷方式"])
+        
     def test_optimize_changeovers(self):
         """测试换版优化"""
         result = optimize_changeovers(self.test_orders)
@@ -49,6 +58,23 @@ class TestOptimization(unittest.TestCase):
                 
         self.assertEqual(len(method_groups), 3)  # 应该只有3个换版点
         
+    def test_changeover_cost_ordering(self):
+        """测试按换版成本排列分组：同幅面的印刷方式相邻"""
+        result = optimize_changeovers(self.test_orders)
+        sequence = result["method_sequence"]
+        self.assertEqual(abs(sequence.index("小全开双彩") - sequence.index("小全开双单")), 1)
+        self.assertLessEqual(result["changeover_cost_after"], result["changeover_cost_before"])
+        self.assertEqual(result["changeover_cost_after"], 5.0)
+        
+    def test_configured_changeover_costs(self):
+        """测试配置的成本矩阵优先于推算成本"""
+        model = ChangeoverCostModel(pairs={("小全开双彩", "对开双彩"): 0.5})
+        self.assertEqual(model.cost("对开双彩", "小全开双彩"), 0.5)
+        self.assertEqual(model.cost("小全开双彩", "小全开双单"), 2.0)
+        self.assertEqual(model.cost("小全开双彩", "对开双单"), 4.0)
+        result = optimize_changeovers(self.test_orders, cost_model=model)
+        self.assertEqual(result["changeover_cost_after"], 2.5)
+        
     def test_integration_with_real_data(self):
         """测试与实际数据文件集成"""
         # 跳过测试，如果没有对应文件
@@ -72,6 +98,50 @@ class TestOptimization(unittest.TestCase):
             
         except Exception as e:
             self.fail(f"Integration test failed: {str(e)}")
-            
+
+class TestOrderMethods(unittest.TestCase):
+    def test_order_methods_reduces_cost(self):
+        """测试最近邻+2-opt排序不劣于原始顺序"""
+        model = ChangeoverCostModel()
+        methods = ["对开双彩", "小全开双单", "对开双黑", "小全开双彩", "对开双单", "小全开双黑"]
+        ordered = order_methods(methods, model)
+        self.assertEqual(sorted(ordered), sorted(methods))
+        self.assertLess(model.sequence_cost(ordered), model.sequence_cost(methods))
+        # 两个幅面内各换色2次（每次2.0），幅面之间切换1次（同色3.0）
+        self.assertEqual(model.sequence_cost(ordered), 11.0)
+
+class TestOptimizationCache(unittest.TestCase):
+    def setUp(self):
+        self.orders = [
+            {"order_id": "1", "product_name": "测试产品1", "printing_method": "小全开双彩", "delivery_date": "6.10"},
+            {"order_id": "2", "product_name": "测试产品2", "printing_method": "对开双彩", "delivery_date": "6.12"}
+        ]
+
+    def test_repeated_orders_hit_cache(self):
+        """测试相同内容的订单列表直接返回缓存结果"""
+        cache = OptimizationCache()
+        first = cache.optimize(self.orders)
+        second = cache.optimize([dict(order) for order in self.orders])
+        self.assertIs(first, second)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_lru_eviction(self):
+        """测试超过容量后淘汰最久未使用的结果"""
+        cache = OptimizationCache(max_entries=2)
+        for i in range(3):
+            cache.optimize(self.orders + [{"order_id": str(10 + i), "product_name": "产品", "printing_method": "对开双彩", "delivery_date": "6.1"}])
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.optimize(self.orders + [{"order_id": "10", "product_name": "产品", "printing_method": "对开双彩", "delivery_date": "6.1"}])
+        self.assertEqual(cache.misses, 4)
+
+    def test_refresh_replaces_entry(self):
+        """测试刷新后重新计算结果"""
+        cache = OptimizationCache()
+        first = cache.optimize(self.orders)
+        refreshed = cache.refresh(self.orders)
+        self.assertIsNot(first, refreshed)
+        self.assertIs(cache.optimize(self.orders), refreshed)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,128 @@
+import unittest
+import json
+import os
+import random
+import sqlite3
+import tempfile
+from unittest import mock
+from order_db import OrderDatabase, SCHEMA
+from changeover_optimization import load_orders
+from order_query import OrderQueryIndex, parse_query_args
+
+ORDERS = [
+    {"order_id": "1", "product_name": "产品1", "printing_method": "小全开双彩", "delivery_date": "6.17"},
+    {"order_id": "2", "product_name": "产品2", "printing_method": "对开双彩", "delivery_date": "6.9"},
+    {"order_id": "3", "product_name": "产品3", "printing_method": "小全开双彩", "delivery_date": "6.20", "sheets": 1200}
+]
+
+class TestOrderDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'orders.db')
+        self.db = OrderDatabase(self.db_path)
+        self.db.replace_all(ORDERS)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def test_wal_and_indexes(self):
+        """测试启用WAL模式并建立印刷方式和交货日期索引"""
+        conn = self.db._connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM orders WHERE printing_method = ?", ("对开双彩",)).fetchall()
+        self.assertIn("idx_orders_method", str(plan))
+
+    def test_filtered_load(self):
+        """测试按印刷方式和交货日期范围读取"""
+        self.assertEqual([o["order_id"] for o in self.db.load_orders(printing_method="小全开双彩")], ["1", "3"])
+        self.assertEqual([o["order_id"] for o in self.db.load_orders(date_from=610, date_to=618)], ["1"])
+        self.assertEqual(self.db.load_orders(limit=1, offset=2)[0]["sheets"], 1200)
+
+    def test_query_matches_memory_index(self):
+        """测试数据库分页查询与内存中的查询索引结果相同：无法识别的日期被排除，带年份和不带年份的日期按相同规则比较"""
+        rng = random.Random(3)
+        dates = ["6.15", "", "交货时间", "2025-06-20", "2024-06-20", "1.5", "2026-01-05", "12.28", "7.1"]
+        orders = [
+            {"order_id": str(i), "product_name": f"产品{i}", "printing_method": rng.choice(["对开双彩", "对开双黑"]),
+             "delivery_date": rng.choice(dates)}
+            for i in range(120)
+        ]
+        self.db.replace_all(orders)
+        index = OrderQueryIndex(orders)
+        cases = [
+            {},
+            {"printing_method": "对开双黑", "limit": "7", "cursor": "14"},
+            {"date_from": "6.10"},
+            {"date_to": "6.30", "printing_method": "对开双彩"},
+            {"date_from": "2025-06-01", "date_to": "6.30"},
+            {"date_from": "2025-06-16"},
+            {"date_to": "2025-06-16"},
+            {"date_from": "2025-12-01", "date_to": "2026-01-31"},
+            {"date_from": "2024-01-01", "date_to": "2026-12-31", "fields": "order_id,delivery_date"}
+        ]
+        for args in cases:
+            query = parse_query_args(dict(args, limit=args.get("limit", "1000")))
+            self.assertEqual(self.db.query_orders(**query), index.query(**query), args)
+
+    def test_upsert_and_version(self):
+        """测试批量更新插入后版本号递增、顺序保持"""
+        version = self.db.version()
+        self.db.upsert_orders([
+            {"order_id": "2", "product_name": "产品2改", "printing_method": "对开双彩", "delivery_date": "6.10"},
+            {"order_id": "4", "product_name": "产品4", "printing_method": "对开双黑", "delivery_date": "6.11"}
+        ])
+        self.assertGreater(self.db.version(), version)
+        orders = self.db.load_orders()
+        self.assertEqual([o["order_id"] for o in orders], ["1", "2", "3", "4"])
+        self.assertEqual(orders[1]["product_name"], "产品2改")
+
+        self.db.delete_orders(["1"])
+        self.assertEqual(self.db.count(), 3)
+
+    def test_upsert_in_given_order(self):
+        """测试给出写入后的订单顺序时，新订单和修改的订单按该顺序保存，重新打开数据库后顺序相同"""
+        self.db.upsert_orders([
+            {"order_id": "5", "product_name": "产品5", "printing_method": "对开双黑", "delivery_date": "6.11"},
+            {"order_id": "4", "product_name": "产品4", "printing_method": "对开双黑", "delivery_date": "6.11"},
+            {"order_id": "3", "product_name": "产品3改", "printing_method": "小全开双彩", "delivery_date": "6.21"}
+        ], order_ids=["5", "1", "4", "3", "2"])
+        reopened = OrderDatabase(self.db_path)
+        self.assertEqual([o["order_id"] for o in reopened.load_orders()], ["5", "1", "4", "3", "2"])
+        reopened.close()
+
+        # 位置间隔用完时重新编号全部订单
+        with mock.patch('order_db.POSITION_GAP', 1):
+            self.db.replace_all(ORDERS)
+            self.db.upsert_orders([{"order_id": "4", "product_name": "产品4", "printing_method": "对开双黑", "delivery_date": "6.11"}],
+                                  order_ids=["1", "4", "2", "3"])
+        self.assertEqual([o["order_id"] for o in self.db.load_orders()], ["1", "4", "2", "3"])
+
+    def test_migrate_database_without_position(self):
+        """测试旧版本创建的数据库（没有 position 列）按写入顺序补上位置"""
+        path = os.path.join(self.tmp_dir.name, 'old.db')
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA.replace("    position INTEGER NOT NULL DEFAULT 0,\n", ""))
+        conn.executemany("INSERT INTO orders (order_id, product_name, printing_method, delivery_date, date_key) VALUES (?, ?, ?, ?, 0)",
+                         [("b", "B", "对开双彩", ""), ("a", "A", "对开双彩", "")])
+        conn.commit()
+        conn.close()
+        db = OrderDatabase(path)
+        db.upsert_orders([{"order_id": "c", "product_name": "C", "printing_method": "对开双彩", "delivery_date": ""}])
+        self.assertEqual([o["order_id"] for o in db.load_orders()], ["b", "a", "c"])
+        db.close()
+
+    def test_json_import_export(self):
+        """测试JSON导入导出保持兼容"""
+        json_path = os.path.join(self.tmp_dir.name, 'orders.json')
+        self.assertEqual(self.db.export_json(json_path), 3)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), ORDERS)
+
+        other = OrderDatabase(os.path.join(self.tmp_dir.name, 'other.sqlite'))
+        self.assertEqual(other.import_json(json_path), 3)
+        self.assertEqual(load_orders(other.file_path), ORDERS)
+        other.close()
+
+if __name__ == '__main__':
+    unittest.main()
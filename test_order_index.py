@@ -0,0 +1,96 @@
+import unittest
+import random
+from changeover_optimization import optimize_changeovers
+from order_index import SequenceIndex, COMPACT_CHANGES
+
+class TestSequenceIndex(unittest.TestCase):
+    def test_insert_matches_full_optimization(self):
+        """测试增量插入后的分组内顺序与完整重新优化一致"""
+        rng = random.Random(5)
+        methods = ["小全开双彩", "对开双彩", "对开双黑", "小全开双单"]
+        orders = [
+            {"order_id": str(i), "product_name": f"产品{i}", "printing_method": rng.choice(methods), "delivery_date": f"6.{rng.randint(10, 30)}"}
+            for i in range(200)
+        ]
+        base, extra = orders[:150], orders[150:]
+
+        index = SequenceIndex.from_result(base, optimize_changeovers(base))
+        for order in extra:
+            index.insert(order)
+        incremental = index.result()
+        full = optimize_changeovers(orders)
+
+        self.assertEqual(incremental["changeover_before"], full["changeover_before"])
+        self.assertEqual(incremental["changeover_after"], full["changeover_after"])
+        self.assertEqual(incremental["changeover_cost_before"], full["changeover_cost_before"])
+        for method in methods:
+            self.assertEqual(
+                [o["order_id"] for o in incremental["optimized_orders"] if o["printing_method"] == method],
+                [o["order_id"] for o in full["optimized_orders"] if o["printing_method"] == method]
+            )
+
+    def test_new_method_cheapest_insertion(self):
+        """测试新印刷方式插入到成本增加最少的位置"""
+        orders = [
+            {"order_id": "1", "product_name": "A", "printing_method": "小全开双彩", "delivery_date": "6.1"},
+            {"order_id": "2", "product_name": "B", "printing_method": "对开双彩", "delivery_date": "6.1"}
+        ]
+        index = SequenceIndex.from_result(orders, optimize_changeovers(orders))
+        position = index.insert({"order_id": "3", "product_name": "C", "printing_method": "小全开双单", "delivery_date": "6.2"})
+
+        sequence = index.method_sequence
+        self.assertEqual(abs(sequence.index("小全开双彩") - sequence.index("小全开双单")), 1)
+        self.assertEqual(index.result()["optimized_orders"][position]["order_id"], "3")
+        self.assertEqual(index.next_order_id(), "4")
+
+    def test_remove_matches_full_optimization(self):
+        """测试删除订单后分组内顺序、换版次数和成本与完整重新优化一致，空分组从分组顺序中去掉"""
+        rng = random.Random(7)
+        methods = ["小全开双彩", "对开双彩", "对开双黑"]
+        orders = [
+            {"order_id": str(i), "product_name": f"产品{i}", "printing_method": rng.choice(methods), "delivery_date": f"6.{rng.randint(10, 30)}"}
+            for i in range(100)
+        ]
+        orders.append({"order_id": "100", "product_name": "单独", "printing_method": "小全开双单", "delivery_date": "6.1"})
+        index = SequenceIndex.from_result(orders, optimize_changeovers(orders))
+
+        removed = [o for o in orders if int(o["order_id"]) % 3 == 0] + [orders[-1]]
+        for order in removed:
+            self.assertTrue(index.remove(order))
+        remaining = [o for o in orders if o not in removed]
+        index.recount(remaining)
+        incremental = index.result()
+        full = optimize_changeovers(remaining)
+
+        self.assertNotIn("小全开双单", incremental["method_sequence"])
+        self.assertEqual(incremental["changeover_before"], full["changeover_before"])
+        self.assertEqual(incremental["changeover_after"], full["changeover_after"])
+        self.assertEqual(incremental["changeover_cost_before"], full["changeover_cost_before"])
+        self.assertEqual(incremental["changeover_cost_after"],
+                         round(index.cost_model.sequence_cost(incremental["method_sequence"]), 2))
+        for method in methods:
+            self.assertEqual(
+                [o["order_id"] for o in incremental["optimized_orders"] if o["printing_method"] == method],
+                [o["order_id"] for o in full["optimized_orders"] if o["printing_method"] == method]
+            )
+        self.assertFalse(index.remove({"order_id": "missing", "printing_method": "对开双彩", "delivery_date": "6.1"}))
+
+    def test_result_versions_unchanged_by_later_inserts(self):
+        """测试结果中的优化序列在读取时才生成，之后的插入不影响已经返回的版本"""
+        rng = random.Random(9)
+        methods = ["小全开双彩", "对开双彩", "对开双黑"]
+        orders = [
+            {"order_id": str(i), "product_name": f"产品{i}", "printing_method": rng.choice(methods), "delivery_date": f"6.{rng.randint(10, 30)}"}
+            for i in range(COMPACT_CHANGES * 2 + 50)
+        ]
+        index = SequenceIndex.from_result(orders[:20], optimize_changeovers(orders[:20]))
+        first = index.result()["optimized_orders"]
+        for order in orders[20:]:
+            index.insert(order)
+        self.assertLess(index.result()["optimized_orders"].depth, COMPACT_CHANGES)
+        self.assertEqual(len(first), 20)
+        self.assertEqual([o["order_id"] for o in index.optimized_orders()],
+                         [o["order_id"] for o in optimize_changeovers(orders)["optimized_orders"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+from changeover_optimization import optimize_changeovers
+from order_model import Order, to_records, parse_delivery_date, UNKNOWN_DATE_KEY
+
+def make_orders(count, seed=11):
+    rng = random.Random(seed)
+    methods = ["小全开双彩", "对开双彩", "对开双黑", "小全开双单", "对开双面双色"]
+    return [
+        {"order_id": str(i), "product_name": f"测试产品{i}", "printing_method": rng.choice(methods),
+         "delivery_date": f"{rng.randint(6, 7)}.{rng.randint(1, 30)}"}
+        for i in range(count)
+    ]
+
+class TestOrderModel(unittest.TestCase):
+    def test_parse_delivery_date(self):
+        """测试交货日期解析为可比较的序数"""
+        self.assertLess(parse_delivery_date("6.9"), parse_delivery_date("6.17"))
+        self.assertEqual(parse_delivery_date("7.01"), parse_delivery_date("7.1"))
+        self.assertEqual(parse_delivery_date("6月9日"), 609)
+        self.assertEqual(parse_delivery_date("2025-06-09"), 20250609)
+        self.assertEqual(parse_delivery_date("交货时间"), UNKNOWN_DATE_KEY)
+        self.assertEqual(parse_delivery_date(""), UNKNOWN_DATE_KEY)
+
+    def test_optimizer_sorts_by_date_ordinal(self):
+        """测试分组内按日期序数排序，而不是字符串顺序"""
+        orders = [
+            {"order_id": "1", "product_name": "A", "printing_method": "对开双彩", "delivery_date": "6.17"},
+            {"order_id": "2", "product_name": "B", "printing_method": "对开双彩", "delivery_date": "6.9"},
+            {"order_id": "3", "product_name": "C", "printing_method": "对开双彩", "delivery_date": ""}
+        ]
+        result = optimize_changeovers(orders)
+        self.assertEqual([o["order_id"] for o in result["optimized_orders"]], ["2", "1", "3"])
+        self.assertIs(result["optimized_orders"][0], orders[1])
+
+    def test_records_round_trip(self):
+        """测试记录与字典互相转换，额外字段不丢失"""
+        data = {"order_id": "7", "product_name": "产品", "printing_method": " 对开双彩 ", "delivery_date": "6.9", "sheets": 1200}
+        record = Order.from_dict(data, 0)
+        self.assertEqual(record.get("printing_method"), "对开双彩")
+        self.assertEqual(record["sheets"], 1200)
+        self.assertEqual(record.to_dict()["sheets"], 1200)
+        self.assertIsNone(record.get("missing"))
+
+        # 缺少基本字段时额外字段也保留（排产读取 sheets）
+        record = Order.from_dict({"order_id": "8", "printing_method": "对开双彩", "sheets": 500}, 1)
+        self.assertEqual(record.get("sheets"), 500)
+        self.assertIsNone(Order.from_dict({"order_id": "9"}, 2).extra)
+
+    def test_records_and_dicts_same_sequence(self):
+        """测试记录输入与字典输入得到相同的优化序列"""
+        orders = make_orders(500)
+        from_dicts = optimize_changeovers(orders)
+        from_records = optimize_changeovers(to_records(orders))
+        self.assertEqual(
+            [o["order_id"] for o in from_dicts["optimized_orders"]],
+            [r.order_id for r in from_records["optimized_orders"]]
+        )
+
+    def test_load_orders_as_records(self):
+        """测试换版优化命令行加载订单时直接得到记录，优化结果与字典相同"""
+        from changeover_optimization import load_orders
+        orders = make_orders(50)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'parsed_orders.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(orders, f, ensure_ascii=False)
+            records = load_orders(path, records=True)
+        self.assertTrue(all(isinstance(record, Order) for record in records))
+        self.assertEqual([r.order_id for r in optimize_changeovers(records)["optimized_orders"]],
+                         [o["order_id"] for o in optimize_changeovers(orders)["optimized_orders"]])
+
+    def test_record_memory_smaller_than_dict(self):
+        """基准：订单记录占用的内存小于JSON解析出的字典"""
+        payload = json.dumps(make_orders(20000), ensure_ascii=False)
+
+        tracemalloc.start()
+        dicts = json.loads(payload)
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        records = to_records(json.loads(payload))
+        record_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        self.assertEqual(len(records), len(dicts))
+        self.assertLess(record_bytes, dict_bytes * 0.8)
+
+if __name__ == '__main__':
+    unittest.main()
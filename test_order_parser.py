@@ -0,0 +1,114 @@
+import unittest
+import io
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from order_parser import parse_orders, parse_numbered_orders, parse_orders_from_workbook, parse_numbered_orders_from_workbook
+
+def make_row(serial, name, method, date):
+    row = [np.nan] * 18
+    row[0], row[1], row[5], row[15] = serial, name, method, date
+    return row
+
+def write_workbook(path, rows):
+    """写出只有标题行和 (产品序号, 产品名称, 印刷方式, 交货时间) 订单行的明细表"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["产品序号", "产品名称"] + [None] * 3 + ["印刷方式"] + [None] * 9 + ["交货时间"])
+    for serial, name, method, date in rows:
+        sheet.append([serial, name] + [None] * 3 + [method] + [None] * 9 + [date])
+    workbook.save(path)
+
+class TestOrderParser(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame([
+            make_row("产品序号", "产品名称", "印刷方式", "交货时间"),
+            make_row(1, "  《爱眼超人漫“话”》 ", "小全开双彩", 6.9),
+            make_row("产品进度：调图", np.nan, np.nan, np.nan),
+            make_row(2, "写字本", np.nan, "6.17")
+        ])
+
+    def test_parse_orders(self):
+        """测试按行号解析订单，跳过首行和空产品名称"""
+        orders = parse_orders(self.df)
+        self.assertEqual([o["order_id"] for o in orders], ["1", "3"])
+        self.assertEqual(orders[0]["product_name"], '《爱眼超人漫"话"》')
+        self.assertEqual(orders[0]["delivery_date"], "6.9")
+        self.assertEqual(orders[1]["printing_method"], "")
+
+    def test_parse_numbered_orders(self):
+        """测试按产品序号解析订单，过滤非数字序号的行"""
+        orders = parse_numbered_orders(self.df)
+        self.assertEqual([o["order_id"] for o in orders], ["1", "2"])
+        self.assertEqual(orders[1]["delivery_date"], "6.17")
+
+    def test_missing_columns(self):
+        """测试列数不足时对应字段为空"""
+        orders = parse_orders(pd.DataFrame([["序号", "名称"], [1, "产品"]]))
+        self.assertEqual(orders, [{"order_id": "1", "product_name": "产品", "printing_method": "", "delivery_date": ""}])
+
+    def test_parse_from_workbook_stream(self):
+        """测试流式解析与 parse_orders(pd.read_excel(...)) 结果一致，包括中间的空行"""
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(make_row("产品序号", "产品名称", "印刷方式", "交货时间"))
+        sheet.append(make_row(1, "首行被跳过", "对开双彩", 6.1))
+        sheet.append(make_row(2, "  《爱眼超人漫“话”》 ", "小全开双彩", 6.9))
+        sheet.cell(row=6, column=2, value="写字本")
+        sheet.cell(row=6, column=16, value="6.17")
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        buffer.seek(0)
+        expected = parse_orders(pd.read_excel(buffer))
+        buffer.seek(0)
+        self.assertEqual(parse_orders_from_workbook(buffer), expected)
+        self.assertEqual([o["order_id"] for o in expected], ["1", "4"])
+
+    def test_parse_numbered_from_workbook_stream(self):
+        """测试按产品序号流式解析与 parse_numbered_orders(pd.read_excel(..., header=None)) 结果一致"""
+        workbook = Workbook()
+        sheet = workbook.active
+        for row in self.df.itertuples(index=False):
+            sheet.append([None if isinstance(v, float) and np.isnan(v) else v for v in row])
+        sheet.append(make_row("3", "字符串序号", "对开双彩", 7.1))
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        buffer.seek(0)
+        expected = parse_numbered_orders(pd.read_excel(buffer, header=None))
+        buffer.seek(0)
+        self.assertEqual(parse_numbered_orders_from_workbook(buffer), expected)
+        self.assertEqual([o["order_id"] for o in expected], ["1", "2", "3"])
+
+    def test_date_cells_same_on_every_path(self):
+        """测试文本和数字的交货日期单元格在上传、流水线和命令行脚本的解析中得到相同的订单和日期顺序"""
+        from fix_json import recreate_orders_from_excel
+        from order_model import parse_delivery_date
+        from pipeline import _parse
+        dates = ["7.20", 7.2, 7.20, "6.9", 6.1, " 7.10 ", True, 1.0]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'dates.xlsx')
+            write_workbook(path, [(i + 1, f"产品{i}", "对开双彩", date) for i, date in enumerate(dates)])
+            # 文本单元格保持原样，数字单元格按数值转换，整数值不带小数部分
+            expected = ["7.20", "7.2", "7.2", "6.9", "6.1", "7.10", "True", "1"]
+            numbered = parse_numbered_orders_from_workbook(path)
+            self.assertEqual([o["delivery_date"] for o in numbered], expected)
+            # 上传接口按行号解析时跳过标题行后的第一行，其余日期相同
+            self.assertEqual([o["delivery_date"] for o in parse_orders_from_workbook(path)], expected[1:])
+            self.assertEqual(recreate_orders_from_excel(path), _parse(path, None))
+        self.assertEqual(parse_delivery_date(expected[0]), 720)
+        self.assertEqual(parse_delivery_date(expected[1]), 702)
+
+    def test_real_workbook(self):
+        """测试实际明细总表的解析结果"""
+        if not os.path.exists('内文印刷明细总表.xlsx'):
+            self.skipTest("内文印刷明细总表.xlsx not found")
+        orders = parse_numbered_orders(pd.read_excel('内文印刷明细总表.xlsx', header=None))
+        self.assertGreater(len(orders), 0)
+        self.assertTrue(all(o["product_name"] for o in orders))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import random
+from order_model import parse_delivery_date
+from order_query import OrderQueryIndex, parse_query_args
+
+class TestOrderQueryIndex(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        methods = ["小全开双彩", "对开双彩", "对开双黑"]
+        self.orders = [
+            {"order_id": str(i), "product_name": f"产品{i}", "printing_method": rng.choice(methods), "delivery_date": f"6.{rng.randint(1, 30)}"}
+            for i in range(300)
+        ]
+        self.index = OrderQueryIndex(self.orders)
+
+    def expected(self, method=None, date_from=None, date_to=None):
+        result = []
+        for order in self.orders:
+            key = parse_delivery_date(order["delivery_date"])
+            if method is not None and order["printing_method"] != method:
+                continue
+            if date_from is not None and key < date_from:
+                continue
+            if date_to is not None and key > date_to:
+                continue
+            result.append(order["order_id"])
+        return result
+
+    def collect(self, **filters):
+        """按游标翻完所有页"""
+        ids = []
+        cursor = 0
+        while True:
+            page = self.index.query(limit=17, cursor=cursor, **filters)
+            ids.extend(o["order_id"] for o in page["items"])
+            if page["next_cursor"] is None:
+                return ids, page["total"]
+            cursor = int(page["next_cursor"])
+
+    def test_filters_match_linear_scan(self):
+        """测试各种过滤条件的分页结果与线性扫描一致，且保持原列表顺序"""
+        cases = [
+            {},
+            {"printing_method": "对开双黑"},
+            {"date_from": 610, "date_to": 620},
+            {"printing_method": "小全开双彩", "date_from": 615},
+            {"printing_method": "不存在的印刷方式"}
+        ]
+        for filters in cases:
+            ids, total = self.collect(**filters)
+            expected = self.expected(filters.get("printing_method"), filters.get("date_from"), filters.get("date_to"))
+            self.assertEqual(ids, expected)
+            self.assertEqual(total, len(expected))
+
+    def test_date_range_excludes_unknown_and_normalizes_years(self):
+        """测试无法识别的交货日期不出现在日期范围结果中，带年份和不带年份的日期按月日比较"""
+        orders = [
+            {"order_id": "a", "printing_method": "对开双彩", "delivery_date": "6.15"},
+            {"order_id": "b", "printing_method": "对开双彩", "delivery_date": ""},
+            {"order_id": "c", "printing_method": "对开双彩", "delivery_date": "交货时间"},
+            {"order_id": "d", "printing_method": "对开双彩", "delivery_date": "2025-06-20"},
+            {"order_id": "e", "printing_method": "对开双彩", "delivery_date": "2024-06-20"},
+            {"order_id": "f", "printing_method": "对开双彩", "delivery_date": "1.5"},
+            {"order_id": "g", "printing_method": "对开双彩", "delivery_date": "2026-01-05"}
+        ]
+        index = OrderQueryIndex(orders)
+
+        def ids(**args):
+            query = parse_query_args(args)
+            return [o["order_id"] for o in index.query(query["printing_method"], query["date_from"], query["date_to"])["items"]]
+
+        self.assertEqual(ids(date_from="6.10"), ["a", "d", "e"])
+        self.assertEqual(ids(date_to="6.30", printing_method="对开双彩"), ["a", "d", "e", "f", "g"])
+        self.assertEqual(ids(date_from="2025-06-01", date_to="6.30"), ["a", "d"])
+        self.assertEqual(ids(date_from="2025-06-16"), ["d", "g"])
+        self.assertEqual(ids(date_from="2025-12-01", date_to="2026-01-31"), ["f", "g"])
+        self.assertEqual(ids(date_from="2024-01-01", date_to="2026-12-31"), ["a", "d", "e", "f", "g"])
+
+    def test_fields_projection(self):
+        """测试只返回指定字段"""
+        page = self.index.query(limit=3, fields=["order_id", "delivery_date"])
+        self.assertEqual(page["items"][0], {"order_id": "0", "delivery_date": self.orders[0]["delivery_date"]})
+        self.assertEqual(page["next_cursor"], "3")
+
+    def test_parse_query_args(self):
+        """测试查询参数解析：无参数返回None，日期按交货日期写法解析，非法值报错"""
+        self.assertIsNone(parse_query_args({}))
+        query = parse_query_args({"date_from": "6月9日", "limit": "5000", "fields": "order_id, product_name"})
+        self.assertEqual(query["date_from"], 609)
+        self.assertEqual(query["limit"], 1000)
+        self.assertEqual(query["fields"], ["order_id", "product_name"])
+        with self.assertRaises(ValueError):
+            parse_query_args({"limit": "abc"})
+        with self.assertRaises(ValueError):
+            parse_query_args({"cursor": "-1"})
+        with self.assertRaises(ValueError):
+            parse_query_args({"date_to": "bogus"})
+        with self.assertRaises(ValueError):
+            parse_query_args({"date_from": "6.20", "date_to": "6.10"})
+        query = parse_query_args({"date_from": "2025-06-01", "date_to": "6.30"})
+        self.assertEqual((query["date_from"], query["date_to"]), (20250601, 20250630))
+
+if __name__ == "__main__":
+    unittest.main()
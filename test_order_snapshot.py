@@ -0,0 +1,88 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import time
+from order_snapshot import write_snapshot, load_snapshot_orders, snapshot_path, OrderSnapshot, main
+
+ORDERS = [
+    {"order_id": "1", "product_name": "《写字本》“橙色”", "printing_method": "对开双彩", "delivery_date": "6.17"},
+    {"order_id": "2", "product_name": "练习册", "printing_method": "小全开双彩", "delivery_date": "6.9"},
+    {"order_id": "3", "product_name": "作文本", "printing_method": "对开双彩", "delivery_date": ""}
+]
+
+class TestOrderSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.tmp_dir, 'parsed_orders.json')
+        self.write_json(ORDERS)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_json(self, orders):
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            json.dump(orders, f, ensure_ascii=False, indent=2)
+
+    def test_round_trip(self):
+        """测试快照读取的订单与JSON相同，重复的值共用同一个字符串对象"""
+        self.assertEqual(write_snapshot(self.json_path, ORDERS), snapshot_path(self.json_path))
+        orders = load_snapshot_orders(self.json_path)
+        self.assertEqual(orders, ORDERS)
+        self.assertIs(orders[0]["printing_method"], orders[2]["printing_method"])
+
+        with OrderSnapshot(snapshot_path(self.json_path)) as snapshot:
+            self.assertEqual(len(snapshot), 3)
+            self.assertEqual(snapshot.codes("printing_method").tolist(), [0, 1, 0])
+            self.assertEqual(snapshot.column("delivery_date"), ["6.17", "6.9", ""])
+        self.assertEqual(load_snapshot_orders(self.json_path, fields=("order_id",)), [{"order_id": "1"}, {"order_id": "2"}, {"order_id": "3"}])
+
+        self.write_json([])
+        write_snapshot(self.json_path, [])
+        self.assertEqual(load_snapshot_orders(self.json_path), [])
+
+    def test_row_key_column(self):
+        """测试上传的订单带有行标识时快照包含这一列，只有部分订单带有行标识时不生成快照"""
+        keyed = [dict(order, row_key=f"k{i}") for i, order in enumerate(ORDERS)]
+        self.write_json(keyed)
+        self.assertIsNotNone(write_snapshot(self.json_path, keyed))
+        self.assertEqual(load_snapshot_orders(self.json_path), keyed)
+        self.assertIsNone(write_snapshot(self.json_path, keyed[:1] + ORDERS[1:]))
+
+    def test_load_orders_only_needed_columns(self):
+        """测试计算指标时只解码印刷方式和交货日期两列，优化结果与完整订单相同"""
+        from changeover_optimization import load_orders, optimize_changeovers, OPTIMIZE_FIELDS
+        write_snapshot(self.json_path, ORDERS)
+        orders = load_orders(self.json_path, fields=OPTIMIZE_FIELDS)
+        self.assertEqual(orders[0], {"printing_method": "对开双彩", "delivery_date": "6.17"})
+        self.assertEqual(load_orders(self.json_path), ORDERS)
+        partial, full = optimize_changeovers(orders), optimize_changeovers(ORDERS)
+        for key in ("changeover_before", "changeover_after", "changeover_cost_before", "changeover_cost_after"):
+            self.assertEqual(partial[key], full[key])
+
+    def test_stale_or_unrepresentable(self):
+        """测试JSON被修改后不使用快照；含非标准字段的订单不生成快照，并删除旧快照"""
+        write_snapshot(self.json_path, ORDERS)
+        time.sleep(0.01)
+        self.write_json(ORDERS[:2])
+        self.assertIsNone(load_snapshot_orders(self.json_path))
+
+        self.assertIsNone(write_snapshot(self.json_path, [dict(ORDERS[0], extra=1)]))
+        self.assertFalse(os.path.exists(snapshot_path(self.json_path)))
+        self.assertIsNone(write_snapshot(self.json_path, [dict(ORDERS[0], product_name="a\0b")]))
+        self.assertIsNone(load_snapshot_orders(self.json_path))
+
+    def test_corrupt_snapshot(self):
+        """测试快照文件损坏时返回None，由调用方读取JSON"""
+        with open(snapshot_path(self.json_path), 'wb') as f:
+            f.write(b"not a snapshot")
+        self.assertIsNone(load_snapshot_orders(self.json_path))
+
+    def test_cli(self):
+        """测试由JSON文件生成快照"""
+        self.assertEqual(main([self.json_path]), 0)
+        self.assertEqual(load_snapshot_orders(self.json_path), ORDERS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from perf_stats import PerfRecorder, LATENCY_BUCKETS
+
+class TestPerfRecorder(unittest.TestCase):
+    def test_route_quantiles_and_bytes(self):
+        """测试按路由汇总请求数、分位数、响应大小和服务端错误数"""
+        perf = PerfRecorder()
+        for i in range(1, 101):
+            perf.record_request('GET', '/api/orders', i / 1000, size=100)
+        perf.record_request('GET', '/api/orders', 0.2, size=0, status=500)
+        perf.record_request('POST', '/api/orders', 0.01, size=50, status=201)
+
+        routes = perf.snapshot()["routes"]
+        self.assertEqual(set(routes), {"GET /api/orders", "POST /api/orders"})
+        stats = routes["GET /api/orders"]
+        self.assertEqual(stats["count"], 101)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["bytes_total"], 10000)
+        self.assertAlmostEqual(stats["p50_ms"], 51.0)
+        self.assertAlmostEqual(stats["p95_ms"], 96.0)
+        self.assertEqual(stats["max_ms"], 200.0)
+
+    def test_stage_timings(self):
+        """测试上传阶段的耗时统计"""
+        perf = PerfRecorder()
+        perf.record_stage("parse", 0.5)
+        perf.record_stage("parse", 1.5)
+        stages = perf.snapshot()["upload_stages"]
+        self.assertEqual(stages["parse"]["count"], 2)
+        self.assertEqual(stages["parse"]["total_ms"], 2000.0)
+        self.assertNotIn("bytes_total", stages["parse"])
+
+        perf.reset()
+        self.assertEqual(perf.snapshot()["upload_stages"], {})
+
+    def test_prometheus_format(self):
+        """测试Prometheus文本格式：累计直方图桶、总和、计数和标签转义"""
+        perf = PerfRecorder(prefix='demo')
+        perf.record_request('GET', '/api/"x"', 0.003, size=10)
+        perf.record_request('GET', '/api/"x"', 100.0, size=20)
+        perf.record_stage("fix", 0.02)
+        text = perf.prometheus()
+
+        labels = 'method="GET",route="/api/\\"x\\""'
+        self.assertIn(f'demo_http_request_duration_seconds_bucket{{{labels},le="0.001"}} 0', text)
+        self.assertIn(f'demo_http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', text)
+        self.assertIn(f'demo_http_request_duration_seconds_bucket{{{labels},le="{LATENCY_BUCKETS[-1]!r}"}} 1', text)
+        self.assertIn(f'demo_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'demo_http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'demo_http_response_bytes_total{{{labels}}} 30', text)
+        self.assertIn('demo_upload_stage_duration_seconds_count{stage="fix"} 1', text)
+        self.assertIn('# TYPE demo_upload_stage_duration_seconds histogram', text)
+        self.assertTrue(text.endswith("\n"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from pipeline import Pipeline
+from test_order_parser import write_workbook
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.workbook = os.path.join(self.tmp_dir, 'orders.xlsx')
+        self.orders_file = os.path.join(self.tmp_dir, 'parsed_orders.json')
+        self.metrics_file = os.path.join(self.tmp_dir, 'metrics.json')
+        write_workbook(self.workbook, [
+            (1, "写字本", "对开双彩", "6.17"),
+            (2, "练习册", "小全开双彩", "6.9"),
+            (3, "写字本", "对开双彩", "6.17"),
+            (4, "作文本", "对开双彩", "6.10")
+        ])
+        self.pipeline = Pipeline(self.workbook, self.orders_file, self.metrics_file, os.path.join(self.tmp_dir, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def statuses(self, report):
+        return [s["status"] for s in report["stages"]]
+
+    def test_run_and_cached_rerun(self):
+        """测试首次运行所有阶段并写入输出，未变化时全部命中缓存且不写文件"""
+        report = self.pipeline.run()
+        self.assertEqual(self.statuses(report), ["ran"] * 4)
+        self.assertEqual(sorted(report["written"]), sorted([self.orders_file, self.metrics_file]))
+        with open(self.orders_file, 'r', encoding='utf-8') as f:
+            orders = json.load(f)
+        self.assertEqual([o["product_name"] for o in orders], ["写字本", "练习册", "写字本", "作文本"])
+        self.assertEqual(len({o["order_id"] for o in orders}), 4)
+        with open(self.metrics_file, 'r', encoding='utf-8') as f:
+            metrics = json.load(f)
+        self.assertEqual((metrics["changeover_before"], metrics["changeover_after"]), (4, 2))
+
+        report = self.pipeline.run()
+        self.assertEqual(self.statuses(report), ["cached"] * 4)
+        self.assertEqual(report["written"], [])
+        self.assertNotIn("metrics", report)
+
+    def test_repeated_serial_numbers_kept(self):
+        """测试产品序号分段重新编号时按序号和产品名称区分订单，不被当作重复订单丢弃"""
+        write_workbook(self.workbook, [
+            (1, "写字本", "对开双彩", "6.17"),
+            (2, "练习册", "小全开双彩", "6.9"),
+            (1, "作文本", "对开双彩", "6.10"),
+            (2, "练习册", "小全开双彩", "6.9"),
+            (3, "写字本", "对开双彩", "6.17")
+        ])
+        report = self.pipeline.run()
+        with open(self.orders_file, 'r', encoding='utf-8') as f:
+            orders = json.load(f)
+        self.assertEqual([o["product_name"] for o in orders], ["写字本", "练习册", "作文本", "练习册", "写字本"])
+        self.assertEqual(len({o["order_id"] for o in orders}), 5)
+        with open(self.metrics_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["changeover_before"], 5)
+
+    def test_output_rewritten_from_cache(self):
+        """测试输出文件被改动后从缓存重新写入，不重新运行任何阶段"""
+        self.pipeline.run()
+        with open(self.metrics_file, 'w', encoding='utf-8') as f:
+            f.write("{}")
+        report = self.pipeline.run()
+        self.assertEqual(self.statuses(report), ["cached"] * 4)
+        self.assertEqual(report["written"], [self.metrics_file])
+        with open(self.metrics_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["changeover_before"], 4)
+
+    def test_changed_workbook_reruns(self):
+        """测试工作簿内容变化后重新运行各阶段，并清理旧的缓存结果"""
+        self.pipeline.run()
+        write_workbook(self.workbook, [(1, "写字本", "对开双彩", "6.17")])
+        report = self.pipeline.run()
+        self.assertEqual(self.statuses(report), ["ran"] * 4)
+        self.assertEqual(report["metrics"]["changeover_before"], 1)
+        blobs = [name for name in os.listdir(os.path.join(self.tmp_dir, 'cache')) if name != 'manifest.json']
+        self.assertEqual(len(blobs), 4)
+
+        report = self.pipeline.run(force=True)
+        self.assertEqual(self.statuses(report), ["ran"] * 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import os
+import shutil
+import tempfile
+from row_index import RowIndex, assign_order_keys, row_hash
+
+def make_rows():
+    return [
+        {"order_id": "1", "product_name": "写字本", "printing_method": "对开双彩", "delivery_date": "6.17"},
+        {"order_id": "2", "product_name": "练习册", "printing_method": "小全开双彩", "delivery_date": "6.9"},
+        {"order_id": "1", "product_name": "作文本", "printing_method": "对开双彩", "delivery_date": "6.10"},
+        {"order_id": "1", "product_name": "写字本", "printing_method": "对开双彩", "delivery_date": "6.17"}
+    ]
+
+class TestRowIndex(unittest.TestCase):
+    def test_stable_keys(self):
+        """测试行标识由产品序号和名称决定，不随行的位置和印刷方式、交货日期变化；订单编号保持为产品序号"""
+        rows = assign_order_keys(make_rows())
+        keys = [o["row_key"] for o in rows]
+        self.assertEqual(len(set(keys)), 4)
+        self.assertEqual(keys[3], keys[0] + "#2")
+        self.assertEqual([o["order_id"] for o in rows], ["1", "2", "1#2", "1#3"])
+
+        edited = make_rows()[1:3]
+        edited[1]["delivery_date"] = "7.1"
+        self.assertEqual([o["row_key"] for o in assign_order_keys(edited)], keys[1:3])
+
+        # 没有产品序号的行也得到不重复的编号
+        unnumbered = assign_order_keys([{"order_id": "", "product_name": "甲"}, {"order_id": "", "product_name": "乙"}])
+        self.assertEqual([o["order_id"] for o in unnumbered], ["#1", "#2"])
+
+    def test_diff(self):
+        """测试按行内容哈希得到新增、修改和删除的行"""
+        old = RowIndex.from_orders(assign_order_keys(make_rows()))
+        rows = assign_order_keys(make_rows()[:3])
+        rows[1]["printing_method"] = "对开双黑"
+        rows.append(assign_order_keys([{"order_id": "3", "product_name": "新书", "printing_method": "", "delivery_date": ""}])[0])
+        added, changed, removed = old.diff(RowIndex.from_orders(rows))
+        self.assertEqual(added, [rows[3]["row_key"]])
+        self.assertEqual(changed, [rows[1]["row_key"]])
+        self.assertEqual(len(removed), 1)
+        self.assertTrue(removed[0].endswith("#2"))
+        self.assertNotEqual(row_hash(rows[1]), row_hash(make_rows()[1]))
+
+    def test_save_and_load(self):
+        """测试保存后读取索引，存储版本不一致或文件损坏时索引无效"""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'rows.json')
+            index = RowIndex.from_orders(assign_order_keys(make_rows()), source=[123, 456])
+            index.save(path)
+            loaded = RowIndex.load(path)
+            self.assertEqual(loaded.hashes, index.hashes)
+            self.assertTrue(loaded.matches((123, 456)))
+            self.assertFalse(loaded.matches([123, 457]))
+            self.assertFalse(RowIndex(index.hashes).matches([123, 456]))
+
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("{")
+            self.assertIsNone(RowIndex.load(path))
+            self.assertIsNone(RowIndex.load(os.path.join(tmp_dir, 'missing.json')))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import random
+import time
+from datetime import datetime
+from scheduler import schedule_orders, method_requirements, machine_capabilities, is_compatible
+
+DEVICES = [
+    {"machine": "XL106", "type": "小全开八色", "color_units": 8, "speed_sheets_per_hour": 15000, "supports_spot_color": True},
+    {"machine": "SM102", "type": "对开八色", "color_units": 8, "speed_sheets_per_hour": 12000, "supports_spot_color": False}
+]
+
+class TestScheduler(unittest.TestCase):
+    def test_compatibility(self):
+        """测试印刷方式与机台的兼容判断"""
+        full, half = [machine_capabilities(d) for d in DEVICES]
+        self.assertTrue(is_compatible(method_requirements("小全开双彩"), full))
+        self.assertFalse(is_compatible(method_requirements("小全开双彩"), half))
+        self.assertTrue(is_compatible(method_requirements("对开双彩"), full))
+        self.assertFalse(is_compatible(method_requirements("对开双彩+对开双专色"), half))
+        self.assertFalse(is_compatible(method_requirements("对开双彩轮转"), full))
+
+    def test_schedule_orders(self):
+        """测试批次分配到兼容机台并按机台给出时间"""
+        orders = [
+            {"order_id": "1", "printing_method": "小全开双彩", "delivery_date": "6.10", "sheets": 15000},
+            {"order_id": "2", "printing_method": "对开双彩", "delivery_date": "6.12", "sheets": 12000},
+            {"order_id": "3", "printing_method": "对开双彩轮转", "delivery_date": "6.12"}
+        ]
+        result = schedule_orders(orders, DEVICES, datetime(2025, 6, 1, 8), changeover_minutes=30)
+
+        plans = {m["machine"]: m for m in result["machines"]}
+        self.assertEqual([j["printing_method"] for j in plans["XL106"]["jobs"]], ["小全开双彩"])
+        self.assertEqual([j["printing_method"] for j in plans["SM102"]["jobs"]], ["对开双彩"])
+        self.assertEqual(plans["XL106"]["jobs"][0]["end"], "2025-06-01T09:30:00")
+        self.assertEqual(result["makespan_minutes"], 90.0)
+        self.assertEqual(result["unscheduled"][0]["order_ids"], ["3"])
+
+    def test_schedule_scale(self):
+        """测试数千订单、数十台机台时的排产耗时"""
+        rng = random.Random(7)
+        methods = ["小全开双彩", "对开双彩", "对开双黑"] + [f"对开双彩{i}" for i in range(300)]
+        orders = [{"order_id": str(i), "printing_method": rng.choice(methods), "delivery_date": "6.1"} for i in range(5000)]
+        devices = [dict(DEVICES[i % 2], machine=f"M{i}", speed_sheets_per_hour=10000 + i * 50) for i in range(40)]
+
+        start = time.perf_counter()
+        result = schedule_orders(orders, devices)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(sum(len(j["orders"]) for m in result["machines"] for j in m["jobs"]), 5000)
+        self.assertLess(elapsed, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from upload_jobs import JobQueue
+
+class TestJobQueue(unittest.TestCase):
+    def test_stages_and_result(self):
+        """测试任务按阶段记录耗时并保存结果，失败时记录失败阶段和错误"""
+        queue = JobQueue()
+
+        def work(job, value):
+            with job.stage("parse"):
+                pass
+            with job.stage("optimize"):
+                if value < 0:
+                    raise ValueError("负数")
+            return value * 2
+
+        ok = queue.wait(queue.submit("ok", work, 21).id, timeout=10)
+        self.assertEqual(ok.status, "succeeded")
+        self.assertEqual(ok.result, 42)
+        self.assertEqual([s["status"] for s in ok.to_dict()["stages"]], ["done", "done"])
+
+        failed = queue.wait(queue.submit("bad", work, -1).id, timeout=10)
+        info = failed.to_dict()
+        self.assertEqual(info["status"], "failed")
+        self.assertEqual(info["error"], "负数")
+        self.assertEqual(info["stage"], "optimize")
+        self.assertEqual(info["stages"][-1]["status"], "failed")
+
+    def test_stage_callback(self):
+        """测试每个阶段结束时（包括失败的阶段）调用 on_stage 回调"""
+        timings = []
+        queue = JobQueue(on_stage=lambda name, seconds: timings.append((name, seconds)))
+
+        def work(job):
+            with job.stage("parse"):
+                pass
+            with job.stage("write"):
+                raise OSError("磁盘已满")
+
+        queue.wait(queue.submit("timed", work).id, timeout=10)
+        self.assertEqual([name for name, _ in timings], ["parse", "write"])
+        self.assertTrue(all(seconds >= 0 for _, seconds in timings))
+
+    def test_queue_depth_limit(self):
+        """测试排队和运行中的任务达到上限后拒绝新任务，完成后恢复"""
+        queue = JobQueue(max_workers=1, max_pending=2)
+        release = threading.Event()
+        jobs = [queue.submit("wait", lambda job: release.wait(10)) for _ in range(2)]
+        self.assertIsNone(queue.submit("extra", lambda job: None))
+        self.assertEqual(queue.pending(), 2)
+        release.set()
+        for job in jobs:
+            queue.wait(job.id, timeout=10)
+        self.assertIsNotNone(queue.submit("extra", lambda job: None))
+    def test_queue_limit_shared_through_state_dir(self):
+        """测试多个进程（共用目录的多个队列实例）的排队上限合计计算，所在进程已退出的任务不计入"""
+        with tempfile.TemporaryDirectory() as state_dir:
+            first = JobQueue(max_workers=1, max_pending=2, state_dir=state_dir)
+            second = JobQueue(max_workers=1, max_pending=2, state_dir=state_dir)
+            release = threading.Event()
+            jobs = [first.submit("wait", lambda job: release.wait(10)), second.submit("wait", lambda job: release.wait(10))]
+            self.assertIsNone(second.submit("extra", lambda job: None))
+            self.assertEqual(first.pending(), 2)
+            release.set()
+            first.wait(jobs[0].id, timeout=10)
+            second.wait(jobs[1].id, timeout=10)
+            self.assertEqual(second.pending(), 0)
+
+            # 崩溃的进程留下的排队状态不再占用名额
+            with open(os.path.join(state_dir, "f" * 32 + ".json"), 'w', encoding='utf-8') as f:
+                json.dump({"status": "running", "owner": [2 ** 22 + 12345, "gone"]}, f)
+            self.assertEqual(first.pending(), 0)
+            self.assertNotIn("owner", first.status(jobs[1].id))
+
+    def test_status_shared_through_state_dir(self):
+        """测试设置共享目录后，其它进程（另一个队列实例）也能查询任务状态"""
+        with tempfile.TemporaryDirectory() as state_dir:
+            queue = JobQueue(state_dir=state_dir)
+            job = queue.wait(queue.submit("shared", lambda job: {"orders_count": 3}).id, timeout=10)
+
+            other = JobQueue(state_dir=state_dir)
+            status = other.status(job.id)
+            self.assertEqual(status["status"], "succeeded")
+            self.assertEqual(status["result"], {"orders_count": 3})
+            self.assertIsNone(other.status("0" * 32))
+            self.assertIsNone(other.status("../secret"))
+
+if __name__ == "__main__":
+    unittest.main()
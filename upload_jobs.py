@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from atomic_io import write_json_atomic
+from log_utils import get_logger
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 下使用单进程的 waitress，只需要进程内的锁
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# 共享目录中多个进程提交任务时互相排斥的锁文件
+QUEUE_LOCK_FILE = '.queue.lock'
+
+def _process_alive(pid):
+    """进程是否仍在运行；无法判断时按仍在运行处理"""
+    if not isinstance(pid, int) or os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+class Job:
+    """一个后台处理任务：记录状态、各阶段的耗时以及最终结果或错误"""
+
+    def __init__(self, job_id, name):
+        self.id = job_id
+        self.name = name
+        self.status = 'queued'
+        self.stages = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        # 状态变化时的回调，用于把任务状态写入多个进程共享的目录
+        self.on_change = None
+        # 阶段结束时的回调 on_stage(阶段名, 耗时秒数)，用于汇总各阶段的耗时分布
+        self.on_stage = None
+        self._lock = threading.Lock()
+
+    def changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个处理阶段的开始、结束和耗时"""
+        record = {"name": name, "status": "running", "elapsed_ms": None}
+        with self._lock:
+            self.stages.append(record)
+        self.changed()
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception:
+            record["status"] = "failed"
+            raise
+        else:
+            record["status"] = "done"
+        finally:
+            elapsed = time.perf_counter() - start
+            record["elapsed_ms"] = round(elapsed * 1000, 3)
+            if self.on_stage is not None:
+                self.on_stage(name, elapsed)
+            self.changed()
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self):
+        with self._lock:
+            stages = [dict(s) for s in self.stages]
+        total_ms = None
+        if self.started_at is not None:
+            total_ms = round(((self.finished_at or time.time()) - self.started_at) * 1000, 3)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "stage": stages[-1]["name"] if stages else None,
+            "stages": stages,
+            "queued_ms": round(((self.started_at or time.time()) - self.created_at) * 1000, 3),
+            "total_ms": total_ms,
+            "result": self.result,
+            "error": self.error
+        }
+
+class JobQueue:
+    """有界的后台任务队列：固定数量的工作线程依次处理，排队和运行中的任务超过 max_pending 时拒绝新任务
+
+    设置 state_dir 后任务状态同时写入该目录，多进程部署时任何一个进程都能查询到其它进程中的任务，
+    max_pending 也按目录中所有进程排队和运行中的任务计算（所在进程已经退出的任务不计入）；
+    on_stage(阶段名, 耗时秒数) 在每个任务的每个阶段结束时调用。
+    """
+
+    def __init__(self, max_workers=1, max_pending=8, max_history=100, state_dir=None, on_stage=None):
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self.state_dir = state_dir
+        self.on_stage = on_stage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload-job')
+        self._jobs = OrderedDict()
+        self._futures = {}
+        self._lock = threading.Lock()
+        # 与进程号一起标识写入共享目录的任务属于哪个队列（fork出的worker进程号不同）
+        self._token = uuid.uuid4().hex
+
+    def _owner(self):
+        return [os.getpid(), self._token]
+
+    @contextmanager
+    def _shared_lock(self):
+        """多个进程共用 state_dir 时，统计任务数和写入新任务期间持有排他锁"""
+        if not self.state_dir or fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.state_dir, QUEUE_LOCK_FILE), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _other_pending(self):
+        """共享目录中其它队列（其它进程）排队和运行中的任务数"""
+        if not self.state_dir:
+            return 0
+        owner = self._owner()
+        count = 0
+        try:
+            names = os.listdir(self.state_dir)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.state_dir, name), 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            job_owner = state.get('owner')
+            if (state.get('status') in ('queued', 'running') and job_owner != owner
+                    and isinstance(job_owner, list) and job_owner and _process_alive(job_owner[0])):
+                count += 1
+        return count
+
+    def pending(self):
+        """排队和运行中的任务数（设置 state_dir 时包括其它进程中的任务）"""
+        with self._lock:
+            local = sum(1 for job in self._jobs.values() if not job.finished)
+        return local + self._other_pending()
+
+    def submit(self, name, func, *args):
+        """提交任务，func(job, *args) 的返回值作为任务结果；队列已满时返回None"""
+        with self._lock, self._shared_lock():
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending + self._other_pending() >= self.max_pending:
+                return None
+            job = Job(uuid.uuid4().hex, name)
+            job.on_change = self._persist
+            job.on_stage = self.on_stage
+            self._jobs[job.id] = job
+            self._trim()
+            # 先写入排队状态再交给工作线程，避免覆盖工作线程写入的新状态
+            job.changed()
+            self._futures[job.id] = self._executor.submit(self._run, job, func, args)
+        return job
+
+    def _run(self, job, func, args):
+        job.started_at = time.time()
+        job.status = 'running'
+        job.changed()
+        try:
+            job.result = func(job, *args)
+            job.status = 'succeeded'
+        except Exception as e:
+            logger.exception("任务 %s (%s) 处理失败", job.id, job.name)
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            job.changed()
+            with self._lock:
+                self._futures.pop(job.id, None)
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        if not self.state_dir:
+            return
+        try:
+            write_json_atomic(self._state_path(job.id), dict(job.to_dict(), owner=self._owner()), indent=None)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("保存任务状态时出错 (%s): %s", job.id, e)
+
+    def _trim(self):
+        """只保留最近 max_history 个已完成的任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+            if self.state_dir:
+                try:
+                    os.remove(self._state_path(job_id))
+                except OSError:
+                    pass
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """返回任务状态字典：先查本进程，再查共享目录；任务不存在时返回None"""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not self.state_dir or not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(self._state_path(job_id), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        state.pop('owner', None)
+        return state
+
+    def wait(self, job_id, timeout=None):
+        """等待任务完成并返回任务"""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.exception(timeout)
+        return self.get(job_id)